@@ -1,3 +1,4 @@
+import logging
 from flask import Flask
 from app.models import db
 from flask_migrate import Migrate
@@ -8,42 +9,72 @@ from datetime import timedelta
 migrate = Migrate()
 jwt = JWTManager()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
 
     # Enable CORS for all routes with full configuration
-    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True,
+         expose_headers=["X-Next-Cursor"])
 
     # Load config from config.py
     app.config.from_object('config.Config')
+    if test_config:
+        app.config.update(test_config)  # tests/: SQLite แทน MySQL
 
     # 🔧 DEV (Override for testing token expiration flow)
     # app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False # Commented out to test expiration
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=8) # Set to 8 hours for testing
 
+    # structured logging ของ OCR pipeline (ระดับจาก OCR_LOG_LEVEL)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    logging.getLogger("app").setLevel(app.config["OCR_LOG_LEVEL"].upper())
+
+    # pool ของทุก engine (primary / replica) จับเวลารอ connection -> /api/metrics
+    from app.utils.db_routing import TimedQueuePool
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": TimedQueuePool, **app.config["SQLALCHEMY_ENGINE_OPTIONS"]}
+
     # init extensions (ต้องมาก่อน register blueprint)
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
     # import models
-    from app.models import user, ocr_result
+    from app.models import user, ocr_result, ocr_job, ocr_cache, meter_summary
 
     # import routes
     from app.routes.auth_routes import auth_bp
     from app.routes.ocr import ocr_bp
     from app.routes.meter_routes import meter_bp
     from app.routes.admin import admin_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.export import export_bp
+    from app.routes.health import health_bp
 
     # register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(ocr_bp, url_prefix='/api')
     app.register_blueprint(meter_bp, url_prefix='/api')
     app.register_blueprint(admin_bp) # admin_bp already has /api prefix in the file
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(health_bp) # /api/health, /api/health/live, /api/health/ready
+
+    # flask CLI commands (flask consumption rebuild ...)
+    from app.commands import register_commands
+    register_commands(app)
+
+    # จับเวลาทุก endpoint -> /api/metrics
+    from app.services import ocr_metrics
+    ocr_metrics.init_app(app)
     
-    # Auto-create tables (Dev mode convenience)
-    with app.app_context():
-        db.create_all()
+    # start OCR job workers ตอนมี request แรก (ไม่ start ตอนรัน CLI / migration)
+    from app.services import ocr_jobs
+
+    @app.before_request
+    def start_ocr_job_workers():
+        ocr_jobs.ensure_workers(app)
 
+    # schema ไม่สร้างตอน start แล้ว (ไม่ต้องต่อ DB ทุกครั้งที่ boot) -> `flask db upgrade` หรือ `flask init-db`
     return app
 
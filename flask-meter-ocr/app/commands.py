@@ -0,0 +1,137 @@
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+import click
+from flask.cli import AppGroup, with_appcontext
+
+consumption_cli = AppGroup("consumption", help="Per-meter consumption aggregates")
+
+
+@consumption_cli.command("rebuild")
+@click.option("--meter-id", type=int, default=None, help="rebuild one meter only")
+def consumption_rebuild(meter_id):
+    """คำนวณ meter_summaries / meter_consumption_buckets ใหม่จาก meter_readings"""
+    from app.models import db
+    from app.services import consumption
+
+    if meter_id is not None:
+        consumption.rebuild_meter(meter_id)
+        db.session.commit()
+        click.echo(f"Rebuilt consumption for meter {meter_id}")
+        return
+    count = consumption.rebuild_all()
+    click.echo(f"Rebuilt consumption for {count} meters")
+
+
+digits_cli = AppGroup("digits", help="Digit classifier (fast path before Tesseract)")
+
+
+def _collect_confirmed(limit):
+    from app.services import digit_classifier
+
+    glyphs, labels, used = digit_classifier.collect_confirmed(limit)
+    click.echo(f"Collected {len(labels)} glyphs from {used} confirmed readings")
+    return glyphs, labels
+
+
+@digits_cli.command("export")
+@click.option("--out", default="data/digit_samples.npz", show_default=True, help="dataset file")
+@click.option("--limit", type=int, default=None, help="confirmed readings to sample (newest first)")
+def digits_export(out, limit):
+    """ตัด glyph จากภาพของ reading ที่ผู้ใช้ยืนยันแล้ว -> dataset (.npz) สำหรับ train offline"""
+    from app.services import digit_classifier
+
+    glyphs, labels = _collect_confirmed(limit)
+    digit_classifier.save_samples(out, glyphs, labels)
+    click.echo(f"Saved {out}")
+
+
+@digits_cli.command("train")
+@click.option("--samples", default=None, help="dataset from `flask digits export` (default: collect from DB now)")
+@click.option("--out", default=None, help="model file (default DIGIT_MODEL_PATH)")
+@click.option("--per-class", type=int, default=300, show_default=True, help="max samples kept per digit")
+@click.option("--limit", type=int, default=None, help="confirmed readings to sample when --samples is not given")
+def digits_train(samples, out, per_class, limit):
+    """train kNN digit classifier แล้วเขียน model (.npz) - worker โหลดตอน start ครั้งถัดไป"""
+    from config import Config
+    from app.services import digit_classifier
+
+    if samples:
+        glyphs, labels = digit_classifier.load_samples(samples)
+    else:
+        glyphs, labels = _collect_confirmed(limit)
+    if not len(labels):
+        raise click.ClickException("no training samples")
+
+    model = digit_classifier.train(glyphs, labels, per_class=per_class)
+    path = out or Config.DIGIT_MODEL_PATH
+    model.save(path)
+    per_digit = {d: int((model.labels == d).sum()) for d in range(10)}
+    click.echo(f"Saved {path} version={model.version} samples={len(model)} per_digit={per_digit}")
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db():
+    """สร้างตารางที่ยังไม่มี (dev / เครื่องใหม่) - production ใช้ `flask db upgrade`"""
+    from app.models import db
+
+    db.create_all()
+    click.echo("Created missing tables")
+
+
+# module ที่ไม่ควรถูก import ตอน start (โหลดเมื่อมี OCR request แรก หรือ gunicorn preload)
+HEAVY_MODULES = ("cv2", "numpy", "pytesseract", "tesserocr", "PIL")
+
+_STARTUP_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+@click.command("startup-report")
+@click.option("--top", type=int, default=15, show_default=True, help="packages to list (by self import time)")
+@click.option("--max-ms", type=float, default=None, help="fail if import + create_app() takes longer")
+@click.option("--allow-heavy", is_flag=True, help="do not fail when the OCR stack is imported at startup")
+def startup_report(top, max_ms, allow_heavy):
+    """เวลา import app + create_app() ใน process ใหม่ (python -X importtime) แยกตาม package"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise click.ClickException("create_app() failed:\n" + "\n".join(errors[-20:]))
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    per_package = defaultdict(int)  # root package -> self time (us)
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            per_package[match.group(4).split(".")[0]] += int(match.group(1))
+    total_us = sum(per_package.values())
+
+    click.echo(f"create_app(): {probe['seconds'] * 1000:.0f} ms (imports {total_us / 1000:.0f} ms, "
+               f"{len(per_package)} packages)")
+    for name, us in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        click.echo(f"  {us / 1000:8.1f} ms  {name}")
+    click.echo(f"OCR stack at startup: {', '.join(probe['heavy']) or 'none'}")
+
+    if probe["heavy"] and not allow_heavy:
+        raise click.ClickException(f"heavy modules imported at startup: {', '.join(probe['heavy'])}")
+    if max_ms is not None and probe["seconds"] * 1000 > max_ms:
+        raise click.ClickException(f"startup {probe['seconds'] * 1000:.0f} ms > --max-ms {max_ms:g}")
+
+
+def register_commands(app):
+    app.cli.add_command(consumption_cli)
+    app.cli.add_command(digits_cli)
+    app.cli.add_command(init_db)
+    app.cli.add_command(startup_report)
@@ -1,8 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession: endpoint ที่ใส่ @read_replica อ่านจาก bind "replica" (ถ้าตั้งไว้)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 from app.models.user import User
 from app.models.ocr_result import OCRResult
 from app.models.meter import Meter
 from app.models.meter_reading import MeterReading
+from app.models.ocr_job import OCRJob
+from app.models.ocr_cache import OCRCacheEntry
+from app.models.meter_summary import MeterSummary, MeterConsumptionBucket
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Meter(db.Model):
     __tablename__ = "meters"
+    __table_args__ = (
+        db.Index("ix_meters_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     serial_number = db.Column(db.String(100), unique=True, nullable=False)
@@ -12,6 +15,23 @@ class Meter(db.Model):
 
     # Relationship to readings with cascade delete
     readings = db.relationship("MeterReading", back_populates="meter", cascade="all, delete-orphan")
+    summary = db.relationship("MeterSummary", uselist=False, cascade="all, delete-orphan")
+    consumption_buckets = db.relationship("MeterConsumptionBucket", cascade="all, delete-orphan", lazy="dynamic")
+
+    @classmethod
+    def list_query(cls):
+        """projection สำหรับ list endpoint (เลือกเฉพาะ column ที่ตอบกลับ ไม่สร้าง ORM object)"""
+        return db.session.query(cls.id, cls.serial_number, cls.building, cls.floor, cls.created_at)
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            "id": row.id,
+            "serial_number": row.serial_number,
+            "building": row.building,
+            "floor": row.floor,
+            "created_at": row.created_at
+        }
 
     def to_dict(self):
         return {
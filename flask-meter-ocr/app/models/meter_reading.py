@@ -1,18 +1,47 @@
 from app.models import db
+from app.models.meter import Meter
+from app.utils.reading_value import parse_reading_value
 from datetime import datetime
 
 class MeterReading(db.Model):
     __tablename__ = "meter_readings"
+    __table_args__ = (
+        db.Index("ix_meter_readings_meter_id_created_at_id", "meter_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     meter_id = db.Column(db.Integer, db.ForeignKey('meters.id'), nullable=False)
     reading = db.Column(db.String(50), nullable=False)
+    reading_value = db.Column(db.Numeric(14, 3), nullable=True)  # ค่าตัวเลขของ reading (None = parse ไม่ได้)
     image_path = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationship
     meter = db.relationship("Meter", back_populates="readings")
 
+    @db.validates("reading")
+    def _sync_reading_value(self, key, value):
+        self.reading_value = parse_reading_value(value)
+        return value
+
+    @classmethod
+    def list_query(cls):
+        """projection + join เอา serial_number มาใน query เดียว (to_dict จะ lazy-load meter ทีละแถว)"""
+        return (db.session.query(cls.id, cls.meter_id, Meter.serial_number, cls.reading,
+                                 cls.image_path, cls.created_at)
+                .join(Meter, cls.meter_id == Meter.id))
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            "id": row.id,
+            "meter_id": row.meter_id,
+            "serial_number": row.serial_number,
+            "reading": row.reading,
+            "image_path": row.image_path,
+            "created_at": row.created_at
+        }
+
     def to_dict(self):
         return {
             "id": self.id,
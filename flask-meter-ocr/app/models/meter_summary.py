@@ -0,0 +1,61 @@
+from app.models import db
+from datetime import datetime
+
+class MeterSummary(db.Model):
+    """ค่าล่าสุด / ก่อนหน้าของแต่ละมิเตอร์ (อัปเดตใน transaction เดียวกับการบันทึก reading)"""
+    __tablename__ = "meter_summaries"
+
+    meter_id = db.Column(db.Integer, db.ForeignKey('meters.id'), primary_key=True)
+    latest_reading_id = db.Column(db.Integer, nullable=True)
+    latest_value = db.Column(db.Numeric(14, 3), nullable=True)
+    latest_at = db.Column(db.DateTime, nullable=True)
+    previous_reading_id = db.Column(db.Integer, nullable=True)
+    previous_value = db.Column(db.Numeric(14, 3), nullable=True)
+    previous_at = db.Column(db.DateTime, nullable=True)
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        consumption = None
+        if self.latest_value is not None and self.previous_value is not None:
+            consumption = float(max(self.latest_value - self.previous_value, 0))
+        return {
+            "meter_id": self.meter_id,
+            "latest": {
+                "reading_id": self.latest_reading_id,
+                "value": float(self.latest_value) if self.latest_value is not None else None,
+                "created_at": self.latest_at.isoformat() if self.latest_at else None,
+            },
+            "previous": {
+                "reading_id": self.previous_reading_id,
+                "value": float(self.previous_value) if self.previous_value is not None else None,
+                "created_at": self.previous_at.isoformat() if self.previous_at else None,
+            },
+            "consumption_since_previous": consumption,
+            "reading_count": self.reading_count,
+        }
+
+
+class MeterConsumptionBucket(db.Model):
+    """การใช้ไฟรายวัน / รายเดือน (ผลต่างจาก reading ก่อนหน้า นับเข้า bucket ของ reading ใหม่)"""
+    __tablename__ = "meter_consumption_buckets"
+    __table_args__ = (
+        db.UniqueConstraint("meter_id", "period", "bucket_start", name="uq_meter_consumption_bucket"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    meter_id = db.Column(db.Integer, db.ForeignKey('meters.id'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)  # day | month
+    bucket_start = db.Column(db.Date, nullable=False)
+    consumption = db.Column(db.Numeric(14, 3), nullable=False, default=0)
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    last_value = db.Column(db.Numeric(14, 3), nullable=True)
+
+    def to_dict(self):
+        return {
+            "period": self.period,
+            "bucket_start": self.bucket_start.isoformat(),
+            "consumption": float(self.consumption),
+            "reading_count": self.reading_count,
+            "last_value": float(self.last_value) if self.last_value is not None else None,
+        }
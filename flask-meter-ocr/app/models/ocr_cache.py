@@ -0,0 +1,24 @@
+from app.models import db
+from datetime import datetime
+
+class OCRCacheEntry(db.Model):
+    __tablename__ = "ocr_cache"
+
+    # sha256(ไฟล์ที่อัปโหลด) + ":" + เวอร์ชัน engine/config
+    key = db.Column(db.String(128), primary_key=True)
+    image_path = db.Column(db.String(255), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    serial_number = db.Column(db.String(100), nullable=True)
+    reading = db.Column(db.String(50), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_result(self):
+        return {
+            "image_path": self.image_path,
+            "text": self.text,
+            "serial": self.serial_number,
+            "reading": self.reading,
+        }
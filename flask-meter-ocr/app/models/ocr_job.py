@@ -0,0 +1,37 @@
+from app.models import db
+from datetime import datetime
+
+class OCRJob(db.Model):
+    __tablename__ = "ocr_jobs"
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)  # queued | running | done | failed
+    image_path = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.String(50), nullable=True)
+    ocr_result_id = db.Column(db.Integer, db.ForeignKey('ocr_results.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    result = db.relationship("OCRResult")
+
+    def to_dict(self):
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "result": None,
+        }
+        if self.result:
+            data["result"] = {
+                "id": self.result.id,
+                "text": self.result.text,
+                "serial": self.result.serial_number,
+                "reading": self.result.reading,
+            }
+        return data
@@ -1,12 +1,22 @@
 from app.models import db
+from app.utils.reading_value import parse_reading_value
 from datetime import datetime
 
 class OCRResult(db.Model):
     __tablename__ = "ocr_results"
+    __table_args__ = (
+        db.Index("ix_ocr_results_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     image_path = db.Column(db.String(255), nullable=False)
     text = db.Column(db.Text, nullable=False)
     serial_number = db.Column(db.String(100), nullable=True)
     reading = db.Column(db.String(50), nullable=True) # Storing as string to preserve formatting if needed
+    reading_value = db.Column(db.Numeric(14, 3), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @db.validates("reading")
+    def _sync_reading_value(self, key, value):
+        self.reading_value = parse_reading_value(value)
+        return value
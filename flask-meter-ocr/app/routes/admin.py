@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, request, jsonify, send_from_directory
 from app.models import db
 from app.models.user import User
 from app.utils.auth import require_role
+from app.services import ocr_cache, ocr_trace
+from config import Config
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -51,3 +54,43 @@ def delete_user(user_id):
     db.session.delete(user)
     db.session.commit()
     return jsonify({"message": "User deleted successfully"}), 200
+
+@admin_bp.route("/api/admin/ocr-cache", methods=["GET"])
+@require_role(["admin"])
+def ocr_cache_stats():
+    return jsonify(ocr_cache.stats()), 200
+
+@admin_bp.route("/api/admin/layout-cache", methods=["GET"])
+@require_role(["admin"])
+def layout_cache_stats():
+    from app.services import layout_cache
+    return jsonify(layout_cache.stats()), 200
+
+@admin_bp.route("/api/admin/layout-cache", methods=["DELETE"])
+@require_role(["admin"])
+def clear_layout_cache():
+    from app.services import layout_cache
+    layout_cache.clear()
+    return jsonify({"message": "Layout cache cleared"}), 200
+
+@admin_bp.route("/api/admin/ocr-traces", methods=["GET"])
+@require_role(["admin"])
+def list_ocr_traces():
+    return jsonify(ocr_trace.list_traces()), 200
+
+@admin_bp.route("/api/admin/ocr-traces/<trace_id>", methods=["GET"])
+@require_role(["admin"])
+def get_ocr_trace(trace_id):
+    meta = ocr_trace.load_trace(trace_id)
+    if not meta:
+        return jsonify({"error": "Trace not found"}), 404
+    meta["urls"] = [f"/api/admin/ocr-traces/{trace_id}/{name}" for name in meta["files"]]
+    return jsonify(meta), 200
+
+@admin_bp.route("/api/admin/ocr-traces/<trace_id>/<filename>", methods=["GET"])
+@require_role(["admin"])
+def get_ocr_trace_file(trace_id, filename):
+    if not ocr_trace.is_valid_trace_id(trace_id):
+        return jsonify({"error": "Trace not found"}), 404
+    trace_dir = os.path.abspath(os.path.join(Config.OCR_TRACE_DIR, trace_id))
+    return send_from_directory(trace_dir, filename)
@@ -0,0 +1,128 @@
+import csv
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+from app.models import db
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.models.ocr_result import OCRResult
+from app.utils import fast_json
+from app.utils.db_routing import replica_reads
+from config import Config
+
+export_bp = Blueprint("export", __name__)
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+class _Echo:
+    """csv.writer เขียนลง object นี้แล้วได้ string กลับมา (ไม่ต้องเก็บทั้งไฟล์ใน memory)"""
+
+    def write(self, value):
+        return value
+
+
+def _parse_date(value, end=False):
+    """รับ ISO date/datetime; ถ้าเป็นวันที่อย่างเดียวและเป็นขอบบน -> รวมทั้งวัน"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def _export_args():
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"invalid format (use one of {sorted(FORMATS)})")
+    try:
+        date_from = _parse_date(request.args.get("from"))
+        date_to = _parse_date(request.args.get("to"), end=True)
+    except ValueError:
+        raise ValueError("invalid date (use ISO 8601, e.g. 2026-01-31)")
+    return fmt, date_from, date_to, request.args.get("building"), request.args.get("floor")
+
+
+def _stream(stmt, columns, fmt, filename):
+    """
+    รัน query ด้วย server-side cursor (yield_per) แล้วส่งออกทีละ partition
+    memory คงที่ไม่ว่าจะกี่แถว และ header/บรรทัดแรกออกไปทันที
+    """
+    def generate():
+        if fmt == "csv":
+            writer = csv.writer(_Echo())
+            yield writer.writerow(columns)
+        # generator รันหลัง view return แล้ว -> ต้องเลือก replica ตรงนี้ ไม่ใช่ที่ view
+        with replica_reads():
+            result = db.session.execute(stmt.execution_options(yield_per=Config.EXPORT_FETCH_SIZE))
+        try:
+            for partition in result.partitions():
+                if fmt == "csv":
+                    yield "".join(writer.writerow(
+                        [v.isoformat() if isinstance(v, datetime) else v for v in row]) for row in partition)
+                else:
+                    yield b"".join(fast_json.dumps(dict(zip(columns, row))) + b"\n" for row in partition)
+        finally:
+            result.close()
+
+    response = Response(stream_with_context(generate()), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}.{fmt}"
+    response.headers["X-Accel-Buffering"] = "no"  # ไม่ให้ reverse proxy buffer ทั้งไฟล์
+    return response
+
+
+@export_bp.route("/export/readings", methods=["GET"])
+@jwt_required()
+def export_readings():
+    """?from=&to=&building=&floor=&format=csv|ndjson"""
+    try:
+        fmt, date_from, date_to, building, floor = _export_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    columns = ["id", "meter_id", "serial_number", "building", "floor", "reading", "image_path", "created_at"]
+    stmt = (select(MeterReading.id, MeterReading.meter_id, Meter.serial_number, Meter.building, Meter.floor,
+                   MeterReading.reading, MeterReading.image_path, MeterReading.created_at)
+            .join(Meter, MeterReading.meter_id == Meter.id))
+    if date_from:
+        stmt = stmt.where(MeterReading.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(MeterReading.created_at < date_to)
+    if building:
+        stmt = stmt.where(Meter.building == building)
+    if floor:
+        stmt = stmt.where(Meter.floor == floor)
+    # ตรงกับ index (meter_id, created_at, id)
+    stmt = stmt.order_by(MeterReading.meter_id, MeterReading.created_at, MeterReading.id)
+
+    return _stream(stmt, columns, fmt, "readings")
+
+
+@export_bp.route("/export/ocr-results", methods=["GET"])
+@jwt_required()
+def export_ocr_results():
+    """?from=&to=&building=&floor=&format=csv|ndjson (building/floor กรองผ่าน serial ที่ลงทะเบียนไว้)"""
+    try:
+        fmt, date_from, date_to, building, floor = _export_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    columns = ["id", "image_path", "text", "serial_number", "reading", "created_at"]
+    stmt = select(OCRResult.id, OCRResult.image_path, OCRResult.text,
+                  OCRResult.serial_number, OCRResult.reading, OCRResult.created_at)
+    if date_from:
+        stmt = stmt.where(OCRResult.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(OCRResult.created_at < date_to)
+    if building or floor:
+        stmt = stmt.join(Meter, Meter.serial_number == OCRResult.serial_number)
+        if building:
+            stmt = stmt.where(Meter.building == building)
+        if floor:
+            stmt = stmt.where(Meter.floor == floor)
+    # ตรงกับ index (created_at, id)
+    stmt = stmt.order_by(OCRResult.created_at, OCRResult.id)
+
+    return _stream(stmt, columns, fmt, "ocr_results")
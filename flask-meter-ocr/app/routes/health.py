@@ -1,10 +1,58 @@
 from flask import Blueprint, jsonify
+from sqlalchemy import text
+from app.models import db
+from app.services import ocr_jobs, ocr_metrics
+from config import Config
 
 health_bp = Blueprint("health", __name__)
 
 @health_bp.route("/api/health", methods=["GET"])
+@health_bp.route("/api/health/live", methods=["GET"])
 def health_check():
+    # liveness: process ยังตอบได้ (ไม่เช็ค DB - DB ล่มไม่ควรทำให้ถูก restart)
     return jsonify({
         "status": "ok",
         "message": "Flask Meter OCR API is running"
     })
+
+
+def _check_db():
+    try:
+        db.session.execute(text("SELECT 1"))
+        return {"ok": True}
+    except Exception as e:
+        db.session.rollback()
+        return {"ok": False, "error": str(e.__class__.__name__)}
+
+
+def _check_ocr():
+    """
+    pool ของ process นี้อิ่มตัวหรือยัง (ดูเฉพาะค่าของ process นี้)
+    คิว job ใน DB ใช้ร่วมกันทุก node -> ไม่ใช้ตัดสิน readiness (ทุก node จะ unready พร้อมกัน) ดูที่ /api/metrics แทน
+    """
+    stats = ocr_jobs.worker_stats()
+    inflight = ocr_metrics.inflight()
+    reasons = []
+    if inflight >= Config.READY_MAX_INFLIGHT:
+        reasons.append("ocr_inflight")
+    if stats["batch_pending"] >= Config.OCR_BATCH_WORKERS * Config.READY_MAX_BATCH_BACKLOG:
+        reasons.append("batch_backlog")
+    return {
+        "ok": not reasons,
+        "reasons": reasons,
+        "inflight": inflight,
+        "max_inflight": Config.READY_MAX_INFLIGHT,
+        "job_workers": stats["workers"],
+        "job_workers_busy": stats["active"],
+        "batch_pending": stats["batch_pending"],
+    }
+
+
+@health_bp.route("/api/health/ready", methods=["GET"])
+def readiness_check():
+    # readiness: load balancer หยุดส่งรูปมาที่ node นี้เมื่อ DB ใช้ไม่ได้หรือ OCR อิ่มตัว
+    checks = {"db": _check_db()}
+    if checks["db"]["ok"]:
+        checks["ocr"] = _check_ocr()
+    ready = all(c["ok"] for c in checks.values())
+    return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
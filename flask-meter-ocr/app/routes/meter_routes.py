@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app.models import db
 from app.models.meter import Meter
+from app.utils.pagination import page_args, paginate, with_next_cursor, PaginationError
+from app.utils import fast_json
+from app.utils.db_routing import read_replica
 
 meter_bp = Blueprint('meter', __name__)
 
@@ -21,13 +24,20 @@ def add_meter():
     new_meter = Meter(serial_number=serial_number, building=building, floor=floor)
     db.session.add(new_meter)
     db.session.commit()
+    serial_index.add([serial_number])
 
     return jsonify(new_meter.to_dict()), 201
 
 @meter_bp.route('/meters', methods=['GET'])
+@read_replica
 def get_meters():
-    meters = Meter.query.order_by(Meter.created_at.desc()).all()
-    return jsonify([m.to_dict() for m in meters]), 200
+    try:
+        limit, cursor = page_args(request)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    meters, next_cursor = paginate(Meter.list_query(), Meter.created_at, Meter.id, limit, cursor)
+    return with_next_cursor(fast_json.response([Meter.row_to_dict(m) for m in meters]), next_cursor)
 
 from app.utils.auth import require_role
 
@@ -39,19 +49,17 @@ def delete_meter(meter_id):
         if not meter:
             return jsonify({"error": "Meter not found"}), 404
         
+        serial_number = meter.serial_number
         db.session.delete(meter)
         db.session.commit()
+        serial_index.remove(serial_number)
         return jsonify({"message": "Deleted successfully (including all history)"}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to delete: {str(e)}"}), 500
 
 from app.models.meter_reading import MeterReading
-from werkzeug.utils import secure_filename
-import os
-
-UPLOAD_DIR = "app/static/uploads/readings"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from app.services import consumption, serial_index, reading_prior
 
 @meter_bp.route('/readings', methods=['POST'])
 def save_reading():
@@ -69,7 +77,11 @@ def save_reading():
 
     meter = Meter.query.filter_by(serial_number=serial_number).first()
     if not meter:
-        return jsonify({"error": "Meter not found. Please register this meter first."}), 404
+        # S/N อาจอ่านผิด 1-2 หลัก -> แนะนำมิเตอร์ที่ใกล้เคียงให้เลือกแทนการถ่ายใหม่
+        return jsonify({
+            "error": "Meter not found. Please register this meter first.",
+            "suggestions": serial_index.suggest(serial_number)
+        }), 404
 
     new_reading = MeterReading(
         meter_id=meter.id,
@@ -77,15 +89,256 @@ def save_reading():
         image_path=image_path
     )
     db.session.add(new_reading)
+    db.session.flush()
+    # อัปเดต summary / consumption ใน transaction เดียวกับ reading
+    consumption.record_readings(meter.id, [(new_reading.id, new_reading.reading_value, new_reading.created_at)])
     db.session.commit()
+    reading_prior.invalidate(serial_number)
 
     return jsonify(new_reading.to_dict()), 201
 
 @meter_bp.route('/meters/<int:meter_id>/readings', methods=['GET'])
+@read_replica
 def get_meter_readings(meter_id):
-    meter = Meter.query.get(meter_id)
+    try:
+        limit, cursor = page_args(request)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # projection + join serial_number -> 1 query ต่อหน้า
+    readings, next_cursor = paginate(MeterReading.list_query().filter(MeterReading.meter_id == meter_id),
+                                     MeterReading.created_at, MeterReading.id, limit, cursor)
+
+    # หน้าว่างเท่านั้นที่ต้องเช็คว่ามี meter นี้จริงไหม
+    if not readings and db.session.get(Meter, meter_id) is None:
+        return jsonify({"error": "Meter not found"}), 404
+
+    return with_next_cursor(fast_json.response([MeterReading.row_to_dict(r) for r in readings]), next_cursor)
+
+
+# ============================================================
+# Bulk import (JSON list หรือ CSV upload)
+# ============================================================
+from datetime import datetime
+from sqlalchemy import insert
+from flask_jwt_extended import jwt_required
+from app.utils.bulk import iter_rows, chunked, BulkInputError
+from app.utils.reading_value import parse_reading_value
+from config import Config
+
+
+def _clean(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+@meter_bp.route('/meters/bulk', methods=['POST'])
+@jwt_required()
+def bulk_add_meters():
+    """
+    CSV header: serial_number,building,floor
+    ตอบ {inserted, errors: [{row, serial_number, error}]} - แถวที่ผิดไม่ทำให้ทั้ง batch ล้ม
+    commit ทีละ chunk: chunk หลังล้ม -> 207 พร้อม inserted (chunk ก่อนหน้าที่บันทึกแล้ว) และ failed_rows
+    """
+    inserted = 0
+    errors = []
+    seen = set()
+    chunk = []
+    try:
+        for chunk in chunked(iter_rows(request, "meters"), Config.BULK_CHUNK_SIZE):
+            candidates = []
+            for row_no, row in chunk:
+                serial_number = _clean(row.get('serial_number'))
+                if not serial_number:
+                    errors.append({"row": row_no, "serial_number": None, "error": "Serial number is required"})
+                elif serial_number in seen:
+                    errors.append({"row": row_no, "serial_number": serial_number, "error": "duplicate in request"})
+                else:
+                    seen.add(serial_number)
+                    candidates.append((row_no, serial_number, row))
+
+            # 1 query ต่อ chunk แทน filter_by().first() ทีละแถว
+            existing = {s for (s,) in db.session.query(Meter.serial_number)
+                        .filter(Meter.serial_number.in_([c[1] for c in candidates]))} if candidates else set()
+
+            rows = []
+            now = datetime.utcnow()
+            for row_no, serial_number, row in candidates:
+                if serial_number in existing:
+                    errors.append({"row": row_no, "serial_number": serial_number,
+                                   "error": "Meter with this serial number already exists"})
+                    continue
+                rows.append({
+                    "serial_number": serial_number,
+                    "building": _clean(row.get('building')),
+                    "floor": _clean(row.get('floor')),
+                    "created_at": now,
+                })
+
+            if rows:
+                db.session.execute(insert(Meter), rows)
+                db.session.commit()
+                serial_index.add([row["serial_number"] for row in rows])
+                inserted += len(rows)
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        failed_rows = {"from": chunk[0][0], "to": chunk[-1][0]} if chunk else None
+        return jsonify({"error": f"Bulk import failed: {str(e)}", "inserted": inserted, "errors": errors,
+                        "failed_rows": failed_rows}), 207 if inserted else 500
+
+    return jsonify({"inserted": inserted, "errors": errors}), 200
+
+
+def _parse_created_at(value):
+    value = _clean(value)
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _insert_readings(rows):
+    """
+    insert หลายแถวแล้วคืน [(id, meter_id, reading_value, created_at)] (ใช้ id เป็น latest_reading_id ของ summary)
+    DB ที่ทำ executemany + RETURNING ได้ -> statement เดียว; MySQL ไม่มี RETURNING -> ORM flush (ได้ id ทีละแถว)
+    """
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        stmt = insert(MeterReading).returning(MeterReading.id, MeterReading.meter_id,
+                                              MeterReading.reading_value, MeterReading.created_at)
+        return [tuple(r) for r in db.session.execute(stmt, rows)]
+    objects = [MeterReading(**row) for row in rows]
+    db.session.add_all(objects)
+    db.session.flush()
+    return [(r.id, r.meter_id, r.reading_value, r.created_at) for r in objects]
+
+
+@meter_bp.route('/readings/bulk', methods=['POST'])
+@jwt_required()
+def bulk_save_readings():
+    """
+    CSV header: serial_number,reading,image_path,created_at (created_at = ISO 8601, ไม่ใส่ = ตอนนี้)
+    แถวซ้ำ:
+    - มี created_at: serial + created_at เดียวกัน (ใน request หรือที่มีอยู่แล้วใน DB) -> ส่งซ้ำได้ปลอดภัย
+    - ไม่มี created_at: serial + reading เดียวกันภายใน request นี้เท่านั้น
+      (ค่าเดิมของมิเตอร์ที่ไม่ได้ใช้ไฟเป็น reading ใหม่ที่ถูกต้อง) -> client ที่ต้อง retry ให้ส่ง created_at
+    commit ทีละ chunk: chunk หลังล้ม -> 207 พร้อม inserted (chunk ก่อนหน้าที่บันทึกแล้ว) และ failed_rows
+    """
+    inserted = 0
+    errors = []
+    seen = set()
+    chunk = []
+    try:
+        for chunk in chunked(iter_rows(request, "readings"), Config.BULK_CHUNK_SIZE):
+            candidates = []
+            for row_no, row in chunk:
+                serial_number = _clean(row.get('serial_number'))
+                reading = _clean(row.get('reading'))
+                if not serial_number or not reading:
+                    errors.append({"row": row_no, "serial_number": serial_number,
+                                   "error": "S/N and Reading are required"})
+                    continue
+                try:
+                    created_at = _parse_created_at(row.get('created_at'))
+                except ValueError:
+                    errors.append({"row": row_no, "serial_number": serial_number, "error": "invalid created_at"})
+                    continue
+                key = (serial_number, created_at) if created_at is not None else (serial_number, reading)
+                if key in seen:
+                    errors.append({"row": row_no, "serial_number": serial_number, "error": "duplicate in request"})
+                    continue
+                seen.add(key)
+                candidates.append((row_no, serial_number, reading, _clean(row.get('image_path')), created_at))
+
+            serials = {c[1] for c in candidates}
+            meter_ids = dict(db.session.query(Meter.serial_number, Meter.id)
+                             .filter(Meter.serial_number.in_(serials))) if serials else {}
+
+            timestamps = {c[4] for c in candidates if c[4] is not None}
+            existing = set()
+            if timestamps and meter_ids:
+                existing = set(db.session.query(MeterReading.meter_id, MeterReading.created_at).filter(
+                    MeterReading.meter_id.in_(meter_ids.values()),
+                    MeterReading.created_at.in_(timestamps)))
+
+            rows = []
+            now = datetime.utcnow()
+            for row_no, serial_number, reading, image_path, created_at in candidates:
+                meter_id = meter_ids.get(serial_number)
+                if meter_id is None:
+                    errors.append({"row": row_no, "serial_number": serial_number,
+                                   "error": "Meter not found. Please register this meter first."})
+                    continue
+                if created_at is not None and (meter_id, created_at) in existing:
+                    errors.append({"row": row_no, "serial_number": serial_number,
+                                   "error": "Reading already exists"})
+                    continue
+                rows.append({
+                    "meter_id": meter_id,
+                    "reading": reading,
+                    "reading_value": parse_reading_value(reading),
+                    "image_path": image_path,
+                    "created_at": created_at or now,
+                })
+
+            if rows:
+                by_meter = {}
+                for reading_id, meter_id, value, created_at in _insert_readings(rows):
+                    by_meter.setdefault(meter_id, []).append((reading_id, value, created_at))
+                for meter_id, entries in by_meter.items():
+                    consumption.record_readings(meter_id, entries)
+                db.session.commit()
+                for serial_number in {c[1] for c in candidates if c[1] in meter_ids}:
+                    reading_prior.invalidate(serial_number)
+                inserted += len(rows)
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        failed_rows = {"from": chunk[0][0], "to": chunk[-1][0]} if chunk else None
+        # chunk ก่อนหน้า commit ไปแล้ว -> แจ้งเป็น partial success ให้ client ส่งต่อจาก failed_rows
+        return jsonify({"error": f"Bulk import failed: {str(e)}", "inserted": inserted, "errors": errors,
+                        "failed_rows": failed_rows}), 207 if inserted else 500
+
+    return jsonify({"inserted": inserted, "errors": errors}), 200
+
+
+# ============================================================
+# Aggregates (meter_summaries / meter_consumption_buckets)
+# ============================================================
+@meter_bp.route('/meters/<int:meter_id>/latest', methods=['GET'])
+@jwt_required()
+def get_meter_latest(meter_id):
+    meter = db.session.get(Meter, meter_id)
     if not meter:
         return jsonify({"error": "Meter not found"}), 404
-        
-    readings = MeterReading.query.filter_by(meter_id=meter_id).order_by(MeterReading.created_at.desc()).all()
-    return jsonify([r.to_dict() for r in readings]), 200
+
+    data = meter.summary.to_dict() if meter.summary else {"meter_id": meter_id, "latest": None}
+    data["serial_number"] = meter.serial_number
+    return jsonify(data), 200
+
+
+@meter_bp.route('/meters/<int:meter_id>/consumption', methods=['GET'])
+@jwt_required()
+def get_meter_consumption(meter_id):
+    """?from=&to=&period=day|month (วันที่แบบ ISO, รวมทั้งสองฝั่ง)"""
+    period = request.args.get('period', 'day')
+    if period not in consumption.PERIODS:
+        return jsonify({"error": f"invalid period (use one of {list(consumption.PERIODS)})"}), 400
+    try:
+        date_from = _parse_created_at(request.args.get('from'))
+        date_to = _parse_created_at(request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "invalid date (use ISO 8601, e.g. 2026-01-31)"}), 400
+
+    if db.session.get(Meter, meter_id) is None:
+        return jsonify({"error": "Meter not found"}), 404
+
+    buckets = consumption.consumption(meter_id, period, date_from, date_to)
+    return jsonify({
+        "meter_id": meter_id,
+        "period": period,
+        "total": float(sum(b.consumption for b in buckets)),
+        "buckets": [b.to_dict() for b in buckets],
+    }), 200
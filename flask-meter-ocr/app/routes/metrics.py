@@ -0,0 +1,107 @@
+import sys
+from flask import Blueprint, Response, request, jsonify
+from app.models import db
+from app.services import ocr_metrics, ocr_cache, ocr_jobs, serial_index
+from app.utils.db_routing import pool_stats
+from config import Config
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _loaded(module):
+    """module ของ OCR stack ถ้า process นี้ import ไปแล้ว (scrape ไม่ควรเป็นตัวโหลด cv2 / Tesseract)"""
+    return sys.modules.get(f"app.services.{module}")
+
+
+@ocr_metrics.register_collector
+def _ocr_cache_metrics():
+    stats = ocr_cache.stats()
+    return [
+        ("ocr_cache_lookups_total", "counter", "OCR result cache lookups by outcome", [
+            ({"outcome": "memory_hit"}, stats["memory_hits"]),
+            ({"outcome": "db_hit"}, stats["db_hits"]),
+            ({"outcome": "miss"}, stats["misses"]),
+            ({"outcome": "stale"}, stats["stale"]),
+        ]),
+        ("ocr_cache_memory_entries", "gauge", "Entries in the in-process OCR cache tier", [
+            ({}, stats["memory_entries"]),
+        ]),
+    ]
+
+
+@ocr_metrics.register_collector
+def _ocr_worker_metrics():
+    jobs = ocr_jobs.worker_stats()
+    ocr_engine = _loaded("ocr_engine")
+    engine = ocr_engine.pool_stats() if ocr_engine else {}
+    families = [
+        ("ocr_job_workers", "gauge", "OCR job worker threads in this process", [({}, jobs["workers"])]),
+        ("ocr_job_workers_busy", "gauge", "OCR job worker threads running a job", [({}, jobs["active"])]),
+        ("ocr_batch_pending", "gauge", "Batch OCR images queued or running", [({}, jobs["batch_pending"])]),
+        ("ocr_inflight", "gauge", "read_text calls running in this process", [({}, ocr_metrics.inflight())]),
+    ]
+    if "size" in engine:
+        families.append(("ocr_engine_pool", "gauge", "Tesseract engine pool", [
+            ({"state": "size"}, engine["size"]),
+            ({"state": "created"}, engine["created"]),
+            ({"state": "in_use"}, engine["in_use"]),
+        ]))
+    return families
+
+
+@ocr_metrics.register_collector
+def _ocr_job_queue_metrics():
+    # query DB แยก collector (DB ล่ม -> ขาดแค่ค่านี้ ไม่ใช่ worker gauges ทั้งชุด)
+    return [("ocr_jobs_queued", "gauge", "Queued OCR jobs in the shared DB queue (all nodes)",
+             [({}, ocr_jobs.queued_count())])]
+
+
+@ocr_metrics.register_collector
+def _serial_index_metrics():
+    stats = serial_index.stats()
+    if not stats["built"]:
+        return []
+    return [("serial_index_entries", "gauge", "Serial numbers in the in-process fuzzy index", [
+        ({"state": "live"}, stats["serials"]),
+        ({"state": "tombstoned"}, stats["tombstones"]),
+    ])]
+
+
+@ocr_metrics.register_collector
+def _layout_cache_metrics():
+    layout_cache = _loaded("layout_cache")
+    if layout_cache is None:
+        return []
+    stats = layout_cache.stats()
+    return [("ocr_layout_cache_entries", "gauge", "Layouts remembered by this worker", [
+        ({"key": "template"}, stats["templates"]),
+        ({"key": "serial"}, stats["serials"]),
+    ])]
+
+
+@ocr_metrics.register_collector
+def _db_pool_metrics():
+    samples = []
+    for pool, stats in pool_stats(db.engines).items():
+        samples.extend(({"pool": pool, "state": state}, stats[state])
+                       for state in ("size", "in_use", "idle", "overflow"))
+    return [("db_pool_connections", "gauge", "DB connections per pool by state", samples)]
+
+
+@ocr_metrics.register_collector
+def _process_memory_metrics():
+    samples = []
+    rss, peak = ocr_metrics.current_rss_bytes(), ocr_metrics.peak_rss_bytes()
+    if rss is not None:
+        samples.append(({"kind": "current"}, rss))
+    if peak is not None:
+        samples.append(({"kind": "peak"}, peak))
+    return [("process_resident_memory_bytes", "gauge", "Resident memory of this worker process", samples)]
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    # ถ้าตั้ง METRICS_TOKEN ไว้ ต้องส่ง Authorization: Bearer <token>
+    if Config.METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {Config.METRICS_TOKEN}":
+        return jsonify({"error": "unauthorized"}), 401
+    return Response(ocr_metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,10 +1,19 @@
+import json
 import os
-from flask import Blueprint, request, jsonify
+import zipfile
+from concurrent.futures import as_completed
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
-from flask_jwt_extended import jwt_required
-from app.services.ocr_service import read_text
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.services import ocr_jobs, ocr_cache, ocr_trace, ocr_metrics, serial_index, reading_prior, upload_store
 from app.models import db
+from app.utils.db_routing import read_replica
 from app.models.ocr_result import OCRResult
+from app.models.ocr_job import OCRJob
+from app.models.meter import Meter
+from app.utils.pagination import page_args, paginate, with_next_cursor, PaginationError
+from app.utils import fast_json
+from config import Config
 
 
 ocr_bp = Blueprint("ocr", __name__)
@@ -16,6 +25,15 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXT
 
 
+def _layout_hint():
+    """serial ของมิเตอร์ที่ client ระบุมา (form meter_id หรือ serial_number) ใช้หา layout ที่เคยเห็น"""
+    serial = request.form.get("serial_number")
+    meter_id = request.form.get("meter_id", type=int)
+    if not serial and meter_id:
+        serial = db.session.query(Meter.serial_number).filter_by(id=meter_id).scalar()
+    return serial or None
+
+
 @ocr_bp.route("/ocr", methods=["POST"])
 @jwt_required()
 def ocr_upload():
@@ -28,13 +46,45 @@ def ocr_upload():
     if file.filename == "" or not allowed_file(file.filename):
         return jsonify({"error": "invalid file"}), 400
 
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    data = file.read()
+    ocr_metrics.UPLOAD_BYTES.observe(len(data))
+    cache_key = ocr_cache.make_key(data)
+    prior_loader = reading_prior.loader()
 
-    filename = secure_filename(file.filename)
-    save_path = os.path.join(UPLOAD_DIR, filename)
-    file.save(save_path)
+    # ♻️ เคย OCR ไฟล์นี้แล้ว (เช่น ส่งซ้ำหลังเน็ตหลุด) -> ใช้ผลเดิม + ชี้ไปที่รูปเดิม
+    cached = ocr_cache.lookup(cache_key, prior_loader)
+    if cached is not None:
+        record = OCRResult(
+            image_path=cached["image_path"],
+            text=cached["text"],
+            serial_number=cached["serial"],
+            reading=cached["reading"]
+        )
+        db.session.add(record)
+        db.session.commit()
 
-    ocr_data = read_text(save_path)
+        return jsonify({
+            "id": record.id,
+            "text": cached["text"],
+            "serial": cached["serial"],
+            "reading": cached["reading"],
+            "cached": True
+        })
+
+    # ชื่อไฟล์ไม่ซ้ำ (upload ชื่อเดียวกันพร้อมกันไม่ทับกัน); OCR decode จาก memory แล้วค่อยเขียนไฟล์เบื้องหลัง
+    save_path = upload_store.unique_path(UPLOAD_DIR, file.filename)
+
+    # OCR stack (cv2 / numpy / Tesseract) โหลดตอนใช้ครั้งแรก ไม่ใช่ตอน register blueprint
+    from app.services.ocr_service import read_bytes
+
+    # 🔬 trace (เก็บภาพกลางทาง) เฉพาะเมื่อ admin ขอ หรือถูกสุ่ม
+    with ocr_trace.capture(ocr_trace.requested(request, get_jwt().get("role")), source=save_path) as trace:
+        ocr_data = read_bytes(data, serial_matcher=serial_index.matcher(),
+                              reading_prior=prior_loader, source=save_path,
+                              layout_hint=_layout_hint())
+        if trace is not None:
+            trace.result = ocr_data
+    upload_store.save_async(save_path, data)
     
     # read_text now returns a dict
     text_content = ocr_data.get("text", "")
@@ -48,41 +98,295 @@ def ocr_upload():
         reading=reading
     )
     db.session.add(record)
+    ocr_cache.store(cache_key, save_path, ocr_data, len(data))
     db.session.commit()
 
     return jsonify({
         "id": record.id,
         "text": text_content,
         "serial": serial,
-        "reading": reading
+        "reading": reading,
+        "cached": False,
+        "trace_id": trace.id if trace is not None else None
     })
 
 
+class BatchLimitError(ValueError):
+    pass
+
+
+def _stream_size(file):
+    stream = file.stream
+    pos = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(pos)
+    return size
+
+
+def _batch_items():
+    """
+    รวมไฟล์จาก multipart field "images" (หลายไฟล์, index ตาม field "index" ถ้าส่งมา)
+    และ/หรือ zip ใน field "archive" -> [(index, filename, bytes)]
+    เช็คจำนวนไฟล์และขนาด (ต่อไฟล์ / รวม) ก่อนอ่านเข้า memory -> BatchLimitError
+    """
+    too_many = BatchLimitError(f"too many images (max {Config.OCR_BATCH_MAX_FILES})")
+    files = request.files.getlist("images")
+    if len(files) > Config.OCR_BATCH_MAX_FILES:
+        raise too_many
+
+    items = []
+    total = 0
+
+    def add(index, filename, size, read):
+        nonlocal total
+        if size > Config.OCR_BATCH_MAX_FILE_BYTES:
+            raise BatchLimitError(f"{filename}: file too large (max {Config.OCR_BATCH_MAX_FILE_BYTES} bytes)")
+        total += size
+        if total > Config.OCR_BATCH_MAX_TOTAL_BYTES:
+            raise BatchLimitError(f"batch too large (max {Config.OCR_BATCH_MAX_TOTAL_BYTES} bytes)")
+        items.append((index, filename, read()))
+
+    indexes = request.form.getlist("index")
+    for pos, file in enumerate(files):
+        index = indexes[pos] if pos < len(indexes) else pos
+        add(index, file.filename, _stream_size(file), file.read)
+
+    archive = request.files.get("archive")
+    if archive is not None:
+        with zipfile.ZipFile(archive.stream) as zf:
+            entries = [info for info in zf.infolist() if not info.is_dir() and allowed_file(info.filename)]
+            if len(items) + len(entries) > Config.OCR_BATCH_MAX_FILES:
+                raise too_many
+            for info in entries:
+                # file_size คือขนาดหลังแตกไฟล์ (zf.read อ่านไม่เกินค่านี้)
+                add(len(items), os.path.basename(info.filename), info.file_size,
+                    lambda info=info: zf.read(info))
+    return items
+
+
+def _ocr_batch_file(data, save_path, serial_matcher, prior_loader):
+    """รันใน batch pool (แตะ DB เฉพาะผ่าน prior_loader ซึ่ง push app context เอง)"""
+    from app.services.ocr_service import read_bytes
+
+    with ocr_trace.capture(ocr_trace.sampled(), source=save_path) as trace:
+        ocr_data = read_bytes(data, serial_matcher=serial_matcher, reading_prior=prior_loader, source=save_path)
+        if trace is not None:
+            trace.result = ocr_data
+    return ocr_data
+
+
+@ocr_bp.route("/ocr/batch", methods=["POST"])
+@jwt_required()
+def ocr_batch():
+    """
+    OCR หลายรูปใน request เดียว ตอบกลับเป็น NDJSON ทีละบรรทัดตามลำดับที่ OCR เสร็จ
+    บรรทัดสุดท้ายเป็น summary {"done": true, "ids": {index: ocr_result_id}}
+    """
+    if "images" not in request.files and "archive" not in request.files:
+        return jsonify({"error": "no images"}), 400
+
+    try:
+        items = _batch_items()
+    except zipfile.BadZipFile:
+        return jsonify({"error": "invalid zip archive"}), 400
+    except BatchLimitError as e:
+        return jsonify({"error": str(e)}), 413
+
+    if not items:
+        return jsonify({"error": "no valid images"}), 400
+
+    serial_matcher = serial_index.matcher()  # จับ index ใน request thread (worker ไม่มี app context)
+    prior_loader = reading_prior.loader()
+
+    # cache hit ตอบได้ทันที, miss ส่งเข้า pool (ไฟล์ซ้ำใน batch เดียวกัน OCR ครั้งเดียว)
+    ready = []     # [(index, filename, key, size, image_path, result dict, cached)]
+    waiting = {}   # future -> [(index, filename, key, size, image_path)]
+    submitted = {}
+    for index, filename, data in items:
+        if not allowed_file(filename or ""):
+            ready.append((index, filename, None, 0, None, {"error": "invalid file"}, False))
+            continue
+
+        ocr_metrics.UPLOAD_BYTES.observe(len(data))
+        key = ocr_cache.make_key(data)
+        cached = ocr_cache.lookup(key, prior_loader)
+        if cached is not None:
+            ready.append((index, filename, key, len(data), cached["image_path"], cached, True))
+            continue
+
+        if key in submitted:
+            future, save_path = submitted[key]
+        else:
+            save_path = upload_store.unique_path(UPLOAD_DIR, filename)
+            upload_store.save_async(save_path, data)
+            future = ocr_jobs.submit_batch(_ocr_batch_file, data, save_path, serial_matcher, prior_loader)
+            submitted[key] = (future, save_path)
+        waiting.setdefault(future, []).append((index, filename, key, len(data), save_path))
+
+    def generate():
+        pending = []  # [(index, OCRResult)] รอ insert เป็น chunk
+        ids = {}
+        failed = 0
+
+        def flush():
+            if not pending:
+                return
+            db.session.add_all([record for _, record in pending])
+            db.session.commit()
+            for index, record in pending:
+                ids[str(index)] = record.id
+            pending.clear()
+
+        def line(payload):
+            return json.dumps(payload, ensure_ascii=False) + "\n"
+
+        def collect(index, filename, key, size, image_path, result, cached):
+            nonlocal failed
+            if "error" in result:
+                failed += 1
+                return line({"index": index, "filename": filename, "error": result["error"]})
+
+            pending.append((index, OCRResult(
+                image_path=image_path,
+                text=result.get("text", ""),
+                serial_number=result.get("serial"),
+                reading=result.get("reading"),
+            )))
+            if not cached:
+                ocr_cache.store(key, image_path, result, size)
+            if len(pending) >= Config.OCR_BATCH_INSERT_CHUNK:
+                flush()
+            return line({
+                "index": index,
+                "filename": filename,
+                "text": result.get("text", ""),
+                "serial": result.get("serial"),
+                "reading": result.get("reading"),
+                "cached": cached,
+            })
+
+        try:
+            for entry in ready:
+                yield collect(*entry)
+
+            for future in as_completed(waiting):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"error": str(e)}
+                for index, filename, key, size, image_path in waiting[future]:
+                    yield collect(index, filename, key, size, image_path, result, False)
+
+            flush()
+            yield line({"done": True, "total": len(items), "failed": failed, "ids": ids})
+        finally:
+            # client ตัดการเชื่อมต่อกลางทาง: ยกเลิกรูปที่ยังไม่เริ่ม แต่เก็บผลที่ได้แล้ว
+            for future in waiting:
+                future.cancel()
+            if pending:
+                try:
+                    flush()
+                except Exception:
+                    db.session.rollback()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+JOB_STATUSES = {"queued", "running", "done", "failed"}
+
+
+@ocr_bp.route("/ocr/jobs", methods=["POST"])
+@jwt_required()
+def ocr_submit_job():
+    """รับไฟล์แล้วตอบกลับทันทีด้วย job id; OCR ทำใน background worker"""
+    if "image" not in request.files:
+        return jsonify({"error": "no image file"}), 400
+
+    file = request.files["image"]
+
+    if file.filename == "" or not allowed_file(file.filename):
+        return jsonify({"error": "invalid file"}), 400
+
+    if ocr_jobs.queued_count() >= Config.OCR_JOB_MAX_QUEUED:
+        return jsonify({"error": "OCR queue is full, please retry later"}), 503
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    # ใส่ job id นำหน้าชื่อไฟล์ กันไฟล์ชื่อซ้ำทับกันระหว่างรอคิว
+    job_id = ocr_jobs.new_job_id()
+    filename = f"{job_id}_{secure_filename(file.filename)}"
+    save_path = os.path.join(UPLOAD_DIR, filename)
+    file.save(save_path)
+    ocr_metrics.UPLOAD_BYTES.observe(os.path.getsize(save_path))
+
+    job = ocr_jobs.enqueue(job_id, save_path, user_id=get_jwt_identity())
+    return jsonify(job.to_dict()), 202
+
+
+def _jobs_query():
+    """admin เห็นทุก job, user ทั่วไปเห็นเฉพาะ job ของตัวเอง"""
+    query = OCRJob.query
+    if get_jwt().get("role") != "admin":
+        query = query.filter_by(user_id=get_jwt_identity())
+    return query
+
+
+@ocr_bp.route("/ocr/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def ocr_job_status(job_id):
+    job = _jobs_query().filter_by(id=job_id).first()
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@ocr_bp.route("/ocr/jobs", methods=["GET"])
+@jwt_required()
+def ocr_list_jobs():
+    query = _jobs_query()
+
+    status = request.args.get("status")
+    if status:
+        if status not in JOB_STATUSES:
+            return jsonify({"error": f"invalid status (use one of {sorted(JOB_STATUSES)})"}), 400
+        query = query.filter_by(status=status)
+
+    limit = min(request.args.get("limit", 100, type=int), 500)
+    jobs = query.order_by(OCRJob.created_at.desc()).limit(limit).all()
+    return jsonify([j.to_dict() for j in jobs]), 200
+
+
+def image_url(image_path):
+    # "app/static/uploads/abc.jpg" -> "/static/uploads/abc.jpg" (path ที่ Flutter เรียกได้)
+    # path ที่ upload ผ่าน API ขึ้นต้นด้วย "app/" เสมอ -> ตัด prefix ตรงๆ ไม่ต้อง replace ทั้ง string
+    if image_path.startswith("app/"):
+        return image_path[3:]
+    return image_path.replace("app", "", 1).replace("\\", "/")
+
+
 @ocr_bp.route("/history", methods=["GET"])
 @jwt_required()
+@read_replica
 def get_history():
-    # เรียงจากล่าสุดไปเก่าสุด
-    results = OCRResult.query.order_by(OCRResult.created_at.desc()).all()
-    
-    data = []
-    for r in results:
-        # สร้าง URL สำหรับรูปภาพ (สมมติว่า backend map static folder ไว้แล้ว)
-        # image_path = "app/static/uploads/filename.jpg"
-        # เราต้องแปลงเป็น URL ที่ Flutter เรียกได้ เช่น http://localhost:5000/static/uploads/filename.jpg
-        # แต่ใน Database เราเก็บ path เต็ม หรือ relative path?
-        # ดูจาก ocr_upload -> save_path = os.path.join(UPLOAD_DIR, filename) -> "app/static/uploads/..."
-        
-        # แปลง path เป็น url relative
-        # เช่น "app/static/uploads/abc.jpg" -> "/static/uploads/abc.jpg"
-        relative_path = r.image_path.replace("app", "", 1).replace("\\", "/")
-        
-        data.append({
-            "id": r.id,
-            "image_url": relative_path, 
-            "text": r.text,
-            "serial": r.serial_number,
-            "reading": r.reading,
-            "created_at": r.created_at.isoformat()
-        })
+    # เรียงจากล่าสุดไปเก่าสุด ทีละหน้า (?limit=&cursor=, cursor หน้าถัดไปอยู่ใน X-Next-Cursor)
+    try:
+        limit, cursor = page_args(request)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # เลือกเฉพาะ column ที่ใช้ (1 query, ไม่สร้าง ORM object)
+    query = db.session.query(OCRResult.id, OCRResult.image_path, OCRResult.text,
+                             OCRResult.serial_number, OCRResult.reading, OCRResult.created_at)
+    results, next_cursor = paginate(query, OCRResult.created_at, OCRResult.id, limit, cursor)
+
+    data = [{
+        "id": r.id,
+        "image_url": image_url(r.image_path),
+        "text": r.text,
+        "serial": r.serial_number,
+        "reading": r.reading,
+        "created_at": r.created_at
+    } for r in results]
 
-    return jsonify(data), 200
+    return with_next_cursor(fast_json.response(data), next_cursor)
@@ -0,0 +1,172 @@
+"""
+Consumption aggregates ต่อมิเตอร์
+- meter_summaries: ค่าล่าสุด + ก่อนหน้า -> GET /api/meters/<id>/latest ได้ใน 1 แถว
+- meter_consumption_buckets: ผลรวมการใช้ไฟรายวัน/รายเดือน -> consumption ได้ตามจำนวน bucket
+- reading ใหม่ที่ใหม่กว่าค่าล่าสุด: อัปเดตแบบ incremental (ไม่ query ประวัติ)
+- reading ที่ย้อนหลัง (เช่น bulk sync): rebuild เฉพาะตั้งแต่ต้นเดือนของ reading นั้น
+- ผลต่างติดลบ (เปลี่ยนมิเตอร์ / วนรอบ / อ่านผิด) ไม่นับเป็นการใช้ไฟ
+"""
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app.models import db
+from app.models.meter_reading import MeterReading
+from app.models.meter_summary import MeterSummary, MeterConsumptionBucket
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "month")
+
+
+def bucket_start(period, at):
+    day = at.date()
+    return day if period == "day" else day.replace(day=1)
+
+
+def _delta(previous, current):
+    return max(current - previous, Decimal(0))
+
+
+def _locked_summary(meter_id):
+    """
+    ล็อกแถว summary ของมิเตอร์ (กันสอง request อัปเดตพร้อมกัน)
+    ยังไม่มีแถว -> INSERT IGNORE แล้วค่อย SELECT ... FOR UPDATE (FOR UPDATE ล็อกแถวที่ไม่มีอยู่ไม่ได้:
+    reading แรกของมิเตอร์สอง request พร้อมกัน ตัวหลังจะรอ lock แทนที่จะชน primary key ตอน commit)
+    """
+    query = MeterSummary.query.filter_by(meter_id=meter_id).with_for_update()
+    summary = query.first()
+    if summary is None:
+        db.session.execute(
+            insert(MeterSummary).values(meter_id=meter_id, reading_count=0)
+            .prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"))
+        summary = query.one()
+    return summary
+
+
+def _accumulate(buckets, value, at, delta):
+    for period in PERIODS:
+        state = buckets.setdefault((period, bucket_start(period, at)), [Decimal(0), 0, None])
+        state[0] += delta
+        state[1] += 1
+        state[2] = value
+
+
+def _apply_buckets(meter_id, buckets):
+    """บวกค่าที่สะสมไว้เข้า bucket ที่มีอยู่ (1 query) หรือสร้างใหม่"""
+    if not buckets:
+        return
+    existing = {
+        (b.period, b.bucket_start): b
+        for b in MeterConsumptionBucket.query.filter(
+            MeterConsumptionBucket.meter_id == meter_id,
+            MeterConsumptionBucket.bucket_start.in_({start for _, start in buckets}),
+        )
+    }
+    for key, (consumption, count, last_value) in buckets.items():
+        bucket = existing.get(key)
+        if bucket is None:
+            db.session.add(MeterConsumptionBucket(
+                meter_id=meter_id, period=key[0], bucket_start=key[1],
+                consumption=consumption, reading_count=count, last_value=last_value,
+            ))
+        else:
+            bucket.consumption += consumption
+            bucket.reading_count += count
+            bucket.last_value = last_value
+
+
+def record_readings(meter_id, entries):
+    """
+    entries: [(reading_id, reading_value, created_at)] ที่เพิ่ง insert ใน transaction นี้
+    ผู้เรียกเป็นคน commit (ให้ reading + aggregates เข้า DB พร้อมกัน)
+    """
+    entries = sorted((e for e in entries if e[1] is not None), key=lambda e: e[2])
+    if not entries:
+        return
+
+    summary = _locked_summary(meter_id)
+    if summary.latest_at is not None and entries[0][2] < summary.latest_at:
+        rebuild_meter(meter_id, since=entries[0][2])
+        return
+
+    buckets = {}
+    for reading_id, value, at in entries:
+        delta = _delta(summary.latest_value, value) if summary.latest_value is not None else Decimal(0)
+        _accumulate(buckets, value, at, delta)
+        summary.previous_reading_id = summary.latest_reading_id
+        summary.previous_value = summary.latest_value
+        summary.previous_at = summary.latest_at
+        summary.latest_reading_id = reading_id
+        summary.latest_value = value
+        summary.latest_at = at
+        summary.reading_count = (summary.reading_count or 0) + 1
+
+    _apply_buckets(meter_id, buckets)
+
+
+def _valued_readings(meter_id):
+    return MeterReading.query.filter(MeterReading.meter_id == meter_id, MeterReading.reading_value.isnot(None))
+
+
+def rebuild_meter(meter_id, since=None):
+    """คำนวณ aggregates ใหม่จาก meter_readings (ทั้งหมด หรือตั้งแต่ต้นเดือนของ since)"""
+    summary = _locked_summary(meter_id)
+    start = datetime.combine(bucket_start("month", since), datetime.min.time()) if since else None
+
+    buckets_query = MeterConsumptionBucket.query.filter(MeterConsumptionBucket.meter_id == meter_id)
+    if start is not None:
+        buckets_query = buckets_query.filter(MeterConsumptionBucket.bucket_start >= start.date())
+    buckets_query.delete(synchronize_session=False)
+
+    previous = None
+    readings = _valued_readings(meter_id)
+    if start is not None:
+        before = (readings.filter(MeterReading.created_at < start)
+                  .order_by(MeterReading.created_at.desc(), MeterReading.id.desc()).first())
+        previous = before.reading_value if before else None
+        readings = readings.filter(MeterReading.created_at >= start)
+
+    buckets = {}
+    rows = (readings.with_entities(MeterReading.reading_value, MeterReading.created_at)
+            .order_by(MeterReading.created_at, MeterReading.id).yield_per(1000))
+    for value, at in rows:
+        _accumulate(buckets, value, at, _delta(previous, value) if previous is not None else Decimal(0))
+        previous = value
+    _apply_buckets(meter_id, buckets)
+
+    last_two = _valued_readings(meter_id).order_by(
+        MeterReading.created_at.desc(), MeterReading.id.desc()).limit(2).all()
+    latest = last_two[0] if last_two else None
+    prior = last_two[1] if len(last_two) > 1 else None
+    summary.latest_reading_id = latest.id if latest else None
+    summary.latest_value = latest.reading_value if latest else None
+    summary.latest_at = latest.created_at if latest else None
+    summary.previous_reading_id = prior.id if prior else None
+    summary.previous_value = prior.reading_value if prior else None
+    summary.previous_at = prior.created_at if prior else None
+    summary.reading_count = _valued_readings(meter_id).count()
+
+
+def rebuild_all():
+    """rebuild ทุกมิเตอร์ (commit ทีละมิเตอร์) คืนจำนวนมิเตอร์"""
+    from app.models.meter import Meter
+
+    meter_ids = [m for (m,) in db.session.query(Meter.id).order_by(Meter.id)]
+    for meter_id in meter_ids:
+        rebuild_meter(meter_id)
+        db.session.commit()
+    logger.info("consumption_rebuilt meters=%d", len(meter_ids))
+    return len(meter_ids)
+
+
+def consumption(meter_id, period, date_from=None, date_to=None):
+    """bucket ในช่วง [date_from, date_to] (date) เรียงตามเวลา"""
+    query = MeterConsumptionBucket.query.filter_by(meter_id=meter_id, period=period)
+    if date_from:
+        query = query.filter(MeterConsumptionBucket.bucket_start >= bucket_start(period, date_from))
+    if date_to:
+        query = query.filter(MeterConsumptionBucket.bucket_start <= date_to.date())
+    return query.order_by(MeterConsumptionBucket.bucket_start).all()
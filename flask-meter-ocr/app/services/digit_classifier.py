@@ -0,0 +1,279 @@
+"""
+Digit Classifier (fast path ก่อน Tesseract สำหรับ ROI ตัวเลขของ reading / S/N)
+- segment ภาพ threshold ของ ROI เป็น glyph ด้วย connected components (เลือกแถบความสูงหลัก เรียงซ้าย -> ขวา)
+- feature = HOG 9 bin บน glyph 20x20 (NumPy ล้วน) -> kNN (cosine) กับตัวอย่างที่เก็บไว้ใน model
+- model เป็นไฟล์ .npz มี format/version โหลดครั้งเดียวต่อ worker process; ไม่มีไฟล์ = ปิด fast path
+- ตัวอย่าง train มาจากภาพของ reading ที่ผู้ใช้ยืนยันแล้ว (POST /api/readings) + S/N ของมิเตอร์ที่ลงทะเบียน
+  (`flask digits export` -> dataset, `flask digits train` -> model)
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from config import Config
+from app.services import ocr_metrics
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT = 1
+GLYPH_SIZE = 20
+CELL = 5
+BINS = 9
+MAX_GLYPHS = 12
+
+FAST_PATH = ocr_metrics.Counter(
+    "ocr_digit_classifier_total", "Digit classifier outcome per ROI", ["result"])
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+_sink = contextvars.ContextVar("digit_samples", default=None)
+
+
+# ============================================================
+# Segmentation / features
+# ============================================================
+def _foreground(binary):
+    """ให้ตัวเลขเป็นสีขาว (foreground = pixel ส่วนน้อยของภาพ)"""
+    mask = (binary > 127).astype(np.uint8)
+    return 1 - mask if mask.mean() > 0.5 else mask
+
+
+def segment(binary):
+    """glyph (uint8 0/255) ของตัวเลขใน ROI เรียงซ้าย -> ขวา หรือ [] ถ้าแยกไม่ได้"""
+    mask = _foreground(binary)
+    roi_h = mask.shape[0]
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    boxes = []
+    for x, y, w, h, area in stats[1:count]:
+        # ตัดจุด noise, เส้นขอบ ROI และก้อนที่กว้างเกินตัวเลขตัวเดียว
+        if h < roi_h * 0.2 or h >= roi_h * 0.98 or area < 12 or w > h * 1.2:
+            continue
+        boxes.append((x, y, w, h))
+    if not boxes:
+        return []
+
+    # แถบความสูงหลัก: ตัวเลขบนหน้าปัดเดียวกันสูงใกล้กันและอยู่แถวเดียวกัน
+    med_h = float(np.median([b[3] for b in boxes]))
+    med_cy = float(np.median([b[1] + b[3] / 2 for b in boxes]))
+    boxes = [b for b in boxes
+             if abs(b[3] - med_h) <= med_h * 0.35 and abs(b[1] + b[3] / 2 - med_cy) <= med_h * 0.5]
+    if not boxes or len(boxes) > MAX_GLYPHS:
+        return []
+    boxes.sort()
+    return [mask[y:y + h, x:x + w] * 255 for x, y, w, h in boxes]
+
+
+def normalize_glyph(glyph):
+    """pad เป็นสี่เหลี่ยมจัตุรัส (คงสัดส่วน) แล้วย่อเป็น GLYPH_SIZE x GLYPH_SIZE"""
+    h, w = glyph.shape[:2]
+    side = max(h, w) + 2
+    square = np.zeros((side, side), dtype=np.uint8)
+    y0, x0 = (side - h) // 2, (side - w) // 2
+    square[y0:y0 + h, x0:x0 + w] = glyph
+    return cv2.resize(square, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def features(glyph20):
+    """HOG (unsigned gradient, cell 5x5, 9 bin) -> vector ยาว 144 normalize L2"""
+    img = glyph20.astype(np.float32) / 255.0
+    gx = np.zeros_like(img)
+    gy = np.zeros_like(img)
+    gx[:, 1:-1] = img[:, 2:] - img[:, :-2]
+    gy[1:-1, :] = img[2:, :] - img[:-2, :]
+    magnitude = np.hypot(gx, gy)
+    angle = np.degrees(np.arctan2(gy, gx)) % 180.0
+    bins = np.minimum((angle / (180.0 / BINS)).astype(np.int32), BINS - 1)
+    cells_per_side = GLYPH_SIZE // CELL
+    rows, cols = np.indices(img.shape)
+    cell = (rows // CELL) * cells_per_side + cols // CELL
+    hist = np.bincount((cell * BINS + bins).ravel(), weights=magnitude.ravel(),
+                       minlength=cells_per_side * cells_per_side * BINS).astype(np.float32)
+    norm = np.linalg.norm(hist)
+    return hist / norm if norm > 0 else hist
+
+
+# ============================================================
+# Model
+# ============================================================
+class DigitModel:
+    def __init__(self, vectors, labels, version, k=None):
+        self.vectors = vectors.astype(np.float32)
+        self.labels = labels.astype(np.int8)
+        self.version = version
+        self.k = k or Config.DIGIT_CLASSIFIER_K
+
+    def __len__(self):
+        return len(self.labels)
+
+    def predict(self, glyphs):
+        """[(digit, confidence 0-1)] ต่อ glyph: confidence = สัดส่วนเพื่อนบ้าน k ตัวที่โหวตตรงกัน"""
+        feats = np.stack([features(normalize_glyph(g)) for g in glyphs])
+        sims = feats @ self.vectors.T  # cosine (normalize แล้ว)
+        k = min(self.k, sims.shape[1])
+        nearest = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        out = []
+        for row, idx in enumerate(nearest):
+            votes = np.bincount(self.labels[idx], weights=sims[row, idx], minlength=10)
+            digit = int(votes.argmax())
+            share = float((self.labels[idx] == digit).sum()) / k
+            if sims[row, idx].max() < Config.DIGIT_CLASSIFIER_MIN_SIMILARITY:
+                share = 0.0
+            out.append((digit, share))
+        return out
+
+    def read(self, binary):
+        """(digits, confidence ของทั้งสตริง = ตัวที่แย่ที่สุด, char confidences) หรือ None"""
+        glyphs = segment(binary) if len(self) else []
+        if not glyphs:
+            return None
+        predicted = self.predict(glyphs)
+        digits = "".join(str(d) for d, _ in predicted)
+        char_conf = tuple(round(c * 100, 1) for _, c in predicted)
+        return digits, min(c for _, c in predicted), char_conf
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, format=MODEL_FORMAT, version=self.version, k=self.k,
+                                vectors=self.vectors, labels=self.labels)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["format"]) != MODEL_FORMAT:
+                raise ValueError(f"unsupported model format {int(data['format'])} (expected {MODEL_FORMAT})")
+            return cls(data["vectors"], data["labels"], str(data["version"]), int(data["k"]))
+
+
+def train(glyphs, labels, per_class=None, k=None):
+    """DigitModel จาก glyph 20x20 + label (สุ่มเก็บไม่เกิน per_class ตัวอย่างต่อตัวเลข ให้ model เล็กและสมดุล)"""
+    labels = np.asarray(labels, dtype=np.int8)
+    keep = np.arange(len(labels))
+    if per_class:
+        rng = np.random.default_rng(0)
+        keep = np.concatenate([
+            rng.permutation(np.flatnonzero(labels == d))[:per_class] for d in range(10)
+        ])
+    vectors = np.stack([features(glyphs[i]) for i in keep]) if len(keep) else np.zeros((0, 144), np.float32)
+    version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    return DigitModel(vectors, labels[keep], version, k)
+
+
+def get_model():
+    """model ของ process นี้ (โหลดครั้งแรกที่เรียก) หรือ None ถ้าปิดไว้ / ไม่มีไฟล์ / ไฟล์ใช้ไม่ได้"""
+    global _model, _model_loaded
+    if _model_loaded or not Config.DIGIT_CLASSIFIER_ENABLED:
+        return _model
+    with _model_lock:
+        if not _model_loaded:
+            path = Config.DIGIT_MODEL_PATH
+            if os.path.exists(path):
+                try:
+                    _model = DigitModel.load(path)
+                    logger.info("digit_model_loaded path=%s version=%s samples=%d",
+                                path, _model.version, len(_model))
+                except Exception as e:
+                    logger.error("digit_model_load_failed path=%s error=%s", path, e)
+            _model_loaded = True
+    return _model
+
+
+def model_version():
+    model = get_model()
+    return model.version if model is not None else "off"
+
+
+# ============================================================
+# Training samples: crop ROI ระหว่าง OCR ภาพที่รู้คำตอบแล้ว
+# ============================================================
+@contextmanager
+def sampling():
+    """ระหว่าง block นี้ _ocr_digit_combos จะเก็บ (region_name, thresholds) ไว้ใน list ที่ yield ออกมา"""
+    sink = []
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
+
+
+def collect(region_name, thresholds):
+    sink = _sink.get()
+    if sink is not None:
+        sink.append((region_name, thresholds))
+
+
+def label_glyphs(thresholds, label):
+    """glyph 20x20 + digit จากทุก threshold ที่ segment ได้จำนวนตัวเท่ากับคำตอบพอดี"""
+    samples = []
+    for binary in thresholds:
+        glyphs = segment(binary)
+        if len(glyphs) == len(label):
+            samples.extend((normalize_glyph(g), int(ch)) for g, ch in zip(glyphs, label))
+    return samples
+
+
+def _resolve_image(path):
+    for candidate in (path, os.path.join("app", path.lstrip("/"))):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def collect_confirmed(limit=None):
+    """
+    OCR ภาพของ reading ที่ผู้ใช้ยืนยันแล้ว (ใหม่ -> เก่า) แล้ว label glyph ด้วยค่าที่ยืนยัน / S/N ของมิเตอร์
+    คืน (glyphs uint8 [n, 20, 20], labels int8 [n], จำนวนภาพที่ใช้ได้)
+    """
+    from app.models import db
+    from app.models.meter import Meter
+    from app.models.meter_reading import MeterReading
+    from app.services.ocr_service import read_text
+
+    query = (db.session.query(MeterReading.image_path, MeterReading.reading, Meter.serial_number)
+             .join(Meter, MeterReading.meter_id == Meter.id)
+             .filter(MeterReading.image_path.isnot(None), MeterReading.reading_value.isnot(None))
+             .order_by(MeterReading.id.desc()))
+    if limit:
+        query = query.limit(limit)
+
+    glyphs, labels, used = [], [], 0
+    for image_path, reading, serial in query.all():
+        path = _resolve_image(image_path)
+        if path is None:
+            continue
+        expected = {"reading": re.sub(r"\D", "", reading or ""), "serial": re.sub(r"\D", "", serial or "")}
+        with sampling() as sink:
+            read_text(path)
+        found = 0
+        for region_name, thresholds in sink:
+            label = expected["reading" if "reading" in region_name else "serial"]
+            if not label:
+                continue
+            for glyph, digit in label_glyphs(thresholds, label):
+                glyphs.append(glyph)
+                labels.append(digit)
+                found += 1
+        used += bool(found)
+    if not glyphs:
+        return np.zeros((0, GLYPH_SIZE, GLYPH_SIZE), np.uint8), np.zeros(0, np.int8), used
+    return np.stack(glyphs), np.asarray(labels, dtype=np.int8), used
+
+
+def save_samples(path, glyphs, labels):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, glyphs=glyphs, labels=labels)
+
+
+def load_samples(path):
+    with np.load(path) as data:
+        return data["glyphs"], data["labels"]
@@ -0,0 +1,149 @@
+"""
+โหลดภาพสำหรับ OCR pipeline
+- decode จากไฟล์ (load_image) หรือจาก bytes ใน memory (decode_image) ด้วย OpenCV โดยไม่ให้ OpenCV หมุนเอง แล้วใช้ EXIF orientation ที่อ่านได้ (รู้ว่าหมุนไปเท่าไร)
+- resolution policy: อ่านขนาดจาก header ก่อน แล้ว decode แบบย่อ (IMREAD_REDUCED_*) ให้ด้านยาว
+  ไม่ต่ำกว่า OCR_DECODE_MAX_SIDE จากนั้นย่อด้วย INTER_AREA ให้ไม่เกิน (ภาพมือถือ 12-50 MP ไม่ต้อง decode เต็ม)
+- memory budget: ประเมิน working set ของ pipeline แล้วย่อภาพเพิ่มถ้าเกิน OCR_MEMORY_BUDGET_MB
+"""
+import io
+import math
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import Config
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+# JPEG decode แบบย่อ 1/2, 1/4, 1/8 (libjpeg DCT scaling - เร็วและใช้ memory น้อยกว่า decode เต็มแล้ว resize)
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# จำนวน buffer ขนาดเท่าภาพ detection ที่ pipeline ถือพร้อมกัน (gray_det + 4 preprocess variants + temp)
+DETECT_BUFFERS = 6
+# working image BGR (3) + gray (1)
+WORK_BUFFERS = 4
+
+
+def read_header(source):
+    """(width, height, exif_orientation) จาก header ของไฟล์ (ไม่ decode pixel) หรือ (None, None, None)"""
+    try:
+        with Image.open(source) as im:
+            width, height = im.size
+            orientation = im.getexif().get(EXIF_ORIENTATION_TAG)
+    except Exception:
+        return None, None, None
+    return width, height, orientation if orientation in range(1, 9) else None
+
+
+def read_exif_orientation(source):
+    """คืนค่า EXIF orientation (1-8) ของไฟล์/stream หรือ None ถ้าไม่มี"""
+    try:
+        with Image.open(source) as im:
+            value = im.getexif().get(EXIF_ORIENTATION_TAG)
+    except Exception:
+        return None
+    return value if value in range(1, 9) else None
+
+
+def apply_exif_orientation(img, orientation):
+    """หมุน/กลับภาพตาม EXIF orientation ให้ตั้งตรงแบบที่กล้องตั้งใจ"""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def decode_flag(width, height, max_side):
+    """flag ของ cv2.imread ที่ย่อได้มากที่สุดโดยด้านยาวยังไม่ต่ำกว่า max_side"""
+    if width and height and max_side > 0:
+        for factor, flag in REDUCED_FLAGS:
+            if max(width, height) / factor >= max_side:
+                return flag
+    return cv2.IMREAD_COLOR
+
+
+def fit_max_side(img, max_side):
+    """ย่อภาพ (INTER_AREA) ให้ด้านยาวไม่เกิน max_side; ไม่ขยาย"""
+    h, w = img.shape[:2]
+    if max_side <= 0 or max(h, w) <= max_side:
+        return img
+    scale = max_side / max(h, w)
+    return cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def load_image(image_path, max_side=None):
+    """
+    คืน (img BGR ที่ใช้ EXIF orientation แล้ว, exif_orientation) หรือ (None, None) ถ้าอ่านไม่ได้
+    ด้านยาวของภาพไม่เกิน max_side (ค่าเริ่มต้น OCR_DECODE_MAX_SIDE, 0 = ขนาดเต็ม)
+    """
+    max_side = Config.OCR_DECODE_MAX_SIDE if max_side is None else max_side
+    width, height, orientation = read_header(image_path)
+    img = cv2.imread(image_path, decode_flag(width, height, max_side) | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        return None, None
+    img = fit_max_side(img, max_side)
+    return apply_exif_orientation(img, orientation), orientation
+
+
+def decode_image(data, max_side=None):
+    """
+    เหมือน load_image แต่ decode จาก bytes ใน memory (เช่นไฟล์ที่ upload มา) ไม่ต้องเขียนลง disk ก่อน
+    คืน (img, exif_orientation) หรือ (None, None)
+    """
+    max_side = Config.OCR_DECODE_MAX_SIDE if max_side is None else max_side
+    if not data:
+        return None, None
+    width, height, orientation = read_header(io.BytesIO(data))
+    buf = np.frombuffer(data, dtype=np.uint8)
+    img = cv2.imdecode(buf, decode_flag(width, height, max_side) | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        return None, None
+    img = fit_max_side(img, max_side)
+    return apply_exif_orientation(img, orientation), orientation
+
+
+def detection_scale(h, w):
+    """scale ของภาพ global detection: ขยายได้ถึง 2x แต่ด้านยาวไม่เกิน OCR_DETECT_MAX_SIDE"""
+    return min(2.0, Config.OCR_DETECT_MAX_SIDE / max(h, w))
+
+
+def working_set_bytes(h, w, det_scale):
+    """ประเมิน memory ของภาพทั้งหมดที่ pipeline ถือพร้อมกันสำหรับภาพขนาด h x w"""
+    pixels = h * w
+    return int(pixels * WORK_BUFFERS + pixels * det_scale * det_scale * DETECT_BUFFERS)
+
+
+def fit_memory_budget(img):
+    """
+    ย่อ working image ให้ working set ไม่เกิน OCR_MEMORY_BUDGET_MB (0 = ไม่จำกัด)
+    คืน (img, det_scale, working_set_bytes)
+    """
+    h, w = img.shape[:2]
+    det_scale = detection_scale(h, w)
+    estimate = working_set_bytes(h, w, det_scale)
+    budget = Config.OCR_MEMORY_BUDGET_MB * 1024 * 1024
+    if budget <= 0 or estimate <= budget:
+        return img, det_scale, estimate
+
+    # ย่อทั้ง working image และภาพ detection ด้วยสัดส่วนเดียวกัน (คง det_scale เดิม)
+    # ถ้าคำนวณ det_scale ใหม่หลังย่อ ภาพ detection จะถูกขยายกลับจนเกือบเท่าเดิมและเกิน budget
+    shrink = math.sqrt(budget / estimate)
+    img = cv2.resize(img, (max(1, int(w * shrink)), max(1, int(h * shrink))), interpolation=cv2.INTER_AREA)
+    h, w = img.shape[:2]
+    return img, det_scale, working_set_bytes(h, w, det_scale)
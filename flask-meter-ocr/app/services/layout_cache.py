@@ -0,0 +1,163 @@
+"""
+Layout Cache (จำตำแหน่ง ROI ของ reading / S/N ของมิเตอร์ที่เคยเห็น -> ข้าม Step 1 global detection)
+- หลัง Step 2 (anchor) อ่านได้ทั้ง serial และ reading: เก็บ ROI แบบ normalize (0-1 ของขนาดภาพ)
+  คู่กับ descriptor ของหน้ามิเตอร์ (ภาพ gray ย่อ 48x48, zero-mean, normalize) = template ของรุ่น/การถ่าย
+- ภาพใหม่: ถ้า client บอก meter (serial) และเคยเห็น -> ใช้ layout ของมิเตอร์นั้น
+  ไม่งั้นหา template ที่ correlation >= LAYOUT_MATCH_MIN_SCORE และสัดส่วนภาพใกล้กัน
+- layout ที่ใช้แล้วอ่านไม่ได้ (กรอบภาพต่างจากเดิม) -> pipeline เดิมทำต่อ และนับเป็น fallback
+- อยู่ใน memory ของ process (LRU) แต่ละ worker เรียนรู้เอง
+"""
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config import Config
+from app.services import ocr_metrics
+
+DESCRIPTOR_SIDE = 48
+MAX_ASPECT_DIFF = 0.1
+
+LOOKUPS = ocr_metrics.Counter("ocr_layout_lookups_total", "Layout cache lookups", ["result"])
+OUTCOMES = ocr_metrics.Counter(
+    "ocr_layout_outcomes_total", "Cached layouts that settled both fields (used) or fell back", ["outcome"])
+
+_lock = threading.Lock()
+_templates = OrderedDict()  # template id -> Layout
+_by_serial = OrderedDict()  # serial -> template id
+_next_id = 0
+_counters = {"serial_hits": 0, "template_hits": 0, "misses": 0, "used": 0, "fallbacks": 0, "learned": 0}
+
+
+class Layout:
+    def __init__(self, template_id, descriptor, aspect, rois):
+        self.id = template_id
+        self.descriptor = descriptor
+        self.aspect = aspect
+        self.rois = rois  # {"reading": (x, y, w, h), "serial": (x, y, w, h)} normalize แล้ว
+        self.hits = 0
+
+
+def descriptor(gray):
+    """(vector ของหน้ามิเตอร์สำหรับ normalized cross-correlation, aspect w/h)"""
+    h, w = gray.shape[:2]
+    small = cv2.resize(gray, (DESCRIPTOR_SIDE, DESCRIPTOR_SIDE), interpolation=cv2.INTER_AREA)
+    vec = small.astype(np.float32).ravel()
+    vec -= vec.mean()
+    norm = np.linalg.norm(vec)
+    return (vec / norm if norm > 0 else vec), w / float(h)
+
+
+def normalize_roi(rect, w, h):
+    x, y, rw, rh = rect
+    return x / w, y / h, rw / w, rh / h
+
+
+def crop(img, roi):
+    """ตัด ROI (normalize) จาก img โดยขยายขอบ LAYOUT_ROI_MARGIN เผื่อภาพเลื่อนเล็กน้อย"""
+    h, w = img.shape[:2]
+    margin = Config.LAYOUT_ROI_MARGIN
+    x1 = max(0, int((roi[0] - margin) * w))
+    y1 = max(0, int((roi[1] - margin) * h))
+    x2 = min(w, int((roi[0] + roi[2] + margin) * w))
+    y2 = min(h, int((roi[1] + roi[3] + margin) * h))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return img[y1:y2, x1:x2]
+
+
+def _best_template(desc, aspect):
+    best, best_score = None, -1.0
+    for layout in _templates.values():
+        if abs(layout.aspect - aspect) > MAX_ASPECT_DIFF * max(layout.aspect, aspect):
+            continue
+        score = float(layout.descriptor @ desc)
+        if score > best_score:
+            best, best_score = layout, score
+    return best, best_score
+
+
+def _count(name):
+    _counters[name] += 1
+
+
+def lookup(desc, aspect, serial_hint=None):
+    """(Layout, source "serial" | "template", score) หรือ None"""
+    if not Config.LAYOUT_CACHE_ENABLED:
+        return None
+    with _lock:
+        template_id = _by_serial.get(serial_hint) if serial_hint else None
+        layout = _templates.get(template_id) if template_id is not None else None
+        if layout is not None:
+            _by_serial.move_to_end(serial_hint)
+            _templates.move_to_end(layout.id)
+            _count("serial_hits")
+            LOOKUPS.inc(result="serial_hit")
+            return layout, "serial", float(layout.descriptor @ desc)
+
+        layout, score = _best_template(desc, aspect)
+        if layout is None or score < Config.LAYOUT_MATCH_MIN_SCORE:
+            _count("misses")
+            LOOKUPS.inc(result="miss")
+            return None
+        _templates.move_to_end(layout.id)
+        _count("template_hits")
+        LOOKUPS.inc(result="template_hit")
+        return layout, "template", score
+
+
+def record_outcome(layout, used):
+    """used = layout อ่านได้ทั้ง serial และ reading (ข้าม Step 1-4 ได้)"""
+    with _lock:
+        if used:
+            layout.hits += 1
+        _count("used" if used else "fallbacks")
+    OUTCOMES.inc(outcome="used" if used else "fallback")
+
+
+def learn(desc, aspect, serial, rois):
+    """เก็บ layout หลัง anchor extraction สำเร็จ (template ที่เหมือนกันพอ -> อัปเดต ROI ของ template เดิม)"""
+    global _next_id
+    if not Config.LAYOUT_CACHE_ENABLED:
+        return
+    with _lock:
+        layout, score = _best_template(desc, aspect)
+        if layout is not None and score >= Config.LAYOUT_MATCH_MIN_SCORE:
+            layout.rois = rois
+            _templates.move_to_end(layout.id)
+        else:
+            _next_id += 1
+            layout = Layout(_next_id, desc, aspect, rois)
+            _templates[layout.id] = layout
+            while len(_templates) > Config.LAYOUT_CACHE_ENTRIES:
+                _templates.popitem(last=False)
+        if serial:
+            _by_serial[serial] = layout.id
+            _by_serial.move_to_end(serial)
+            while len(_by_serial) > Config.LAYOUT_CACHE_ENTRIES:
+                _by_serial.popitem(last=False)
+        _count("learned")
+
+
+def clear():
+    with _lock:
+        _templates.clear()
+        _by_serial.clear()
+
+
+def stats():
+    with _lock:
+        counters = dict(_counters)
+        templates, serials = len(_templates), len(_by_serial)
+    lookups = counters["serial_hits"] + counters["template_hits"] + counters["misses"]
+    hits = counters["serial_hits"] + counters["template_hits"]
+    tried = counters["used"] + counters["fallbacks"]
+    return {
+        "enabled": Config.LAYOUT_CACHE_ENABLED,
+        "templates": templates,
+        "serials": serials,
+        **counters,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "use_rate": round(counters["used"] / tried, 3) if tried else None,
+    }
@@ -0,0 +1,173 @@
+"""
+OCR Result Cache (content-addressed)
+- key = sha256 ของไฟล์ที่อัปโหลด + เวอร์ชัน engine/config (เปลี่ยน engine/threshold -> cache เก่าไม่ถูกใช้)
+- tier 1: LRU ใน process (OCR_CACHE_MEMORY_ENTRIES)
+- tier 2: ตาราง ocr_cache ใน DB, ลบตามอายุ (OCR_CACHE_MAX_AGE_DAYS) และจำนวนแถว (OCR_CACHE_MAX_ROWS)
+- serial / reading ขึ้นกับทะเบียนมิเตอร์และประวัติ ณ ตอน OCR -> ตอน hit ตรวจกับค่าปัจจุบันอีกครั้ง
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import Config
+from app.models import db
+from app.models.ocr_cache import OCRCacheEntry
+from app.services import serial_index
+
+_memory = OrderedDict()  # key -> (stored_at, result dict)
+_lock = threading.Lock()
+_counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stale": 0, "stores": 0, "evicted": 0}
+_stores_since_evict = 0
+
+
+def cache_version():
+    """เวอร์ชันของ engine + ค่า config ที่มีผลกับผลลัพธ์ OCR"""
+    from app.services import digit_classifier, ocr_engine, ocr_service
+    return (f"{ocr_service.ENGINE_VERSION}|{ocr_engine.engine_name()}"
+            f"|q{Config.OCR_CONSENSUS_QUORUM}c{Config.OCR_CONSENSUS_MIN_CONF:g}"
+            f"|d{digit_classifier.model_version()}")
+
+
+def make_key(data):
+    return f"{hashlib.sha256(data).hexdigest()}:{cache_version()}"
+
+
+def _count(name, n=1):
+    with _lock:
+        _counters[name] += n
+
+
+def _max_age():
+    return timedelta(days=Config.OCR_CACHE_MAX_AGE_DAYS)
+
+
+def _memory_get(key):
+    with _lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > _max_age().total_seconds():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return result
+
+
+def _memory_put(key, result):
+    with _lock:
+        _memory[key] = (time.time(), result)
+        _memory.move_to_end(key)
+        while len(_memory) > Config.OCR_CACHE_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _revalidate(result, prior_loader=None):
+    """
+    ปรับผลใน cache ให้ตรงกับทะเบียนมิเตอร์ / ประวัติปัจจุบัน
+    - serial ที่ตอนเก็บยัง match ไม่ได้ แต่ตอนนี้ match มิเตอร์ที่ลงทะเบียนได้อย่างมั่นใจ -> snap
+    - reading อยู่นอกช่วงที่เป็นไปได้ตามประวัติตอนนี้ -> None (OCR ใหม่ ให้เลือก candidate ตามประวัติ)
+    """
+    serial = result.get("serial")
+    snapped = serial_index.snap(serial)
+    if snapped and snapped != serial:
+        result = {**result, "serial": snapped}
+        serial = snapped
+
+    if prior_loader is not None and serial and result.get("reading"):
+        prior = prior_loader(serial)
+        if prior is not None and not prior.plausible(result["reading"]):
+            return None
+    return result
+
+
+def lookup(key, prior_loader=None):
+    """
+    คืน {image_path, text, serial, reading} ถ้าเคย OCR ไฟล์นี้แล้วและผลยังใช้ได้ ไม่งั้นคืน None
+    prior_loader: reading_prior.loader() ของ request (None = ไม่ตรวจ reading กับประวัติ)
+    """
+    if not Config.OCR_CACHE_ENABLED:
+        return None
+
+    tier = "memory_hits"
+    result = _memory_get(key)
+    if result is None:
+        tier = "db_hits"
+        entry = db.session.get(OCRCacheEntry, key)
+        if entry is not None and entry.created_at and entry.created_at >= datetime.utcnow() - _max_age():
+            # hit_count / last_hit_at ถูก commit พร้อมกับ OCRResult ของ request นี้
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_hit_at = datetime.utcnow()
+            result = entry.to_result()
+            _memory_put(key, result)
+
+    if result is None:
+        _count("misses")
+        return None
+    result = _revalidate(result, prior_loader)
+    _count(tier if result is not None else "stale")
+    return result
+
+
+def store(key, image_path, ocr_data, size_bytes):
+    """เพิ่มผล OCR ลง cache ทั้งสอง tier (commit พร้อม OCRResult ของผู้เรียก)"""
+    global _stores_since_evict
+    if not Config.OCR_CACHE_ENABLED:
+        return
+
+    result = {
+        "image_path": image_path,
+        "text": ocr_data.get("text", ""),
+        "serial": ocr_data.get("serial"),
+        "reading": ocr_data.get("reading"),
+    }
+    now = datetime.utcnow()
+    db.session.merge(OCRCacheEntry(
+        key=key,
+        image_path=image_path,
+        text=result["text"],
+        serial_number=result["serial"],
+        reading=result["reading"],
+        size_bytes=size_bytes,
+        hit_count=0,
+        created_at=now,
+        last_hit_at=now,
+    ))
+    _memory_put(key, result)
+    _count("stores")
+
+    with _lock:
+        _stores_since_evict += 1
+        due = _stores_since_evict >= Config.OCR_CACHE_EVICT_EVERY
+        if due:
+            _stores_since_evict = 0
+    if due:
+        evict()
+
+
+def evict():
+    """ลบแถวที่หมดอายุ และแถวที่ไม่ได้ใช้นานที่สุดเมื่อเกิน OCR_CACHE_MAX_ROWS"""
+    removed = OCRCacheEntry.query.filter(
+        OCRCacheEntry.created_at < datetime.utcnow() - _max_age()
+    ).delete(synchronize_session=False)
+
+    overflow = OCRCacheEntry.query.count() - Config.OCR_CACHE_MAX_ROWS
+    if overflow > 0:
+        oldest = [k for (k,) in db.session.query(OCRCacheEntry.key)
+                  .order_by(OCRCacheEntry.last_hit_at).limit(overflow)]
+        removed += OCRCacheEntry.query.filter(OCRCacheEntry.key.in_(oldest)).delete(synchronize_session=False)
+
+    if removed:
+        _count("evicted", removed)
+    return removed
+
+
+def stats():
+    with _lock:
+        data = dict(_counters)
+        data["memory_entries"] = len(_memory)
+    lookups = data["memory_hits"] + data["db_hits"] + data["misses"] + data["stale"]
+    data["hit_rate"] = round((data["memory_hits"] + data["db_hits"]) / lookups, 3) if lookups else 0.0
+    return data
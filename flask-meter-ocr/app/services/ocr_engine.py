@@ -0,0 +1,250 @@
+"""
+OCR Engine Layer
+- เก็บ Tesseract engine ที่ init แล้ว (tesserocr / PyTessBaseAPI) ไว้ใน pool ใช้ซ้ำข้าม request
+- สลับ PSM / whitelist ต่อการเรียกแต่ละครั้ง และรับ NumPy array ได้โดยตรง (ไม่ต้องเขียน temp file)
+- ถ้าไม่มี tesserocr หรือตั้ง OCR_ENGINE=pytesseract จะ fallback ไปใช้ pytesseract แบบเดิม
+"""
+import os
+import queue
+import shlex
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pytesseract
+
+from config import Config
+from app.services import ocr_metrics
+
+try:
+    import tesserocr
+except ImportError:  # optional: ติดตั้งแยก (ต้องมี libtesseract)
+    tesserocr = None
+
+# ตั้งค่า path ของ Tesseract (สำหรับ pytesseract fallback)
+tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+if os.name == 'nt' and os.path.exists(tesseract_path):
+    pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+DEFAULT_PSM = 3
+DIGITS_WHITELIST = "0123456789-."
+
+
+def parse_config(config):
+    """แปลง config string แบบ pytesseract ('--oem 3 --psm 7 -c key=val digits') เป็น (psm, variables)"""
+    psm = DEFAULT_PSM
+    variables = {}
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok == "--psm" and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 1
+        elif tok == "--oem" and i + 1 < len(tokens):
+            i += 1  # OEM กำหนดตอน init engine
+        elif tok == "-c" and i + 1 < len(tokens):
+            key, _, value = tokens[i + 1].partition("=")
+            variables[key] = value
+            i += 1
+        elif tok == "digits":
+            variables["tessedit_char_whitelist"] = DIGITS_WHITELIST
+        i += 1
+    return psm, variables
+
+
+class TesseractPool:
+    """Pool ของ PyTessBaseAPI ที่สร้างครั้งเดียวแล้วใช้ซ้ำ (สร้างเพิ่มตามต้องการจนถึง size)"""
+
+    def __init__(self, size, lang="eng", tessdata=None):
+        self.size = max(1, size)
+        self.lang = lang
+        self.tessdata = tessdata
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        kwargs = {"lang": self.lang, "oem": tesserocr.OEM.DEFAULT}
+        if self.tessdata:
+            kwargs["path"] = self.tessdata
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def acquire(self):
+        api = None
+        try:
+            api = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    api = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                api = self._idle.get()  # รอจนมี engine ว่าง
+
+        with self._lock:
+            self._in_use += 1
+        try:
+            yield api
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(api)
+
+    def warmup(self):
+        """สร้าง engine ให้ครบ pool ล่วงหน้า (โหลด traineddata ตอน start worker)"""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            self._idle.put(self._create())
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "created": self._created, "in_use": self._in_use}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def engine_name():
+    """engine ที่ใช้จริง: 'tesserocr' หรือ 'pytesseract'"""
+    choice = Config.OCR_ENGINE
+    if choice == "pytesseract" or tesserocr is None:
+        return "pytesseract"
+    return "tesserocr"
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TesseractPool(
+                    Config.OCR_ENGINE_POOL_SIZE,
+                    lang=Config.OCR_TESSERACT_LANG,
+                    tessdata=Config.OCR_TESSDATA_PATH,
+                )
+    return _pool
+
+
+def _set_image(api, img):
+    arr = np.ascontiguousarray(img, dtype=np.uint8)
+    if arr.ndim == 3:
+        # OpenCV เป็น BGR -> Tesseract ต้องการ RGB
+        arr = np.ascontiguousarray(arr[:, :, ::-1])
+        bpp = 3
+    else:
+        bpp = 1
+    h, w = arr.shape[:2]
+    api.SetImageBytes(arr.tobytes(), w, h, bpp, w * bpp)
+
+
+@contextmanager
+def _configured(api, config):
+    """ตั้ง PSM + variables สำหรับการเรียกครั้งนี้ แล้วคืนค่าเดิมหลังใช้งาน"""
+    psm, variables = parse_config(config)
+    previous = {}
+    api.SetPageSegMode(psm)
+    for key, value in variables.items():
+        previous[key] = api.GetVariableAsString(key) or ""
+        api.SetVariable(key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            api.SetVariable(key, value)
+        api.Clear()
+
+
+def image_to_string(img, config=""):
+    """เทียบเท่า pytesseract.image_to_string แต่ใช้ engine จาก pool"""
+    ocr_metrics.count_tesseract_call()
+    if engine_name() == "pytesseract":
+        return pytesseract.image_to_string(img, config=config)
+
+    with get_pool().acquire() as api:
+        with _configured(api, config):
+            _set_image(api, img)
+            return api.GetUTF8Text()
+
+
+def image_to_data(img, config=""):
+    """
+    เทียบเท่า pytesseract.image_to_data(output_type=DICT) (key: text, conf, left, top, width, height)
+    engine tesserocr จะมี key 'char_conf' เพิ่ม (confidence ของแต่ละตัวอักษรในแต่ละคำ)
+    """
+    ocr_metrics.count_tesseract_call()
+    if engine_name() == "pytesseract":
+        return pytesseract.image_to_data(img, config=config, output_type=pytesseract.Output.DICT)
+
+    data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": [], "char_conf": []}
+    word, symbol = tesserocr.RIL.WORD, tesserocr.RIL.SYMBOL
+    with get_pool().acquire() as api:
+        with _configured(api, config):
+            _set_image(api, img)
+            api.Recognize()
+            ri = api.GetIterator()
+            if ri is None:
+                return data
+            for r in tesserocr.iterate_level(ri, symbol):
+                if r.IsAtBeginningOf(word) or not data["text"]:
+                    x1, y1, x2, y2 = r.BoundingBox(word) or (0, 0, 0, 0)
+                    data["text"].append(r.GetUTF8Text(word) or "")
+                    data["conf"].append(r.Confidence(word))
+                    data["left"].append(x1)
+                    data["top"].append(y1)
+                    data["width"].append(x2 - x1)
+                    data["height"].append(y2 - y1)
+                    data["char_conf"].append([])
+                data["char_conf"][-1].append(r.Confidence(symbol))
+    return data
+
+
+def detect_orientation(img):
+    """
+    Tesseract OSD (--psm 0) ครั้งเดียว
+    คืน (rotate_cw, confidence) = องศาที่ต้องหมุนตามเข็มนาฬิกาให้ภาพตั้งตรง หรือ None ถ้าตรวจไม่ได้
+    """
+    ocr_metrics.count_tesseract_call()
+    if engine_name() == "pytesseract":
+        try:
+            osd = pytesseract.image_to_osd(img, output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractError:
+            return None  # เช่น ข้อความน้อยเกินไป / ไม่มี osd.traineddata
+        return int(osd["rotate"]) % 360, float(osd["orientation_conf"])
+
+    with get_pool().acquire() as api:
+        with _configured(api, "--psm 0"):
+            _set_image(api, img)
+            osd = api.DetectOrientationScript()
+    if not osd:
+        return None
+    # orient_deg = ภาพเอียงไปตามเข็มนาฬิกากี่องศา
+    return (360 - int(osd["orient_deg"])) % 360, float(osd["orient_conf"])
+
+
+def warmup():
+    """init engine ทั้ง pool ล่วงหน้า (ไม่มีผลกับ pytesseract fallback)"""
+    if engine_name() == "tesserocr":
+        get_pool().warmup()
+
+
+def pool_stats():
+    stats = {"engine": engine_name()}
+    if engine_name() == "tesserocr":
+        stats.update(get_pool().stats())
+    return stats
@@ -0,0 +1,200 @@
+"""
+OCR Job Queue
+- ตาราง ocr_jobs เป็นคิวหลัก (ไม่ต้องใช้ broker ภายนอก) job ค้างหลัง restart ก็ยังถูกหยิบไปทำต่อ
+- worker thread จำนวนจำกัด (OCR_JOB_WORKERS) ต่อ process คอยหยิบ job ไปรัน read_text
+- in-process queue ใช้แค่ปลุก worker ทันทีที่มี job ใหม่ ถ้าไม่มีก็ poll DB ทุก OCR_JOB_POLL_SECONDS
+- batch pool (OCR_BATCH_WORKERS): thread pool ร่วมกันของ POST /api/ocr/batch ไม่ผ่านตาราง ocr_jobs
+"""
+import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import Config
+from app.models import db
+from app.models.ocr_job import OCRJob
+from app.models.ocr_result import OCRResult
+from app.services import ocr_trace, serial_index, reading_prior
+
+logger = logging.getLogger(__name__)
+
+_wakeup = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+_active = 0
+_active_lock = threading.Lock()
+_batch_executor = None
+_batch_pending = 0
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def enqueue(job_id, image_path, user_id=None):
+    """บันทึก job ใหม่ลง DB (status=queued) แล้วปลุก worker"""
+    job = OCRJob(id=job_id, status="queued", image_path=image_path, user_id=user_id, attempts=0)
+    db.session.add(job)
+    db.session.commit()
+    _wakeup.put(job_id)
+    return job
+
+
+def queued_count():
+    return OCRJob.query.filter_by(status="queued").count()
+
+
+def worker_stats():
+    with _active_lock:
+        active, batch_pending = _active, _batch_pending
+    return {"workers": len(_workers), "active": active,
+            "batch_workers": Config.OCR_BATCH_WORKERS, "batch_pending": batch_pending}
+
+
+def _batch_done(_future):
+    global _batch_pending
+    with _active_lock:
+        _batch_pending -= 1
+
+
+def submit_batch(fn, *args):
+    """ส่งงาน OCR ของ batch เข้า thread pool ร่วม (สร้างครั้งแรกที่ใช้) คืน Future"""
+    global _batch_executor, _batch_pending
+    if _batch_executor is None:
+        with _workers_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=max(1, Config.OCR_BATCH_WORKERS), thread_name_prefix="ocr-batch")
+    with _active_lock:
+        _batch_pending += 1
+    future = _batch_executor.submit(fn, *args)
+    future.add_done_callback(_batch_done)
+    return future
+
+
+def ensure_workers(app):
+    """start worker threads ครั้งแรกที่ถูกเรียก (ไม่ start ตอน CLI / migration)"""
+    if _workers or Config.OCR_JOB_WORKERS <= 0:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        with app.app_context():
+            _requeue_stale()
+        for i in range(Config.OCR_JOB_WORKERS):
+            t = threading.Thread(target=_worker_loop, args=(app,), name=f"ocr-job-worker-{i}", daemon=True)
+            t.start()
+            _workers.append(t)
+        logger.info("ocr_job_workers_started count=%d", len(_workers))
+
+
+def _requeue_stale():
+    """
+    job ที่ค้าง running นานเกิน (process ตายกลางคัน) ให้กลับไปเป็น queued
+    ถ้าลองครบ OCR_JOB_MAX_ATTEMPTS แล้ว (เช่น ภาพที่ทำให้ worker OOM ทุกครั้ง) -> failed ไม่วนซ้ำ
+    """
+    now = datetime.utcnow()
+    stale = OCRJob.query.filter(OCRJob.status == "running",
+                                OCRJob.started_at < now - timedelta(seconds=Config.OCR_JOB_STALE_SECONDS))
+    try:
+        failed = stale.filter(OCRJob.attempts >= Config.OCR_JOB_MAX_ATTEMPTS).update({
+            "status": "failed",
+            "error": f"worker did not finish after {Config.OCR_JOB_MAX_ATTEMPTS} attempts",
+            "finished_at": now,
+        }, synchronize_session=False)
+        count = stale.update({"status": "queued"}, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.error("ocr_jobs_abandoned count=%d", failed)
+        if count:
+            logger.warning("ocr_jobs_requeued count=%d", count)
+    except Exception as e:
+        db.session.rollback()
+        logger.error("ocr_jobs_requeue_failed error=%s", e)
+
+
+def _claim(job_id=None):
+    """จอง job (queued -> running) แบบ atomic; ถ้า worker อื่นจองไปก่อนจะได้ None"""
+    if job_id is None:
+        job = OCRJob.query.filter_by(status="queued").order_by(OCRJob.created_at).first()
+        if job is None:
+            return None
+        job_id = job.id
+
+    claimed = OCRJob.query.filter_by(id=job_id, status="queued").update({
+        "status": "running",
+        "started_at": datetime.utcnow(),
+        "attempts": OCRJob.attempts + 1,
+    }, synchronize_session=False)
+    db.session.commit()
+    return job_id if claimed == 1 else None
+
+
+def _run_job(job_id):
+    from app.services.ocr_service import read_text
+
+    job = db.session.get(OCRJob, job_id)
+    if job is None:
+        # แถวถูกลบไปหลัง claim
+        logger.warning("ocr_job_missing job_id=%s", job_id)
+        return
+    try:
+        with ocr_trace.capture(ocr_trace.sampled(), source=job.image_path) as trace:
+            ocr_data = read_text(job.image_path, serial_matcher=serial_index.matcher(),
+                                 reading_prior=reading_prior.loader())
+            if trace is not None:
+                trace.result = ocr_data
+        record = OCRResult(
+            image_path=job.image_path,
+            text=ocr_data.get("text", ""),
+            serial_number=ocr_data.get("serial"),
+            reading=ocr_data.get("reading"),
+        )
+        db.session.add(record)
+        db.session.flush()
+        job.ocr_result_id = record.id
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(OCRJob, job_id)
+        if job is None:
+            logger.error("ocr_job_failed job_id=%s error=%s (job row gone)", job_id, e)
+            return
+        job.status = "failed"
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.error("ocr_job_failed job_id=%s error=%s", job_id, e)
+
+
+def _worker_loop(app):
+    global _active
+    while True:
+        try:
+            hinted = _wakeup.get(timeout=Config.OCR_JOB_POLL_SECONDS)
+        except queue.Empty:
+            hinted = None
+
+        with app.app_context():
+            try:
+                job_id = _claim(hinted) if hinted else None
+                if job_id is None:
+                    job_id = _claim()
+                while job_id:
+                    with _active_lock:
+                        _active += 1
+                    try:
+                        _run_job(job_id)
+                    finally:
+                        with _active_lock:
+                            _active -= 1
+                    job_id = _claim()
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("ocr_job_worker_error error=%s", e)
+            finally:
+                db.session.remove()
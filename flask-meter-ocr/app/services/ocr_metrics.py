@@ -0,0 +1,229 @@
+"""
+OCR Metrics (in-process, Prometheus text format)
+- histogram เวลาแต่ละ stage ของ read_text, จำนวนครั้งที่เรียก Tesseract ต่อ request,
+  step ที่ได้ serial/reading, ขนาดไฟล์อัปโหลด, ขนาดภาพ และ latency ของแต่ละ endpoint
+- ค่าเก็บแยกต่อ process (ถ้ามีหลาย worker ให้ Prometheus scrape/aggregate เอง)
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_lock = threading.Lock()
+_registry = []
+_collectors = []  # callable -> [(name, type, help, [(labels dict, value)])]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 100)
+BYTES_BUCKETS = (64e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6, 16e6)
+PIXEL_BUCKETS = (480, 640, 800, 1024, 1600, 2048, 3000, 4000, 6000, 8000)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(n, "")) for n in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{n}="{_escape(v)}"' for n, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with _lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        with _lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', f'{bound:g}'))} {state[i]}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+def register_collector(fn):
+    """fn() -> [(name, type, help, [(labels dict, value)])] สำหรับค่าที่อ่านจากที่อื่นตอน scrape"""
+    _collectors.append(fn)
+    return fn
+
+
+# ============================================================
+# Metrics ของ OCR pipeline
+# ============================================================
+STAGE_SECONDS = Histogram("ocr_stage_seconds", "Time spent in each read_text stage", ["stage"])
+TESSERACT_CALLS = Counter("ocr_tesseract_calls_total", "Tesseract recognitions executed")
+TESSERACT_CALLS_PER_REQUEST = Histogram(
+    "ocr_tesseract_calls_per_request", "Tesseract recognitions per read_text call", buckets=COUNT_BUCKETS)
+FIELD_SOURCE = Counter(
+    "ocr_field_source_total", "Pipeline step that produced the serial/reading", ["field", "step"])
+ROTATION_TIER = Counter("ocr_rotation_tier_total", "Orientation detector tier that decided", ["tier"])
+UPLOAD_BYTES = Histogram("ocr_upload_bytes", "Uploaded image size in bytes", buckets=BYTES_BUCKETS)
+IMAGE_PIXELS = Histogram("ocr_image_pixels", "Decoded image dimension in pixels", ["axis"], buckets=PIXEL_BUCKETS)
+WORKING_SET_BYTES = Histogram(
+    "ocr_working_set_bytes", "Estimated image memory held by one read_text call",
+    buckets=(8e6, 16e6, 32e6, 64e6, 128e6, 256e6, 512e6, 1e9))
+HTTP_SECONDS = Histogram("http_request_seconds", "Request latency per endpoint", ["endpoint", "method", "status"])
+
+_request_calls = contextvars.ContextVar("ocr_request_calls", default=None)
+_inflight = 0
+
+
+def inflight():
+    """จำนวน read_text ที่กำลังรันอยู่ใน process นี้ (ทุก thread: request / job / batch)"""
+    return _inflight
+
+
+def count_tesseract_call(n=1):
+    TESSERACT_CALLS.inc(n)
+    counter = _request_calls.get()
+    if counter is not None:
+        counter[0] += n
+
+
+@contextmanager
+def request_scope():
+    """นับจำนวน Tesseract call ของ read_text หนึ่งครั้ง (และจำนวน read_text ที่รันพร้อมกัน)"""
+    global _inflight
+    counter = [0]
+    token = _request_calls.set(counter)
+    with _lock:
+        _inflight += 1
+    try:
+        yield counter
+    finally:
+        with _lock:
+            _inflight -= 1
+        _request_calls.reset(token)
+        TESSERACT_CALLS_PER_REQUEST.observe(counter[0])
+
+
+class StageTimer:
+    """จับเวลาเป็นช่วงๆ: mark(name) = เวลาตั้งแต่ mark ก่อนหน้า (ไม่ต้องครอบ block ด้วย with)"""
+
+    def __init__(self):
+        self.start = self._last = time.perf_counter()
+        self.stages = {}
+
+    def mark(self, name):
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        return elapsed
+
+    def total(self):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, stage="total")
+        return elapsed
+
+
+def current_rss_bytes():
+    """RSS ปัจจุบันของ process (Linux /proc) หรือ None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes():
+    """RSS สูงสุดตั้งแต่ process เริ่ม หรือ None (ไม่มี resource module)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS = bytes, Linux = KB
+
+
+def render():
+    """Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception:
+            continue
+        for name, mtype, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {mtype}")
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app):
+    """จับเวลาทุก request (ยกเว้น /api/metrics เอง)"""
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None and request.endpoint != "metrics.metrics":
+            HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=request.endpoint or "unknown",
+                                 method=request.method, status=response.status_code)
+        return response
@@ -0,0 +1,154 @@
+"""
+Parallel execution mode สำหรับ OCR pipeline
+- OCR_PARALLEL_WORKERS > 1: กระจายการเรียก Tesseract (แต่ละ preprocessing variant / (method, psm))
+  ไปยัง process pool; ภาพถูก copy ลง shared memory ครั้งเดียว worker attach แบบ zero-copy (ไม่ pickle array)
+- ผลลัพธ์คืนตามลำดับที่ส่งเข้าไปเสมอ ดังนั้นผลสุดท้ายเหมือนกับ serial mode
+- OCR_PARALLEL_WORKERS <= 1: รันทีละตัวใน process เดิม (ค่าเริ่มต้น)
+"""
+import atexit
+import contextvars
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from config import Config
+from app.services import ocr_engine, ocr_metrics
+
+_executor = None
+_branch_executor = None
+_lock = threading.Lock()
+
+
+def enabled():
+    return Config.OCR_PARALLEL_WORKERS > 1
+
+
+class SharedImage:
+    """ภาพใน shared memory; ส่งแค่ ref (name, shape, dtype) ให้ worker"""
+
+    def __init__(self, img):
+        arr = np.ascontiguousarray(img)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=self._shm.buf)[...] = arr
+        self.ref = (self._shm.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _attach(ref):
+    name, shape, dtype = ref
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # parent เป็นเจ้าของ segment; ไม่ให้ resource tracker ของ worker unlink ทิ้ง
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _ocr_task(kind, ref, config):
+    """รันใน worker process"""
+    shm, img = _attach(ref)
+    try:
+        if kind == "data":
+            return ocr_engine.image_to_data(img, config=config)
+        return ocr_engine.image_to_string(img, config=config)
+    finally:
+        del img
+        shm.close()
+
+
+def _worker_init():
+    ocr_engine.warmup()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                ctx = multiprocessing.get_context(Config.OCR_PARALLEL_START_METHOD)
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.OCR_PARALLEL_WORKERS,
+                    mp_context=ctx,
+                    initializer=_worker_init,
+                )
+    return _executor
+
+
+def _run_local(kind, img, config):
+    if kind == "data":
+        return ocr_engine.image_to_data(img, config=config)
+    return ocr_engine.image_to_string(img, config=config)
+
+
+def imap(calls):
+    """
+    calls: list ของ (kind, img, config) โดย kind = "string" | "data"
+    yield ผลลัพธ์ตามลำดับเดิม (ถ้า error จะ yield exception object แทน)
+    ถ้าผู้เรียกหยุดกลางทาง งานที่ยังไม่เริ่มจะถูก cancel
+    """
+    if not enabled():
+        for kind, img, config in calls:
+            try:
+                yield _run_local(kind, img, config)
+            except Exception as e:
+                yield e
+        return
+
+    shared = {}
+    futures = []
+    try:
+        executor = get_executor()
+        for kind, img, config in calls:
+            key = id(img)
+            if key not in shared:
+                shared[key] = SharedImage(img)
+            futures.append(executor.submit(_ocr_task, kind, shared[key].ref, config))
+            # worker process นับ metrics ของตัวเอง -> นับฝั่ง parent แทน
+            ocr_metrics.count_tesseract_call()
+
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield e
+    finally:
+        for future in futures:
+            future.cancel()
+        wait(futures)  # รอ task ที่กำลังรันอยู่ก่อนคืน shared memory
+        for shm in shared.values():
+            shm.close()
+
+
+def run_branches(*funcs):
+    """รันหลาย branch (เช่น reading / serial anchor) พร้อมกัน คืนผลตามลำดับ argument"""
+    if not enabled():
+        return [fn() for fn in funcs]
+
+    global _branch_executor
+    if _branch_executor is None:
+        with _lock:
+            if _branch_executor is None:
+                _branch_executor = ThreadPoolExecutor(
+                    max_workers=max(2, Config.OCR_PARALLEL_WORKERS),
+                    thread_name_prefix="ocr-branch",
+                )
+    futures = [_branch_executor.submit(contextvars.copy_context().run, fn) for fn in funcs]
+    return [f.result() for f in futures]
+
+
+@atexit.register
+def shutdown():
+    global _executor, _branch_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _branch_executor is not None:
+        _branch_executor.shutdown(wait=False, cancel_futures=True)
+        _branch_executor = None
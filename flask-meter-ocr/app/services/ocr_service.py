@@ -1,48 +1,51 @@
-import pytesseract
 import cv2
 import numpy as np
 from PIL import Image
+import logging
 import os
 import re
+from collections import namedtuple
 
-# ตั้งค่า path ของ Tesseract
-tesseract_path = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-if os.name == 'nt' and os.path.exists(tesseract_path):
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
+from config import Config
+from app.services import digit_classifier, image_io, layout_cache, ocr_engine, ocr_metrics, ocr_parallel, ocr_trace
+from app.services import preprocess_graph as pg
 
-# === Debug: บันทึกภาพ preprocessed ลง disk เพื่อตรวจสอบ ===
-DEBUG_DIR = "app/static/debug"
-os.makedirs(DEBUG_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
+# candidate ตัวเลขจาก OCR: conf = confidence เฉลี่ยระดับคำ (0-100), char_conf = confidence รายตัวอักษร
+Candidate = namedtuple("Candidate", ["digits", "method", "conf", "char_conf"])
+
+# เปลี่ยนเมื่อ pipeline/scoring เปลี่ยน (ใช้เป็นส่วนหนึ่งของ cache key)
+ENGINE_VERSION = "2.5"
+
+READING_BLACKLIST = ['1000', '2000', '1200', '220', '240', '50', '60']
+CURRENT_YEAR = 2026
+
+# === Debug: เก็บภาพ preprocessed ไว้ใน trace ของ request (เฉพาะเมื่อเปิด trace) ===
 def save_debug(name, img):
-    """Save debug image for inspection"""
-    path = os.path.join(DEBUG_DIR, f"{name}.jpg")
-    cv2.imwrite(path, img)
-    print(f"  💾 DEBUG saved: {path}")
+    """Keep debug image in the current request's trace (no-op when tracing is off)"""
+    ocr_trace.save(name, img)
 
 
 def preprocess_for_text_detection(gray):
-    """สร้างหลายเวอร์ชันของภาพเพื่อเพิ่มโอกาสตรวจจับข้อความ"""
+    """
+    สร้างหลายเวอร์ชันของภาพเพื่อเพิ่มโอกาสตรวจจับข้อความ
+    ผ่าน preprocess graph -> Step 1 (psm 6 / psm 3) และ Step 4 ใช้ชุดเดียวกัน ไม่คำนวณซ้ำ
+    """
     results = []
     
     # Strategy 1: CLAHE (Contrast Limited Adaptive Histogram Equalization)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
+    enhanced = pg.clahe(gray, 2.0, 8)
     results.append(("clahe", enhanced))
     
     # Strategy 2: Simple Binary Threshold
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    results.append(("otsu", binary))
+    results.append(("otsu", pg.otsu(gray)))
     
     # Strategy 3: Adaptive Threshold
-    adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                      cv2.THRESH_BINARY, 21, 10)
-    results.append(("adaptive", adaptive))
+    results.append(("adaptive", pg.adaptive(gray, 21, 10)))
     
     # Strategy 4: Sharpen + CLAHE
-    kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-    sharpened = cv2.filter2D(enhanced, -1, kernel)
-    results.append(("sharp_clahe", sharpened))
+    results.append(("sharp_clahe", pg.sharpen(enhanced)))
     
     return results
 
@@ -59,120 +62,301 @@ def run_tesseract_multi(gray, psm=3, digits_only=False):
     if digits_only:
         config_str += ' digits'
     
-    for name, processed in preprocessed_list:
-        try:
-            if psm == 3 or psm == 6:
-                data = pytesseract.image_to_data(processed, output_type=pytesseract.Output.DICT)
-                text_parts = [str(t) for t in data['text'] if str(t).strip()]
-                text = " ".join(text_parts)
-                if len(text) > len(best_text):
-                    best_text = text
-                    best_data = data
-                    best_name = name
-            else:
-                text = pytesseract.image_to_string(processed, config=config_str).strip()
-                if len(text) > len(best_text):
-                    best_text = text
-                    best_data = None
-                    best_name = name
-        except Exception as e:
-            print(f"  ⚠️ Tesseract error with {name}: {e}")
-            continue
+    use_data = psm == 3 or psm == 6
+    calls = [("data", processed, "") if use_data else ("string", processed, config_str)
+             for _, processed in preprocessed_list]
     
-    print(f"  🏆 Best strategy: '{best_name}' -> '{best_text[:80]}'")
+    # ผลลัพธ์กลับมาตามลำดับ variant เสมอ (ทั้ง serial / parallel mode)
+    for (name, _), outcome in zip(preprocessed_list, ocr_parallel.imap(calls)):
+        if isinstance(outcome, Exception):
+            logger.warning("tesseract_error strategy=%s error=%s", name, outcome)
+            continue
+        if use_data:
+            data = outcome
+            text_parts = [str(t) for t in data['text'] if str(t).strip()]
+            text = " ".join(text_parts)
+            if len(text) > len(best_text):
+                best_text = text
+                best_data = data
+                best_name = name
+        else:
+            text = outcome.strip()
+            if len(text) > len(best_text):
+                best_text = text
+                best_data = None
+                best_name = name
+    
+    logger.debug("best_strategy name=%s text=%r", best_name, best_text[:80])
     return best_text, best_data
 
 
-def extract_reading_from_region(img, region_name="reading"):
+def _digits_with_confidence(data):
+    """รวมตัวเลขจากทุกคำใน image_to_data -> (digits, word_conf, char_confs)"""
+    digits = ""
+    word_confs = []
+    char_confs = []
+    char_conf_list = data.get('char_conf')
+    for j, word in enumerate(data['text']):
+        word = str(word)
+        word_digits = re.sub(r'\D', '', word)
+        if not word_digits:
+            continue
+        conf = float(data['conf'][j])
+        if conf < 0:
+            continue
+        digits += word_digits
+        word_confs.append(conf)
+        if char_conf_list:
+            # confidence รายตัวอักษร (เฉพาะตำแหน่งที่เป็นตัวเลข)
+            per_char = char_conf_list[j]
+            char_confs.extend(c for ch, c in zip(word, per_char) if ch.isdigit())
+        else:
+            char_confs.extend([conf] * len(word_digits))
+    conf = sum(word_confs) / len(word_confs) if word_confs else 0.0
+    return digits, conf, tuple(char_confs)
+
+
+def _method_family(method):
+    """'m2_psm7' -> 'm2' (psm ต่างกันบนภาพ threshold เดียวกันไม่นับเป็นคนละวิธี)"""
+    return method.rsplit("_psm", 1)[0]
+
+
+def _has_consensus(results, accept):
+    """ครบ quorum เมื่อ method (threshold) ที่ต่างกันอย่างน้อย N วิธีอ่านได้ตัวเลขเดียวกันด้วย conf >= เกณฑ์"""
+    quorum = Config.OCR_CONSENSUS_QUORUM
+    if quorum <= 0:
+        return False
+    agreeing = {}
+    for cand in results:
+        if cand.conf < Config.OCR_CONSENSUS_MIN_CONF or (accept and not accept(cand.digits)):
+            continue
+        methods = agreeing.setdefault(cand.digits, set())
+        methods.add(_method_family(cand.method))
+        if len(methods) >= quorum:
+            return True
+    return False
+
+
+def _upscale_roi(roi):
+    """ขยาย ROI 3x ให้ตัวเลขใหญ่พอสำหรับ Tesseract แต่ด้านยาวไม่เกิน OCR_ROI_MAX_SIDE"""
+    scale = min(3.0, Config.OCR_ROI_MAX_SIDE / max(roi.shape[:2]))
+    if scale <= 1:
+        return roi
+    return pg.resize(roi, scale, cv2.INTER_CUBIC)
+
+
+def _classify_digits(thresholds, accept):
+    """
+    fast path: digit classifier อ่านแต่ละ threshold (ไม่เรียก Tesseract)
+    คืนเฉพาะผลที่ confidence >= DIGIT_CLASSIFIER_MIN_CONF (เป็นคะแนนโหวตร่วมกับผลของ Tesseract)
+    """
+    model = digit_classifier.get_model()
+    if model is None:
+        return []
+    results = []
+    for i, thresh in enumerate(thresholds, 1):
+        found = model.read(thresh)
+        if found is None:
+            continue
+        digits, conf, char_conf = found
+        if conf >= Config.DIGIT_CLASSIFIER_MIN_CONF and (accept is None or accept(digits)):
+            results.append(Candidate(digits, f"m{i}_knn", conf * 100, char_conf))
+    return results
+
+
+def _ocr_digit_combos(region_name, thresholds, psms, accept=None):
+    """
+    OCR ทุก (method, psm) ด้วย whitelist ตัวเลข คืน candidates [Candidate]
+    เรียงแบบ psm ก่อน (m1 psm7, m2 psm7, m3 psm7, m1 psm8, ...) เพื่อให้ method ต่างกันได้โหวตเร็วที่สุด
+    และหยุดทันทีที่มี consensus (ไม่ต้องรันครบ 9 ครั้ง)
+    digit classifier อ่านก่อน ถ้ามั่นใจจนได้ consensus เองก็ไม่ต้องเรียก Tesseract เลย
+    """
+    digit_classifier.collect(region_name, thresholds)
+    results = _classify_digits(thresholds, accept)
+    if results and _has_consensus(results, accept):
+        digit_classifier.FAST_PATH.inc(result="hit")
+        logger.debug("digit_classifier_hit region=%s digits=%s", region_name, results[0].digits)
+        return results
+    if digit_classifier.get_model() is not None:
+        digit_classifier.FAST_PATH.inc(result="fallback")
+    
+    scaled_list = [_upscale_roi(t) for t in thresholds]
+    combos = [(i, psm) for psm in psms for i in range(1, len(thresholds) + 1)]
+    calls = [("data", scaled_list[i - 1], f'--oem 3 --psm {psm} -c tessedit_char_whitelist=0123456789')
+             for i, psm in combos]
+    
+    outcomes = ocr_parallel.imap(calls)
+    try:
+        for n, ((i, psm), outcome) in enumerate(zip(combos, outcomes), 1):
+            if isinstance(outcome, Exception):
+                continue
+            digits, conf, char_conf = _digits_with_confidence(outcome)
+            if digits:
+                results.append(Candidate(digits, f"m{i}_psm{psm}", conf, char_conf))
+                logger.debug("candidate region=%s method=m%d psm=%d digits=%s conf=%.0f",
+                             region_name, i, psm, digits, conf)
+                if _has_consensus(results, accept):
+                    logger.debug("consensus region=%s calls=%d/%d", region_name, n, len(calls))
+                    break
+    finally:
+        outcomes.close()
+    
+    return results
+
+
+def is_reading_shape(digits, blacklist=READING_BLACKLIST, current_year=CURRENT_YEAR):
+    """ตัวเลขที่มีรูปแบบเป็นค่าหน่วยไฟได้ (3-6 หลัก, ไม่อยู่ใน blacklist, ไม่ใช่ปี)"""
+    if len(digits) < 3 or len(digits) > 6:
+        return False
+    if digits in blacklist:
+        return False
+    try:
+        return not (2010 <= int(digits) <= current_year + 1)
+    except ValueError:
+        return False
+
+
+def is_serial_shape(digits):
+    """ตัวเลขที่มีรูปแบบเป็น S/N ได้ (5-10 หลัก)"""
+    return 5 <= len(digits) <= 10
+
+
+def consensus_info(candidates, digits):
+    """สรุป method / จำนวน method ที่เห็นตรงกัน / confidence ของตัวเลขที่ถูกเลือก"""
+    matching = [c for c in candidates if c.digits == digits]
+    if not matching:
+        return {"method": None, "agreement": 0, "confidence": None}
+    best = max(matching, key=lambda c: c.conf)
+    return {
+        "method": best.method,
+        "agreement": len({_method_family(c.method) for c in matching}),
+        "confidence": round(best.conf, 1),
+    }
+
+
+def _record_choice(final_result, field, candidates, digits, step):
+    final_result[field] = digits
+    final_result[f"{field}_step"] = step
+    info = consensus_info(candidates, digits)
+    final_result[f"{field}_method"] = info["method"]
+    final_result[f"{field}_agreement"] = info["agreement"]
+    final_result[f"{field}_confidence"] = info["confidence"]
+
+
+def _choose_serial(final_result, candidates, step, serial_matcher=None):
+    """
+    เลือก serial จาก candidates ของ step นี้ คืน True ถ้าได้คำตอบแล้ว (ไม่ต้องลอง step ถัดไป)
+    - มี serial_matcher และ match มิเตอร์ที่ลงทะเบียนไว้ได้อย่างมั่นใจ -> ใช้ serial ที่ลงทะเบียน
+    - ไม่งั้นใช้ select_best_serial เหมือนเดิม (S/N ที่ยังไม่ลงทะเบียนก็หยุดได้ ไม่ต้องไป Step 3/4)
+    """
+    if serial_matcher is not None:
+        match = serial_matcher(candidates)
+        if match and match["confident"]:
+            _record_choice(final_result, "serial", candidates, match["ocr"], step)
+            final_result["serial"] = match["serial"]
+            final_result["serial_ocr"] = match["ocr"]
+            final_result["serial_match_distance"] = match["distance"]
+            return True
+
+    result = select_best_serial(candidates)
+    if result and not final_result["serial"]:
+        _record_choice(final_result, "serial", candidates, result, step)
+        final_result["serial_ocr"] = result
+    return bool(final_result["serial"])
+
+
+def _choose_reading(final_result, candidates, step, blacklist, current_year, prior=None):
+    """
+    เลือก reading จาก candidates ของ step นี้ คืน True ถ้าได้คำตอบแล้ว (ไม่ต้องลอง step ถัดไป)
+    - มี prior และมีค่าที่เป็นไปได้ตามประวัติ -> ใช้ค่านั้น แล้วหยุดทันที
+    - ไม่งั้นใช้เกณฑ์เดิมแล้วหยุดเหมือนเดิม; ถ้ามี prior ติด reading_plausible=False ไว้ให้ client ตรวจ
+      (มิเตอร์ถูก reset / เว้นช่วงนานก็ไม่ต้องไป Step 3/4)
+    """
+    if prior is not None:
+        result = select_best_reading(candidates, blacklist, current_year, prior)
+        if result:
+            _record_choice(final_result, "reading", candidates, result, step)
+            final_result["reading_plausible"] = True
+            return True
+
+    result = select_best_reading(candidates, blacklist, current_year)
+    if result and not final_result["reading"]:
+        _record_choice(final_result, "reading", candidates, result, step)
+        if prior is not None:
+            final_result["reading_plausible"] = False
+    return bool(final_result["reading"])
+
+
+def _load_prior(reading_prior, serial):
+    """prior ของมิเตอร์ serial นี้ (None ถ้าไม่มีประวัติ / โหลดไม่ได้ -> ใช้เกณฑ์เดิม)"""
+    if reading_prior is None or not serial:
+        return None
+    try:
+        return reading_prior(serial)
+    except Exception as e:
+        logger.warning("reading_prior_failed serial=%s error=%s", serial, e)
+        return None
+
+
+def extract_reading_from_region(img, region_name="reading", accept=is_reading_shape):
     """
     อ่านค่าหน่วยไฟจากบริเวณตัวเลขขาวบนพื้นดำ (ส่วนบนของมิเตอร์)
     ใช้หลายวิธี preprocessing เพื่อเพิ่มความแม่นยำ
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
-    results = []
+    gray = pg.gray(img)
     
     # Method 1: Invert + CLAHE + Threshold (สำหรับเลขขาวบนพื้นดำ)
-    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
-    inverted = cv2.bitwise_not(enhanced)
-    _, thresh1 = cv2.threshold(inverted, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    enhanced = pg.clahe(gray, 3.0, 8)
+    thresh1 = pg.otsu(pg.invert(enhanced))
     save_debug(f"{region_name}_method1_otsu_inv", thresh1)
     
     # Method 2: Direct Adaptive Threshold Inverted
-    thresh2 = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY_INV, 15, 8)
+    thresh2 = pg.adaptive(gray, 15, 8, True)
     save_debug(f"{region_name}_method2_adaptive_inv", thresh2)
     
     # Method 3: High Contrast + Binary
-    high_contrast = cv2.convertScaleAbs(gray, alpha=2.0, beta=-50)
-    _, thresh3 = cv2.threshold(high_contrast, 127, 255, cv2.THRESH_BINARY_INV)
+    thresh3 = pg.threshold(pg.contrast(gray, 2.0, -50), 127, True)
     save_debug(f"{region_name}_method3_highcontrast", thresh3)
     
-    for i, thresh in enumerate([thresh1, thresh2, thresh3], 1):
-        # ขยาย 3x เพื่อให้ Tesseract อ่านตัวเลขได้ชัดขึ้น
-        scaled = cv2.resize(thresh, (0, 0), fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
-        
-        # ลอง PSM 7 (single line) และ PSM 8 (single word)
-        for psm in [7, 8, 13]:
-            try:
-                config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist=0123456789'
-                text = pytesseract.image_to_string(scaled, config=config).strip()
-                digits = re.sub(r'\D', '', text)
-                if digits:
-                    results.append((digits, f"m{i}_psm{psm}"))
-                    print(f"    📖 {region_name} method{i} psm{psm}: '{text}' -> digits: '{digits}'")
-            except:
-                pass
-    
-    return results
+    # ขยาย 3x เพื่อให้ Tesseract อ่านตัวเลขได้ชัดขึ้น
+    # ลอง PSM 7 (single line), PSM 8 (single word) และ PSM 13 (raw line)
+    try:
+        return _ocr_digit_combos(region_name, [thresh1, thresh2, thresh3], [7, 8, 13], accept=accept)
+    finally:
+        pg.release(img)
 
 
 def extract_serial_from_region(img, region_name="serial"):
     """
     อ่านค่า S/N จากบริเวณตัวเลขดำบนพื้นขาว/เงิน (ส่วนล่างของมิเตอร์)
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img.copy()
-    
-    results = []
+    gray = pg.gray(img)
     
     # Method 1: CLAHE + Otsu (standard)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
-    _, thresh1 = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    enhanced = pg.clahe(gray, 2.0, 8)
+    thresh1 = pg.otsu(enhanced)
     save_debug(f"{region_name}_method1_otsu", thresh1)
     
     # Method 2: Adaptive Threshold
-    thresh2 = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY, 15, 8)
+    thresh2 = pg.adaptive(gray, 15, 8)
     save_debug(f"{region_name}_method2_adaptive", thresh2)
     
     # Method 3: Sharpen + Binary
-    kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-    sharpened = cv2.filter2D(enhanced, -1, kernel)
-    _, thresh3 = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    thresh3 = pg.otsu(pg.sharpen(enhanced))
     save_debug(f"{region_name}_method3_sharpen", thresh3)
     
-    for i, thresh in enumerate([thresh1, thresh2, thresh3], 1):
-        scaled = cv2.resize(thresh, (0, 0), fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
-        
-        for psm in [7, 8, 6]:
-            try:
-                config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist=0123456789'
-                text = pytesseract.image_to_string(scaled, config=config).strip()
-                digits = re.sub(r'\D', '', text)
-                if digits:
-                    results.append((digits, f"m{i}_psm{psm}"))
-                    print(f"    📖 {region_name} method{i} psm{psm}: '{text}' -> digits: '{digits}'")
-            except:
-                pass
-    
-    return results
+    try:
+        return _ocr_digit_combos(region_name, [thresh1, thresh2, thresh3], [7, 8, 6], accept=is_serial_shape)
+    finally:
+        pg.release(img)
 
 
-def find_anchor_and_extract(img, gray_scan, data, anchor_words, offset_rect, 
-                            extract_func, region_name):
-    """ใช้ anchor word เพื่อหาตำแหน่ง ROI แล้วดึงข้อมูลจาก ROI นั้น"""
+def find_anchor_and_extract(img, data, anchor_words, offset_rect, 
+                            extract_func, region_name, roi_out=None):
+    """
+    ใช้ anchor word เพื่อหาตำแหน่ง ROI แล้วดึงข้อมูลจาก ROI นั้น
+    roi_out (dict): ถ้าอ่านได้ เก็บ (x, y, w, h) ของ ROI ที่ใช้ไว้ที่ roi_out[region_name]
+    """
     h, w = img.shape[:2]
     
     for i in range(len(data['text'])):
@@ -185,7 +369,7 @@ def find_anchor_and_extract(img, gray_scan, data, anchor_words, offset_rect,
             box_w = data['width'][i]
             box_h = data['height'][i]
             
-            print(f"  🎯 Found anchor '{text}' at ({x},{y}) size ({box_w}x{box_h})")
+            logger.debug("anchor text=%s x=%d y=%d w=%d h=%d", text, x, y, box_w, box_h)
             
             # คำนวณ ROI
             roi_x = max(0, x + int(offset_rect[0] * box_w))
@@ -203,6 +387,8 @@ def find_anchor_and_extract(img, gray_scan, data, anchor_words, offset_rect,
             save_debug(f"{region_name}_roi_crop", crop)
             results = extract_func(crop, region_name)
             if results:
+                if roi_out is not None:
+                    roi_out[region_name] = (roi_x, roi_y, roi_w, roi_h)
                 return results
     
     return []
@@ -245,41 +431,54 @@ def extract_numbers(text):
     return re.findall(r'\d{4,8}', temp_text)
 
 
-def select_best_reading(candidates, blacklist, current_year=2026):
-    """เลือก reading ที่ดีที่สุดจากหลาย candidates"""
+def _agreement_counts(candidates):
+    """digits -> จำนวน method (threshold) ที่อ่านได้ค่านั้น"""
+    methods = {}
+    for c in candidates:
+        methods.setdefault(c.digits, set()).add(_method_family(c.method))
+    return {digits: len(m) for digits, m in methods.items()}
+
+
+def select_best_reading(candidates, blacklist, current_year=2026, prior=None):
+    """
+    เลือก reading ที่ดีที่สุดจากหลาย candidates (ความยาว + จำนวน method ที่ตรงกัน + confidence)
+    ถ้ามี prior (ประวัติของมิเตอร์): รับเฉพาะค่าที่เป็นไปได้ตามประวัติ (ไม่ต้องผ่าน blacklist / กรองปี)
+    และให้คะแนนเพิ่มตามความใกล้กับค่าล่าสุด
+    """
+    agreement = _agreement_counts(candidates)
     scored = []
-    for digits, method in candidates:
-        # ค่าหน่วยไฟมัก 4-5 หลัก
-        if len(digits) < 3 or len(digits) > 6:
-            continue
-        if digits in blacklist:
-            continue
-        # กรองปี
-        try:
-            if 2010 <= int(digits) <= current_year + 1:
+    for digits, method, conf, _ in candidates:
+        if prior is not None:
+            if not prior.plausible(digits):
                 continue
-        except ValueError:
+        # ค่าหน่วยไฟมัก 3-6 หลัก, กรอง blacklist และปี
+        elif not is_reading_shape(digits, blacklist, current_year):
             continue
         
         # คะแนน: ความยาว 4-5 ได้คะแนนสูง
         score = 10
         if 4 <= len(digits) <= 5:
             score += 5
+        if prior is not None:
+            score += 10 * prior.closeness(digits)
+        score += 3 * (agreement[digits] - 1)
+        score += conf / 20.0
         scored.append((score, digits, method))
     
     scored.sort(reverse=True)
     if scored:
-        print(f"  ✅ Best reading: {scored[0][1]} (score: {scored[0][0]}, method: {scored[0][2]})")
+        logger.debug("best_reading digits=%s score=%.1f method=%s", scored[0][1], scored[0][0], scored[0][2])
         return scored[0][1]
     return None
 
 
 def select_best_serial(candidates):
-    """เลือก serial ที่ดีที่สุดจากหลาย candidates"""
+    """เลือก serial ที่ดีที่สุดจากหลาย candidates (ความยาว + จำนวน method ที่ตรงกัน + confidence)"""
+    agreement = _agreement_counts(candidates)
     scored = []
-    for digits, method in candidates:
+    for digits, method, conf, _ in candidates:
         # S/N มัก 7 หลัก
-        if len(digits) < 5 or len(digits) > 10:
+        if not is_serial_shape(digits):
             continue
         
         score = 10
@@ -287,42 +486,43 @@ def select_best_serial(candidates):
             score += 10  # ตรง 7 หลัก = คะแนนสูงสุด
         elif 6 <= len(digits) <= 8:
             score += 3
+        score += 3 * (agreement[digits] - 1)
+        score += conf / 20.0
         scored.append((score, digits, method))
     
     scored.sort(reverse=True)
     if scored:
-        print(f"  ✅ Best serial: {scored[0][1]} (score: {scored[0][0]}, method: {scored[0][2]})")
+        logger.debug("best_serial digits=%s score=%.1f method=%s", scored[0][1], scored[0][0], scored[0][2])
         return scored[0][1]
     return None
 
 
-def auto_correct_rotation(img):
-    """
-    ตรวจจับและแก้ไขการหมุนของภาพอัตโนมัติ
-    ลอง 4 มุม (0, 90, 180, 270) แล้วเลือกมุมที่ Tesseract อ่านข้อความได้มากที่สุด
-    """
-    best_angle = 0
+_ROTATE_CCW = {
+    90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_CLOCKWISE,
+}
+
+
+def rotate_ccw(img, angle):
+    """หมุนภาพทวนเข็มนาฬิกา angle องศา (0/90/180/270)"""
+    return cv2.rotate(img, _ROTATE_CCW[angle]) if angle in _ROTATE_CCW else img
+
+
+def _sweep_rotation(small, angles):
+    """Brute force: OCR ทุกมุมที่ให้มา เลือกมุมที่ Tesseract อ่านคำ (conf > 30) ได้มากที่สุด"""
+    best_angle = angles[0]
     best_score = 0
     
-    # ลดขนาดภาพเพื่อทดสอบเร็วขึ้น
-    h, w = img.shape[:2]
-    scale = min(1.0, 800.0 / max(h, w))
-    small = cv2.resize(img, (int(w * scale), int(h * scale)))
-    
-    rotations = {
-        0: small,
-        90: cv2.rotate(small, cv2.ROTATE_90_COUNTERCLOCKWISE),
-        180: cv2.rotate(small, cv2.ROTATE_180),
-        270: cv2.rotate(small, cv2.ROTATE_90_CLOCKWISE),
-    }
-    
-    for angle, rotated in rotations.items():
-        gray = cv2.cvtColor(rotated, cv2.COLOR_BGR2GRAY)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
+    for angle in angles:
+        # มุม 0 ใช้ gray ของ small ตัวเดียวกับที่ OSD / projection ใช้ (hit ใน graph)
+        rotated = rotate_ccw(small, angle)
+        enhanced = pg.clahe(pg.gray(rotated), 2.0, 8)
+        if rotated is not small:
+            pg.release(rotated)
         
         try:
-            data = pytesseract.image_to_data(enhanced, output_type=pytesseract.Output.DICT)
+            data = ocr_engine.image_to_data(enhanced)
             words = []
             for j in range(len(data['text'])):
                 txt = str(data['text'][j]).strip()
@@ -331,139 +531,303 @@ def auto_correct_rotation(img):
                     words.append(txt)
             
             score = len(words)
-            text_preview = " ".join(words[:10])
-            print(f"  🔄 {angle}°: {score} words -> '{text_preview}'")
+            logger.debug("rotation_test angle=%d words=%d preview=%r", angle, score, words[:10])
             
             if score > best_score:
                 best_score = score
                 best_angle = angle
         except Exception as e:
-            print(f"  ⚠️ Rotation test {angle}° error: {e}")
+            logger.warning("rotation_test_error angle=%d error=%s", angle, e)
     
-    print(f"  ✅ Best rotation: {best_angle}° ({best_score} words)")
+    logger.debug("rotation_sweep best_angle=%d words=%d", best_angle, best_score)
+    return best_angle
+
+
+def _projection_axis(gray):
+    """
+    Heuristic ราคาถูก: แถวข้อความแนวนอนทำให้ projection รายแถวแกว่งแรงกว่ารายคอลัมน์
+    คืน 'horizontal' (0/180), 'vertical' (90/270) หรือ None ถ้าไม่ชัดเจน
+    """
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    rows = binary.mean(axis=1)
+    cols = binary.mean(axis=0)
+    # วัดความแกว่งจากผลต่างของ profile ติดกัน (ไม่ขึ้นกับขนาดภาพ)
+    row_var = float(np.abs(np.diff(rows)).mean()) if rows.size > 1 else 0.0
+    col_var = float(np.abs(np.diff(cols)).mean()) if cols.size > 1 else 0.0
+    if min(row_var, col_var) <= 0:
+        return None
+    ratio = row_var / col_var
+    if ratio >= Config.OCR_PROJECTION_RATIO:
+        return "horizontal"
+    if ratio <= 1.0 / Config.OCR_PROJECTION_RATIO:
+        return "vertical"
+    return None
+
+
+def detect_orientation(img, exif_orientation=None):
+    """
+    ตรวจทิศทางภาพแบบเป็นขั้น คืน (angle ทวนเข็มนาฬิกาที่ต้องหมุน, tier ที่ตัดสิน)
+    1. exif        - กล้องบันทึกการหมุนไว้และถูกใช้ตอน decode แล้ว
+    2. osd         - Tesseract OSD (--psm 0) ครั้งเดียว ถ้า confidence พอ
+    3. projection  - projection profile บอกแนวแถวข้อความ -> sweep แค่ 2 มุม
+    4. sweep       - ลองครบ 4 มุม (แบบเดิม)
+    """
+    if exif_orientation and exif_orientation != 1:
+        logger.debug("orientation_exif value=%d", exif_orientation)
+        return 0, "exif"
+    
+    # ลดขนาดภาพเพื่อทดสอบเร็วขึ้น
+    h, w = img.shape[:2]
+    scale = min(1.0, 800.0 / max(h, w))
+    small = cv2.resize(img, (int(w * scale), int(h * scale)))
+    try:
+        return _detect_orientation_small(small)
+    finally:
+        pg.release(small)
+
+
+def _detect_orientation_small(small):
+    gray_small = pg.gray(small)
+    
+    try:
+        osd = ocr_engine.detect_orientation(gray_small)
+    except Exception as e:
+        logger.warning("osd_error error=%s", e)
+        osd = None
+    if osd is not None:
+        rotate_cw, conf = osd
+        logger.debug("osd rotate_cw=%d conf=%.2f", rotate_cw, conf)
+        if conf >= Config.OCR_OSD_MIN_CONF:
+            return (360 - rotate_cw) % 360, "osd"
+    
+    axis = _projection_axis(gray_small)
+    if axis is not None:
+        logger.debug("projection_profile axis=%s", axis)
+        angles = [0, 180] if axis == "horizontal" else [90, 270]
+        return _sweep_rotation(small, angles), "projection"
+    
+    return _sweep_rotation(small, [0, 90, 180, 270]), "sweep"
+
+
+def auto_correct_rotation(img, exif_orientation=None):
+    """
+    ตรวจจับและแก้ไขการหมุนของภาพอัตโนมัติ
+    คืน (ภาพที่หมุนแล้ว, angle, tier) ดู detect_orientation
+    """
+    angle, tier = detect_orientation(img, exif_orientation)
+    logger.debug("rotation angle=%d tier=%s", angle, tier)
     
     # หมุนภาพต้นฉบับ (ขนาดเต็ม)
-    if best_angle == 90:
-        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
-    elif best_angle == 180:
-        return cv2.rotate(img, cv2.ROTATE_180)
-    elif best_angle == 270:
-        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
-    return img
+    return rotate_ccw(img, angle), angle, tier
+
+
+def read_text(image_path: str, serial_matcher=None, reading_prior=None, layout_hint=None) -> dict:
+    """
+    OCR จากไฟล์ภาพ (job worker / bench)
+    serial_matcher: callable(candidates) -> {"serial", "distance", "ocr", "confident"} | None
+    (เช่น serial_index.matcher()) ใช้ snap S/N ที่อ่านได้เข้ากับมิเตอร์ที่ลงทะเบียนไว้
+    reading_prior: callable(serial) -> ReadingPrior | None (เช่น reading_prior.loader())
+    เมื่อรู้ serial แล้ว ใช้ประวัติของมิเตอร์กรอง reading และหยุดทันทีที่เจอค่าที่เป็นไปได้
+    layout_hint: serial ของมิเตอร์ที่ client บอกมา ใช้หา layout ที่เคยเห็นของมิเตอร์นั้น (ข้าม Step 1)
+    """
+    return _read(lambda: image_io.load_image(image_path), image_path, serial_matcher, reading_prior, layout_hint)
+
+
+def read_bytes(data: bytes, serial_matcher=None, reading_prior=None, source=None, layout_hint=None) -> dict:
+    """OCR จาก bytes ของไฟล์ภาพใน memory (upload) - ไม่ต้องเขียนลง disk แล้วอ่านกลับ"""
+    return _read(lambda: image_io.decode_image(data), source or "<memory>",
+                 serial_matcher, reading_prior, layout_hint)
+
+
+def read_image(img, exif_orientation=None, serial_matcher=None, reading_prior=None, source=None,
+               layout_hint=None) -> dict:
+    """
+    OCR จากภาพ BGR (ndarray) ที่ decode และใช้ EXIF orientation แล้ว
+    exif_orientation ใช้เป็น hint ของการตรวจการหมุนเท่านั้น
+    """
+    return _read(lambda: (image_io.fit_max_side(img, Config.OCR_DECODE_MAX_SIDE), exif_orientation),
+                 source or "<array>", serial_matcher, reading_prior, layout_hint)
+
+
+def _read(load, source, serial_matcher, reading_prior, layout_hint=None):
+    with ocr_metrics.request_scope() as tesseract_calls, pg.scope() as graph:
+        final_result = _read_text(load, source, ocr_metrics.StageTimer(), serial_matcher, reading_prior,
+                                  layout_hint)
+        if graph is not None:
+            final_result["preprocess"] = graph.stats()
+    final_result["tesseract_calls"] = tesseract_calls[0]
+    for field in ("serial", "reading"):
+        ocr_metrics.FIELD_SOURCE.inc(field=field, step=final_result.get(f"{field}_step") or "none")
+    return final_result
+
+
+def _read_with_layout(img, layout, final_result, serial_matcher, reading_prior, blacklist, current_year):
+    """อ่าน serial / reading จาก ROI ของ layout ที่ cache ไว้ คืน (serial_done, reading_done, prior)"""
+    serial_done = reading_done = False
+    prior = None
+    serial_crop = layout_cache.crop(img, layout.rois["serial"])
+    if serial_crop is not None:
+        save_debug("layout_serial_crop", serial_crop)
+        serial_cands = extract_serial_from_region(serial_crop, "layout_serial")
+        if serial_cands:
+            serial_done = _choose_serial(final_result, serial_cands, "layout", serial_matcher)
+            prior = _load_prior(reading_prior, final_result['serial'])
+
+    reading_crop = layout_cache.crop(img, layout.rois["reading"])
+    if reading_crop is not None:
+        save_debug("layout_reading_crop", reading_crop)
+        accept = prior.plausible if prior is not None else is_reading_shape
+        reading_cands = extract_reading_from_region(reading_crop, "layout_reading", accept=accept)
+        if reading_cands:
+            reading_done = _choose_reading(final_result, reading_cands, "layout",
+                                           blacklist, current_year, prior)
+    return serial_done, reading_done, prior
 
 
-def read_text(image_path: str) -> dict:
-    print(f"\n{'='*60}")
-    print(f"🔹 OCR Engine v2.1 - Auto-Rotate + Multi-Strategy: {image_path}")
-    print(f"{'='*60}")
+def _read_text(load, source, timer, serial_matcher=None, reading_prior=None, layout_hint=None):
+    logger.info("ocr_start engine=%s path=%s", ENGINE_VERSION, source)
     
-    img = cv2.imread(image_path)
+    img, exif_orientation = load()
+    timer.mark("decode")
     if img is None: 
-        print("❌ Failed to read image!")
+        logger.error("decode_failed path=%s", source)
         return {"text": "", "serial": None, "reading": None}
     
     h, w = img.shape[:2]
-    print(f"📐 Original image size: {w}x{h}")
+    ocr_metrics.IMAGE_PIXELS.observe(w, axis="width")
+    ocr_metrics.IMAGE_PIXELS.observe(h, axis="height")
+    logger.debug("image_size width=%d height=%d", w, h)
     
     # ============================================================
     # STEP 0: Auto-Rotation Detection
     # ============================================================
-    print("\n--- Step 0: Auto-Rotation Detection ---")
-    img = auto_correct_rotation(img)
+    img, rotation_angle, rotation_tier = auto_correct_rotation(img, exif_orientation)
+    ocr_metrics.ROTATION_TIER.inc(tier=rotation_tier)
+    timer.mark("rotation")
+    # ย่อ working image เพิ่มถ้า working set เกิน memory budget
+    img, det_scale, working_set = image_io.fit_memory_budget(img)
+    ocr_metrics.WORKING_SET_BYTES.observe(working_set)
     h, w = img.shape[:2]
-    print(f"📐 After rotation: {w}x{h}")
     save_debug("00_original", img)
     
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     
-    # ============================================================
-    # STEP 1: Global Text Detection - ลอง preprocessor หลายตัว
-    # ============================================================
-    print("\n--- Step 1: Global Text Detection ---")
+    final_result = {"serial": None, "reading": None, "text": "",
+                    "rotation_angle": rotation_angle, "rotation_tier": rotation_tier,
+                    "serial_ocr": None, "serial_match_distance": None, "reading_plausible": None,
+                    "layout": None}
+    serial_done = reading_done = False
+    prior = None
+    for field in ("serial", "reading"):
+        final_result.update({f"{field}_method": None, f"{field}_agreement": 0,
+                             f"{field}_confidence": None, f"{field}_step": None})
     
-    # ขยาย 2x เพื่อให้ Tesseract หาข้อความได้ง่ายขึ้น
-    gray_2x = cv2.resize(gray, (w * 2, h * 2), interpolation=cv2.INTER_CUBIC)
-    
-    best_text, best_data = run_tesseract_multi(gray_2x, psm=6)
-    
-    # ถ้า PSM 6 ไม่ได้ผล ลอง PSM 3
-    if len(best_text.split()) < 5:
-        print("  🔄 Retrying with PSM 3...")
-        text2, data2 = run_tesseract_multi(gray_2x, psm=3)
-        if len(text2) > len(best_text):
-            best_text = text2
-            best_data = data2
-    
-    detected_words = best_text.split()
-    print(f"🔍 All detected words: {detected_words}")
-    
-    # ปรับพิกัดกลับ (เพราะขยาย 2x)
-    if best_data:
-        for key in ['left', 'top', 'width', 'height']:
-            best_data[key] = [int(v / 2) for v in best_data[key]]
+    blacklist = READING_BLACKLIST
+    current_year = CURRENT_YEAR
     
-    final_result = {"serial": None, "reading": None, "text": best_text}
+    # ============================================================
+    # STEP 0.5: Layout Cache - มิเตอร์/รุ่นที่เคยเห็น ตัด ROI ตามตำแหน่งเดิมได้เลย (ข้าม Step 1)
+    # ============================================================
+    layout_desc = layout_cache.descriptor(gray) if Config.LAYOUT_CACHE_ENABLED else None
+    cached_layout = layout_cache.lookup(*layout_desc, serial_hint=layout_hint) if layout_desc else None
+    if cached_layout is not None:
+        layout, layout_source, layout_score = cached_layout
+        serial_done, reading_done, prior = _read_with_layout(
+            img, layout, final_result, serial_matcher, reading_prior, blacklist, current_year)
+        layout_used = serial_done and reading_done
+        layout_cache.record_outcome(layout, layout_used)
+        final_result["layout"] = {"template_id": layout.id, "source": layout_source,
+                                  "score": round(layout_score, 3), "used": layout_used}
+        logger.debug("layout_cache source=%s score=%.3f used=%s", layout_source, layout_score, layout_used)
+        timer.mark("layout")
     
-    blacklist = ['1000', '2000', '1200', '220', '240', '50', '60']
-    current_year = 2026
+    # ============================================================
+    # STEP 1: Global Text Detection - ลอง preprocessor หลายตัว
+    # ============================================================
+    best_data = None
+    gray_det = None
+    if not reading_done or not serial_done:
+        # ขยายได้ถึง 2x เพื่อให้ Tesseract หาข้อความได้ง่ายขึ้น แต่ด้านยาวไม่เกิน OCR_DETECT_MAX_SIDE
+        # (ภาพใหญ่อยู่แล้วจะถูกย่อแทน) - ROI ที่ส่งไปอ่านตัวเลขตัดจาก img แล้วค่อยขยายเฉพาะ crop
+        interpolation = cv2.INTER_CUBIC if det_scale > 1 else cv2.INTER_AREA
+        gray_det = cv2.resize(gray, (max(1, int(w * det_scale)), max(1, int(h * det_scale))),
+                              interpolation=interpolation)
+        logger.debug("resolution work=%dx%d det_scale=%.2f working_set_mb=%.1f",
+                     w, h, det_scale, working_set / 1e6)
+    
+        best_text, best_data = run_tesseract_multi(gray_det, psm=6)
+    
+        # ถ้า PSM 6 ไม่ได้ผล ลอง PSM 3
+        if len(best_text.split()) < 5:
+            logger.debug("step1_retry psm=3")
+            text2, data2 = run_tesseract_multi(gray_det, psm=3)
+            if len(text2) > len(best_text):
+                best_text = text2
+                best_data = data2
+    
+        logger.debug("step1_words words=%s", best_text.split())
+        final_result["text"] = best_text
+    
+        # ปรับพิกัดกลับเป็นพิกัดของ img
+        if best_data:
+            for key in ['left', 'top', 'width', 'height']:
+                best_data[key] = [int(v / det_scale) for v in best_data[key]]
+        timer.mark("step1_global")
     
     # ============================================================
     # STEP 2: Anchor-based ROI Extraction
     # ============================================================
-    print("\n--- Step 2: Anchor-based ROI Extraction ---")
-    
     if best_data:
         # A. Reading: ค้นจากคำว่า kWh, WATT (ตัวเลขอยู่ทางซ้ายและด้านล่าง)
-        reading_cands = find_anchor_and_extract(
-            img, gray_2x, best_data,
-            ["KWH", "KW", "WATT", "HOUR"],
-            [-8.0, -1.0, 9.0, 6.0],  # ดูทางซ้ายกว้างๆ ลงด้านล่าง
-            extract_reading_from_region,
-            "reading_anchor"
-        )
-        if reading_cands:
-            result = select_best_reading(reading_cands, blacklist, current_year)
-            if result:
-                final_result['reading'] = result
-
         # B. Serial: ค้นจากคำว่า No., NO, S/N (ตัวเลขอยู่ทางขวา)
-        serial_cands = find_anchor_and_extract(
-            img, gray_2x, best_data,
-            ["NO.", "NO", "S/N", "SN"],
-            [0.5, -0.5, 10.0, 3.0],  # ดูทางขวากว้างๆ
-            extract_serial_from_region,
-            "serial_anchor"
+        # สอง branch เป็นอิสระต่อกัน -> parallel mode จะรันพร้อมกัน (field ที่ได้จาก layout แล้วไม่ต้องหา)
+        anchor_rois = {}
+        reading_cands, serial_cands = ocr_parallel.run_branches(
+            lambda: [] if reading_done else find_anchor_and_extract(
+                img, best_data,
+                ["KWH", "KW", "WATT", "HOUR"],
+                [-8.0, -1.0, 9.0, 6.0],  # ดูทางซ้ายกว้างๆ ลงด้านล่าง
+                extract_reading_from_region,
+                "reading_anchor", roi_out=anchor_rois
+            ),
+            lambda: [] if serial_done else find_anchor_and_extract(
+                img, best_data,
+                ["NO.", "NO", "S/N", "SN"],
+                [0.5, -0.5, 10.0, 3.0],  # ดูทางขวากว้างๆ
+                extract_serial_from_region,
+                "serial_anchor", roi_out=anchor_rois
+            ),
         )
+        # serial ก่อน เพื่อใช้ประวัติของมิเตอร์ตอนเลือก reading
         if serial_cands:
-            result = select_best_serial(serial_cands)
-            if result:
-                final_result['serial'] = result
+            serial_done = _choose_serial(final_result, serial_cands, "step2_anchor", serial_matcher)
+            prior = _load_prior(reading_prior, final_result['serial'])
+    
+        if reading_cands:
+            reading_done = _choose_reading(final_result, reading_cands, "step2_anchor",
+                                           blacklist, current_year, prior)
+    
+        # anchor ได้ทั้งสองค่า -> จำตำแหน่ง ROI ไว้ใช้กับภาพถัดไปของมิเตอร์/รุ่นเดียวกัน
+        if (layout_desc and serial_done and reading_done
+                and final_result["serial_step"] == final_result["reading_step"] == "step2_anchor"
+                and "reading_anchor" in anchor_rois and "serial_anchor" in anchor_rois):
+            layout_cache.learn(*layout_desc, final_result["serial"], {
+                "reading": layout_cache.normalize_roi(anchor_rois["reading_anchor"], w, h),
+                "serial": layout_cache.normalize_roi(anchor_rois["serial_anchor"], w, h),
+            })
+        timer.mark("step2_anchor")
 
     # ============================================================
     # STEP 3: Region-based Scanning (ถ้า anchor ไม่เจอ)
     # ============================================================
-    if not final_result['reading'] or not final_result['serial']:
-        print("\n--- Step 3: Region-based Scanning ---")
-        
+    if not reading_done or not serial_done:
         # แบ่งภาพเป็นส่วนๆ ตามตำแหน่งที่คาดว่าจะมีข้อมูล
         # ส่วนบน (20-50% จากบน): มักเป็นค่าหน่วยไฟ (เลขขาวบนดำ)
         # ส่วนล่าง (50-80% จากบน): มักเป็น S/N (เลขดำบนขาว/เงิน)
+        # ทำ serial ก่อน เพื่อให้มี prior ตอนสแกน reading
         
-        if not final_result['reading']:
-            print("  🔎 Scanning UPPER region for reading...")
-            upper_y1 = int(h * 0.10)
-            upper_y2 = int(h * 0.50)
-            upper_region = img[upper_y1:upper_y2, :]
-            save_debug("region_upper", upper_region)
-            
-            reading_cands = extract_reading_from_region(upper_region, "region_reading")
-            if reading_cands:
-                result = select_best_reading(reading_cands, blacklist, current_year)
-                if result:
-                    final_result['reading'] = result
-        
-        if not final_result['serial']:
-            print("  🔎 Scanning LOWER region for serial...")
+        if not serial_done:
+            logger.debug("step3_scan region=lower")
             lower_y1 = int(h * 0.40)
             lower_y2 = int(h * 0.75)
             lower_region = img[lower_y1:lower_y2, :]
@@ -471,48 +835,73 @@ def read_text(image_path: str) -> dict:
             
             serial_cands = extract_serial_from_region(lower_region, "region_serial")
             if serial_cands:
-                result = select_best_serial(serial_cands)
-                if result:
-                    final_result['serial'] = result
+                serial_done = _choose_serial(final_result, serial_cands, "step3_region", serial_matcher)
+                if prior is None:
+                    prior = _load_prior(reading_prior, final_result['serial'])
+        
+        if not reading_done:
+            logger.debug("step3_scan region=upper")
+            upper_y1 = int(h * 0.10)
+            upper_y2 = int(h * 0.50)
+            upper_region = img[upper_y1:upper_y2, :]
+            save_debug("region_upper", upper_region)
+            
+            # มี prior -> หยุด OCR combos ทันทีที่ค่าที่เป็นไปได้ได้ consensus
+            accept = prior.plausible if prior is not None else is_reading_shape
+            reading_cands = extract_reading_from_region(upper_region, "region_reading", accept=accept)
+            if reading_cands:
+                reading_done = _choose_reading(final_result, reading_cands, "step3_region",
+                                               blacklist, current_year, prior)
+        timer.mark("step3_region")
 
     # ============================================================
     # STEP 4: Full-image Fallback
     # ============================================================
-    if not final_result['reading'] or not final_result['serial']:
-        print("\n--- Step 4: Full-image Fallback ---")
-        
-        # ลอง OCR ทั้งภาพด้วยหลายวิธี
-        preprocessed_list = preprocess_for_text_detection(gray)
+    # variants ของ gray_det (จาก Step 1) ใช้อีกครั้งเฉพาะใน Step 4
+    if reading_done and serial_done:
+        pg.release(gray_det)
+    else:
+        # ลอง OCR ทั้งภาพด้วยหลายวิธี (ใช้ภาพขนาด detection และ variants เดิมจาก Step 1)
+        preprocessed_list = preprocess_for_text_detection(gray_det)
         
         all_nums = []
-        for name, processed in preprocessed_list:
-            try:
-                scaled = cv2.resize(processed, (0, 0), fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-                raw_text = pytesseract.image_to_string(scaled, config='--oem 3 --psm 6')
-                print(f"  📄 Fallback {name}: '{raw_text[:100]}...'")
-                cleaned = advanced_fix_digits(raw_text)
-                cleaned = clean_ocr_text(cleaned)
-                nums = extract_numbers(cleaned)
-                for n in nums:
-                    all_nums.append((n, f"fallback_{name}"))
-            except Exception as e:
-                print(f"  ⚠️ Fallback {name} error: {e}")
+        calls = (("string", processed, '--oem 3 --psm 6') for _, processed in preprocessed_list)
+        for (name, _), outcome in zip(preprocessed_list, ocr_parallel.imap(calls)):
+            if isinstance(outcome, Exception):
+                logger.warning("fallback_error strategy=%s error=%s", name, outcome)
+                continue
+            raw_text = outcome
+            logger.debug("fallback strategy=%s text=%r", name, raw_text[:100])
+            cleaned = advanced_fix_digits(raw_text)
+            cleaned = clean_ocr_text(cleaned)
+            nums = extract_numbers(cleaned)
+            for n in nums:
+                all_nums.append(Candidate(n, f"fallback_{name}", 0.0, ()))
         
-        if not final_result['serial']:
-            serial_cands = [(n, m) for n, m in all_nums if 6 <= len(n) <= 8]
+        if not serial_done:
+            serial_cands = [c for c in all_nums if 6 <= len(c.digits) <= 8]
             if serial_cands:
-                result = select_best_serial(serial_cands)
-                if result:
-                    final_result['serial'] = result
+                serial_done = _choose_serial(final_result, serial_cands, "step4_fallback", serial_matcher)
+                if prior is None:
+                    prior = _load_prior(reading_prior, final_result['serial'])
         
-        if not final_result['reading']:
-            reading_cands = [(n, m) for n, m in all_nums if 3 <= len(n) <= 6]
+        if not reading_done:
+            reading_cands = [c for c in all_nums if 3 <= len(c.digits) <= 6]
             if reading_cands:
-                result = select_best_reading(reading_cands, blacklist, current_year)
-                if result:
-                    final_result['reading'] = result
+                reading_done = _choose_reading(final_result, reading_cands, "step4_fallback",
+                                               blacklist, current_year, prior)
+        timer.mark("step4_fallback")
 
-    print(f"\n{'='*60}")
-    print(f"✅ FINAL RESULT -> S/N: {final_result['serial']}, Reading: {final_result['reading']}")
-    print(f"{'='*60}\n")
+    final_result["timings"] = {k: round(v, 4) for k, v in timer.stages.items()}
+    final_result["timings"]["total"] = round(timer.total(), 4)
+    rss, peak = ocr_metrics.current_rss_bytes(), ocr_metrics.peak_rss_bytes()
+    final_result["memory"] = {
+        "working_set_mb": round(working_set / 1e6, 1),
+        "rss_mb": round(rss / 1e6, 1) if rss is not None else None,
+        "peak_rss_mb": round(peak / 1e6, 1) if peak is not None else None,
+    }
+    logger.info("ocr_done serial=%s reading=%s serial_step=%s reading_step=%s total_s=%.3f",
+                final_result['serial'], final_result['reading'],
+                final_result.get('serial_step'), final_result.get('reading_step'),
+                final_result["timings"]["total"])
     return final_result
@@ -0,0 +1,163 @@
+"""
+OCR Trace Mode (แทน save_debug ที่เขียนไฟล์ทุก request)
+- ปิดเป็นค่าเริ่มต้น: ถ้า request ไม่ได้เปิด trace, save_debug คืนทันที (ไม่มี encode / disk I/O)
+- เปิดได้ต่อ request (admin ส่ง header X-OCR-Trace: 1 หรือ ?trace=1) หรือสุ่มตาม OCR_TRACE_SAMPLE_RATE
+- ภาพกลางทางเก็บใน memory ระหว่าง request แล้วให้ background writer เขียนลง <OCR_TRACE_DIR>/<trace_id>/
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("ocr_trace", default=None)
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+TRACE_ID_CHARS = set("0123456789abcdefghijklmnopqrstuvwxyz-")
+
+
+class Trace:
+    def __init__(self, trace_id, source=None):
+        self.id = trace_id
+        self.source = source
+        self.created_at = datetime.utcnow()
+        self.images = []  # [(name, ndarray)]
+        self.result = None
+        self._lock = threading.Lock()
+
+    def add(self, name, img):
+        with self._lock:
+            self.images.append((name, img))
+
+
+def new_trace_id():
+    return f"{datetime.utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def is_valid_trace_id(trace_id):
+    return bool(trace_id) and set(trace_id) <= TRACE_ID_CHARS
+
+
+def sampled():
+    rate = Config.OCR_TRACE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def requested(req, role):
+    """admin ขอ trace ผ่าน header / query flag หรือถูกสุ่มตาม sample rate"""
+    if role == "admin":
+        if req.headers.get("X-OCR-Trace", "").lower() in ("1", "true", "yes"):
+            return True
+        if req.args.get("trace", "").lower() in ("1", "true", "yes"):
+            return True
+    return sampled()
+
+
+def current():
+    return _current.get()
+
+
+def save(name, img):
+    """เก็บภาพกลางทางเข้า trace ของ request ปัจจุบัน (ถ้าไม่ได้ trace -> ไม่ทำอะไรเลย)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, img)
+
+
+@contextmanager
+def capture(enabled, source=None):
+    """ครอบการเรียก OCR; yield Trace (หรือ None ถ้าไม่ได้เปิด) แล้วส่งให้ writer ตอนจบ"""
+    if not enabled:
+        yield None
+        return
+
+    trace = Trace(new_trace_id(), source)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        _ensure_writer()
+        _queue.put(trace)
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, name="ocr-trace-writer", daemon=True)
+            _writer.start()
+
+
+def _write(trace):
+    import cv2
+
+    trace_dir = os.path.join(Config.OCR_TRACE_DIR, trace.id)
+    os.makedirs(trace_dir, exist_ok=True)
+    files = []
+    for seq, (name, img) in enumerate(trace.images):
+        filename = f"{seq:02d}_{name}.jpg"
+        cv2.imwrite(os.path.join(trace_dir, filename), img)
+        files.append(filename)
+
+    meta = {
+        "trace_id": trace.id,
+        "source": trace.source,
+        "created_at": trace.created_at.isoformat(),
+        "files": files,
+        "result": trace.result,
+    }
+    with open(os.path.join(trace_dir, "trace.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+
+
+def _prune():
+    """เก็บไว้แค่ OCR_TRACE_KEEP trace ล่าสุด"""
+    traces = list_traces()
+    for trace_id in traces[Config.OCR_TRACE_KEEP:]:
+        shutil.rmtree(os.path.join(Config.OCR_TRACE_DIR, trace_id), ignore_errors=True)
+
+
+def _writer_loop():
+    while True:
+        trace = _queue.get()
+        try:
+            _write(trace)
+            _prune()
+            logger.info("trace_saved trace_id=%s images=%d", trace.id, len(trace.images))
+        except Exception as e:
+            logger.error("trace_write_failed trace_id=%s error=%s", trace.id, e)
+
+
+def list_traces():
+    """trace id ทั้งหมด เรียงจากล่าสุด"""
+    if not os.path.isdir(Config.OCR_TRACE_DIR):
+        return []
+    names = [n for n in os.listdir(Config.OCR_TRACE_DIR)
+             if is_valid_trace_id(n) and os.path.isdir(os.path.join(Config.OCR_TRACE_DIR, n))]
+    return sorted(names, reverse=True)
+
+
+def load_trace(trace_id):
+    """meta ของ trace (จาก trace.json) หรือ None ถ้าไม่มี / ยังเขียนไม่เสร็จ"""
+    if not is_valid_trace_id(trace_id):
+        return None
+    path = os.path.join(Config.OCR_TRACE_DIR, trace_id, "trace.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
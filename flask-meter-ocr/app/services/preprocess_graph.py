@@ -0,0 +1,208 @@
+"""
+Preprocess Graph (memoize ภาพกลางทางของ OCR pipeline ภายใน request เดียว)
+- transform แต่ละแบบ (gray, clahe, otsu, adaptive, sharpen, resize, ...) คำนวณครั้งเดียวต่อ (op, params, ภาพ input)
+  เช่น 4 variant ของ gray_det ใช้ร่วมกันทั้ง Step 1 (psm 6 / psm 3) และ Step 4
+- key ของ input คือ id() ของ ndarray; graph ถือ reference ของ input ไว้ id จึงไม่ถูกใช้ซ้ำระหว่างที่ยัง cache อยู่
+- release(img) ทิ้ง node ที่สร้างจาก img (ต่อเนื่องทั้งสาย) เมื่อไม่มี stage ไหนใช้แล้ว; จบ request ทิ้งทั้งหมด
+- CLAHE object / kernel สร้างครั้งเดียวต่อ thread (CLAHE ของ OpenCV ใช้ข้าม thread พร้อมกันไม่ได้)
+- ไม่มี graph (เรียกนอก scope หรือปิด OCR_PREPROCESS_CACHE) -> คำนวณตรงๆ เหมือนเดิม
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from config import Config
+from app.services import ocr_metrics
+
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+
+CACHE_LOOKUPS = ocr_metrics.Counter(
+    "ocr_preprocess_cache_total", "Preprocess graph lookups", ["op", "result"])
+SAVED_SECONDS = ocr_metrics.Counter(
+    "ocr_preprocess_saved_seconds_total", "Preprocessing time avoided by preprocess graph hits")
+
+_current = contextvars.ContextVar("preprocess_graph", default=None)
+_local = threading.local()
+
+
+def clahe_for(clip, tile):
+    """CLAHE object ของ thread นี้ (สร้างครั้งแรกที่ใช้ แล้วใช้ซ้ำ)"""
+    cache = getattr(_local, "clahe", None)
+    if cache is None:
+        cache = _local.clahe = {}
+    obj = cache.get((clip, tile))
+    if obj is None:
+        obj = cache[(clip, tile)] = cv2.createCLAHE(clipLimit=clip, tileGridSize=(tile, tile))
+    return obj
+
+
+# ============================================================
+# transforms: fn(img, *params) -> ndarray
+# ============================================================
+def _gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+
+
+def _clahe(img, clip, tile):
+    return clahe_for(clip, tile).apply(img)
+
+
+def _invert(img):
+    return cv2.bitwise_not(img)
+
+
+def _otsu(img, inverse):
+    mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+    return cv2.threshold(img, 0, 255, mode + cv2.THRESH_OTSU)[1]
+
+
+def _threshold(img, value, inverse):
+    mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+    return cv2.threshold(img, value, 255, mode)[1]
+
+
+def _adaptive(img, block, c, inverse):
+    mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, mode, block, c)
+
+
+def _contrast(img, alpha, beta):
+    return cv2.convertScaleAbs(img, alpha=alpha, beta=beta)
+
+
+def _sharpen(img):
+    return cv2.filter2D(img, -1, SHARPEN_KERNEL)
+
+
+def _resize(img, scale, interpolation):
+    if scale == 1:
+        return img
+    return cv2.resize(img, (0, 0), fx=scale, fy=scale, interpolation=interpolation)
+
+
+OPS = {
+    "gray": _gray,
+    "clahe": _clahe,
+    "invert": _invert,
+    "otsu": _otsu,
+    "threshold": _threshold,
+    "adaptive": _adaptive,
+    "contrast": _contrast,
+    "sharpen": _sharpen,
+    "resize": _resize,
+}
+
+
+class PreprocessGraph:
+    def __init__(self):
+        self._nodes = {}  # (op, id(input), params) -> (input, output, compute seconds)
+        self._lock = threading.Lock()  # branch ของ Step 2 ใช้ graph เดียวกันจากหลาย thread
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def get(self, op, img, *params):
+        key = (op, id(img), params)
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is not None and node[0] is img:
+                self.hits += 1
+                self.saved_seconds += node[2]
+                CACHE_LOOKUPS.inc(op=op, result="hit")
+                SAVED_SECONDS.inc(node[2])
+                return node[1]
+
+        started = time.perf_counter()
+        out = OPS[op](img, *params)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._nodes[key] = (img, out, elapsed)
+            self.misses += 1
+        CACHE_LOOKUPS.inc(op=op, result="miss")
+        return out
+
+    def release(self, *images):
+        """ทิ้ง node ที่สร้างจาก images (รวม node ที่ต่อจากผลลัพธ์เหล่านั้น)"""
+        with self._lock:
+            dropped = {id(img) for img in images}
+            while dropped:
+                keys = [k for k in self._nodes if k[1] in dropped]
+                dropped = {id(self._nodes.pop(k)[1]) for k in keys}
+
+    def clear(self):
+        with self._lock:
+            self._nodes.clear()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "saved_ms": round(self.saved_seconds * 1000, 2)}
+
+
+@contextmanager
+def scope():
+    """graph ของ read_text หนึ่งครั้ง (None ถ้าปิดไว้)"""
+    graph = PreprocessGraph() if Config.OCR_PREPROCESS_CACHE else None
+    token = _current.set(graph)
+    try:
+        yield graph
+    finally:
+        _current.reset(token)
+        if graph is not None:
+            graph.clear()
+
+
+def apply(op, img, *params):
+    """ผลของ transform op บน img ผ่าน graph ของ request ปัจจุบัน (หรือคำนวณตรงๆ ถ้าไม่มี)"""
+    graph = _current.get()
+    if graph is None:
+        return OPS[op](img, *params)
+    return graph.get(op, img, *params)
+
+
+def release(*images):
+    graph = _current.get()
+    if graph is not None:
+        graph.release(*images)
+
+
+# shortcut ให้โค้ดใน pipeline อ่านง่าย
+def gray(img):
+    return apply("gray", img)
+
+
+def clahe(img, clip=2.0, tile=8):
+    return apply("clahe", img, clip, tile)
+
+
+def invert(img):
+    return apply("invert", img)
+
+
+def otsu(img, inverse=False):
+    return apply("otsu", img, inverse)
+
+
+def threshold(img, value, inverse=False):
+    return apply("threshold", img, value, inverse)
+
+
+def adaptive(img, block, c, inverse=False):
+    return apply("adaptive", img, block, c, inverse)
+
+
+def contrast(img, alpha, beta):
+    return apply("contrast", img, alpha, beta)
+
+
+def sharpen(img):
+    return apply("sharpen", img)
+
+
+def resize(img, scale, interpolation=cv2.INTER_AREA):
+    return apply("resize", img, scale, interpolation)
@@ -0,0 +1,124 @@
+"""
+Reading Prior (ใช้ประวัติของมิเตอร์ตัดสินว่าตัวเลขที่ OCR อ่านได้เป็นค่าหน่วยไฟที่เป็นไปได้ไหม)
+- ค่าหน่วยไฟเพิ่มขึ้นเสมอ (monotonic) และเพิ่มต่อวันได้ไม่เกินอัตราสูงสุดที่เคยเห็น x slack
+- โหลดค่าล่าสุด READING_PRIOR_HISTORY ค่าของมิเตอร์ด้วย query เดียว แล้ว cache ตาม serial (TTL)
+- save_reading / bulk เรียก invalidate(serial) ให้ process นี้เห็นค่าใหม่ทันที
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+
+_cache = OrderedDict()  # serial -> (loaded_at, ReadingPrior หรือ None)
+_lock = threading.Lock()
+_MISS = object()
+
+
+class ReadingPrior:
+    def __init__(self, last_value, last_at, max_daily_delta):
+        self.last_value = last_value
+        self.last_at = last_at
+        self.max_daily_delta = max_daily_delta
+
+    def expected_range(self, at=None):
+        """(ต่ำสุด, สูงสุด) ของค่าที่เป็นไปได้ ณ เวลา at"""
+        days = max(((at or datetime.utcnow()) - self.last_at).total_seconds() / 86400.0, 1 / 24)
+        low = math.floor(self.last_value)
+        high = self.last_value + self.max_daily_delta * days + Config.READING_PRIOR_TOLERANCE
+        return low, high
+
+    def plausible(self, digits, at=None):
+        if not digits or not digits.isdigit():
+            return False
+        low, high = self.expected_range(at)
+        return low <= int(digits) <= high
+
+    def closeness(self, digits, at=None):
+        """1.0 = เท่าค่าล่าสุด, 0.0 = ขอบบนของช่วงที่เป็นไปได้"""
+        low, high = self.expected_range(at)
+        return max(0.0, 1.0 - (int(digits) - low) / max(high - low, 1.0))
+
+    def to_dict(self):
+        low, high = self.expected_range()
+        return {"last_value": self.last_value, "last_at": self.last_at.isoformat(),
+                "max_daily_delta": round(self.max_daily_delta, 3), "expected_range": [low, round(high, 3)]}
+
+
+def _max_daily_delta(history):
+    """อัตราเพิ่มต่อวันสูงสุดจาก reading ติดกัน (history เรียงใหม่ -> เก่า)"""
+    rates = []
+    for (newer, newer_at), (older, older_at) in zip(history, history[1:]):
+        days = max((newer_at - older_at).total_seconds() / 86400.0, 1 / 24)
+        if newer >= older:
+            rates.append((newer - older) / days)
+    if not rates:
+        return Config.READING_PRIOR_DEFAULT_DAILY
+    return max(max(rates) * Config.READING_PRIOR_RATE_SLACK, Config.READING_PRIOR_MIN_DAILY)
+
+
+def _load(serial):
+    from app.models import db
+    from app.models.meter import Meter
+    from app.models.meter_reading import MeterReading
+
+    rows = (db.session.query(MeterReading.reading_value, MeterReading.created_at)
+            .join(Meter, MeterReading.meter_id == Meter.id)
+            .filter(Meter.serial_number == serial, MeterReading.reading_value.isnot(None))
+            .order_by(MeterReading.created_at.desc(), MeterReading.id.desc())
+            .limit(Config.READING_PRIOR_HISTORY)
+            .all())
+    if not rows:
+        return None
+    history = [(float(value), at) for value, at in rows]
+    return ReadingPrior(history[0][0], history[0][1], _max_daily_delta(history))
+
+
+def _cache_get(serial):
+    with _lock:
+        entry = _cache.get(serial)
+        if entry is None:
+            return _MISS
+        loaded_at, prior = entry
+        if time.monotonic() - loaded_at > Config.READING_PRIOR_TTL_SECONDS:
+            del _cache[serial]
+            return _MISS
+        _cache.move_to_end(serial)
+        return prior
+
+
+def _cache_put(serial, prior):
+    with _lock:
+        _cache[serial] = (time.monotonic(), prior)
+        _cache.move_to_end(serial)
+        while len(_cache) > Config.READING_PRIOR_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def invalidate(serial):
+    with _lock:
+        _cache.pop(serial, None)
+
+
+def loader():
+    """
+    callable(serial) -> ReadingPrior | None สำหรับ read_text(reading_prior=...)
+    จับ app ไว้ตอนสร้าง จึงเรียกจาก thread ที่ไม่มี app context (batch / parallel branch) ได้
+    """
+    if not Config.READING_PRIOR_ENABLED:
+        return None
+    from flask import current_app
+    app = current_app._get_current_object()
+
+    def load(serial):
+        prior = _cache_get(serial)
+        if prior is not _MISS:
+            return prior
+        with app.app_context():
+            prior = _load(serial)
+        _cache_put(serial, prior)
+        return prior
+
+    return load
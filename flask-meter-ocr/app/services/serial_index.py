@@ -0,0 +1,368 @@
+"""
+Serial Index (fuzzy match S/N จาก OCR กับมิเตอร์ที่ลงทะเบียนไว้)
+- exact set + deletion-neighbourhood index (symmetric delete) ของ Meter.serial_number อยู่ใน memory ของ process
+  ทุก serial ถูกเก็บพร้อมทุกแบบที่ลบไป 1 ตัวอักษร (hash 32 bit | ตำแหน่ง) ใน array เรียงแล้ว -> หา candidate ด้วย bisect
+  แล้วยืนยันด้วย levenshtein แบบมีขอบเขต; ระยะ 2 = ลองทุกสตริงที่ห่าง query 1 edit แล้วหาแบบระยะ 1
+- build ตอน warmup ของ worker (build()) หรือใน background thread; request ไม่เคย build เอง
+  ระหว่าง build ใหม่ยังใช้ index เดิมต่อ (ยังไม่มี index เลย -> matcher() คืน None, suggest คืน [])
+- add/remove ตอนเพิ่ม/ลบมิเตอร์ใน process นี้ (serial ใหม่อยู่ใน _recent จนกว่าจะ compact)
+- ทุก SERIAL_INDEX_TTL_SECONDS background thread เช็ค (count, max id) กับ DB ถ้าไม่ตรง (process อื่นแก้)
+  -> ดึงเฉพาะ id ที่ใหม่กว่าที่รู้จัก, ถ้า count ยังไม่ตรง (มีการลบ) -> diff ทั้งชุดแล้ว add/remove เฉพาะที่ต่าง
+- ลบออกจาก array ตรงๆ ไม่ได้ -> ใช้ tombstone แล้ว build ใหม่ใน background เมื่อ tombstone / _recent เยอะเกิน
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_index = None
+_lock = threading.Lock()  # add / remove / sync / สลับ index (อ่านไม่ต้องล็อก)
+_refreshing = threading.Lock()  # มี background refresh วิ่งอยู่ (ทีละตัว)
+
+_HASH_MASK = 0xFFFFFFFF
+
+
+def levenshtein(a, b, max_distance=None):
+    """edit distance; ถ้าเกิน max_distance คืน max_distance + 1 ทันที"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _deletions(word):
+    """word และทุกแบบที่ลบไป 1 ตัวอักษร"""
+    variants = {word}
+    variants.update(word[:i] + word[i + 1:] for i in range(len(word)))
+    return variants
+
+
+def _neighbours(word, alphabet):
+    """word และทุกสตริงที่ห่าง 1 edit (ตัวอักษรที่แทน/แทรกมาจาก alphabet ของ serial ที่มีอยู่)"""
+    found = _deletions(word)
+    for i in range(len(word) + 1):
+        for ch in alphabet:
+            found.add(word[:i] + ch + word[i:])
+            if i < len(word) and ch != word[i]:
+                found.add(word[:i] + ch + word[i + 1:])
+    return found
+
+
+def _key(variant):
+    # hash ของ str ต่างกันข้าม process (PYTHONHASHSEED) แต่ index อยู่ใน process เดียว จึงไม่เป็นไร
+    return hash(variant) & _HASH_MASK
+
+
+class SerialIndex:
+    def __init__(self, serials=(), signature=None, max_id=0):
+        self.serials = []      # ตำแหน่ง -> serial
+        self.positions = {}    # serial -> ตำแหน่ง
+        self.exact = set()     # serial ที่ยังใช้อยู่
+        self.tombstones = set()
+        self.alphabet = ""
+        self.signature = signature
+        self.max_id = max_id or 0
+        self.checked_at = time.monotonic()
+        self._recent = {}      # variant -> [ตำแหน่ง] ของ serial ที่ add หลัง build
+
+        packed = []
+        chars = set()
+        for serial in serials:
+            if not serial or serial in self.positions:
+                continue
+            position = self._append(serial)
+            chars.update(serial)
+            packed.extend((_key(v) << 32) | position for v in _deletions(serial))
+        packed.sort()
+        self._keys = array("Q", packed)
+        self.alphabet = "".join(sorted(chars))
+        self._built = len(self.serials)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def _append(self, serial):
+        position = len(self.serials)
+        self.serials.append(serial)
+        self.positions[serial] = position
+        self.exact.add(serial)
+        return position
+
+    def add(self, serial):
+        if not serial:
+            return
+        self.tombstones.discard(serial)
+        if serial in self.exact:
+            return
+        if serial in self.positions:
+            # เคยถูกลบแล้วเพิ่มกลับ: variant ยังอยู่ใน index
+            self.exact.add(serial)
+            return
+        position = self._append(serial)
+        for variant in _deletions(serial):
+            self._recent.setdefault(variant, []).append(position)
+        if not set(serial) <= set(self.alphabet):
+            self.alphabet = "".join(sorted(set(self.alphabet) | set(serial)))
+
+    def remove(self, serial):
+        if serial in self.exact:
+            self.exact.discard(serial)
+            self.tombstones.add(serial)
+
+    def needs_compaction(self):
+        limit = max(100, len(self.exact) // 10)
+        return len(self.tombstones) > limit or len(self.serials) - self._built > limit
+
+    def _lookup(self, variant):
+        key = _key(variant) << 32
+        keys = self._keys
+        i = bisect_left(keys, key)
+        end = key | _HASH_MASK
+        while i < len(keys) and keys[i] <= end:
+            yield keys[i] & _HASH_MASK
+            i += 1
+        yield from self._recent.get(variant, ())
+
+    def search(self, digits, max_distance):
+        """[(distance, serial)] เรียงจากใกล้สุด (ไม่รวม serial ที่ถูกลบ)"""
+        if max_distance <= 0:
+            return [(0, digits)] if digits in self.exact else []
+        if max_distance == 1:
+            probes = _deletions(digits)
+        elif max_distance == 2:
+            probes = set()
+            for word in _neighbours(digits, self.alphabet):
+                probes.update(_deletions(word))
+        else:
+            # ระยะ > 2 ไม่มี index รองรับ -> ไล่ทั้งชุด (ช้า ใช้กับ config พิเศษเท่านั้น)
+            probes = None
+
+        if probes is None:
+            candidates = list(self.exact)
+        else:
+            candidates = {self.serials[p] for variant in probes for p in self._lookup(variant)}
+        hits = []
+        for serial in candidates:
+            if serial not in self.exact:
+                continue
+            d = levenshtein(digits, serial, max_distance)
+            if d <= max_distance:
+                hits.append((d, serial))
+        hits.sort()
+        return hits
+
+    def match(self, digits):
+        """
+        serial ที่ใกล้ที่สุด -> (serial, distance, confident) หรือ None
+        confident = ตรงเป๊ะ หรือห่าง <= SERIAL_MATCH_MAX_DISTANCE และไม่มีตัวอื่นห่างเท่ากัน (ไม่กำกวม)
+        """
+        if digits in self.exact:
+            return digits, 0, True
+        hits = self.search(digits, Config.SERIAL_MATCH_MAX_DISTANCE)
+        if not hits:
+            return None
+        distance, serial = hits[0]
+        ambiguous = len(hits) > 1 and hits[1][0] == distance
+        return serial, distance, not ambiguous
+
+    def match_candidates(self, candidates):
+        """
+        candidates: [Candidate] จาก OCR -> match ที่ดีที่สุด
+        {"serial", "distance", "ocr", "confident"} หรือ None
+        เรียงตาม confident ก่อน, distance น้อย, แล้วจำนวนครั้งที่ OCR อ่านได้ค่านั้น / confidence
+        """
+        votes = {}
+        for c in candidates:
+            count, conf = votes.get(c.digits, (0, 0.0))
+            votes[c.digits] = (count + 1, max(conf, c.conf))
+
+        best = None
+        for digits, (count, conf) in votes.items():
+            found = self.match(digits)
+            if found is None:
+                continue
+            serial, distance, confident = found
+            key = (confident, -distance, count, conf)
+            if best is None or key > best[0]:
+                best = (key, {"serial": serial, "distance": distance, "ocr": digits, "confident": confident})
+        return best[1] if best else None
+
+    def suggest(self, digits, limit=5):
+        hits = self.search(digits, Config.SERIAL_SUGGEST_MAX_DISTANCE)
+        return [{"serial_number": s, "distance": d} for d, s in hits[:limit]]
+
+
+def _db_signature():
+    from sqlalchemy import func
+    from app.models import db
+    from app.models.meter import Meter
+
+    count, max_id = db.session.query(func.count(Meter.id), func.max(Meter.id)).one()
+    return count, max_id
+
+
+def _build():
+    from app.models import db
+    from app.models.meter import Meter
+
+    started = time.perf_counter()
+    signature = _db_signature()
+    serials = (s for (s,) in db.session.query(Meter.serial_number).yield_per(5000))
+    index = SerialIndex(serials, signature, signature[1])
+    logger.info("serial_index_built serials=%d seconds=%.3f", len(index), time.perf_counter() - started)
+    return index
+
+
+def _sync(index):
+    """
+    ตาม DB ให้ทันแบบ incremental (เรียกโดยถือ _lock):
+    id ใหม่กว่า max_id -> add, count ยังไม่ตรง (มีการลบ / แก้ที่ process อื่น) -> diff ทั้งชุด
+    """
+    from app.models import db
+    from app.models.meter import Meter
+
+    signature = _db_signature()
+    if signature != index.signature:
+        count, max_id = signature
+        added = db.session.query(Meter.serial_number).filter(Meter.id > index.max_id)
+        for (serial,) in added.yield_per(5000):
+            index.add(serial)
+        if count != len(index):
+            current = {s for (s,) in db.session.query(Meter.serial_number).yield_per(5000)}
+            for serial in index.exact - current:
+                index.remove(serial)
+            for serial in current - index.exact:
+                index.add(serial)
+        index.signature = signature
+        index.max_id = max_id or 0
+    index.checked_at = time.monotonic()
+
+
+def build():
+    """build index ใหม่ทันที (ต้องอยู่ใน app context) เช่นตอน warmup ของ worker ก่อนรับ request"""
+    global _index
+    index = _build()
+    with _lock:
+        _sync(index)  # ตามการเปลี่ยนแปลงที่เกิดระหว่าง build
+        _index = index
+    return index
+
+
+def _refresh(app):
+    try:
+        with app.app_context():
+            index = _index
+            if index is None or index.needs_compaction():
+                build()
+            else:
+                with _lock:
+                    _sync(index)
+    except Exception:
+        logger.exception("serial_index_refresh_failed")
+    finally:
+        _refreshing.release()
+
+
+def _refresh_async():
+    """build / sync ใน background thread (ทำทีละครั้ง) ระหว่างนั้น request ใช้ index เดิม"""
+    from flask import current_app, has_app_context
+
+    if not has_app_context() or not _refreshing.acquire(blocking=False):
+        return
+    app = current_app._get_current_object()
+    try:
+        threading.Thread(target=_refresh, args=(app,), name="serial-index-refresh", daemon=True).start()
+    except Exception:
+        _refreshing.release()
+        raise
+
+
+def get_index():
+    """index ปัจจุบัน หรือ None ถ้ายัง build ไม่เสร็จ; หมด TTL / ต้อง compact -> refresh ใน background"""
+    index = _index
+    if (index is None or index.needs_compaction()
+            or time.monotonic() - index.checked_at >= Config.SERIAL_INDEX_TTL_SECONDS):
+        _refresh_async()
+    return index
+
+
+def _after_change():
+    """sync signature หลังแก้ใน process นี้ (จะได้ไม่ diff ทั้งชุดเพราะการเปลี่ยนของตัวเอง)"""
+    try:
+        signature = _db_signature()
+    except Exception:
+        logger.exception("serial_index_signature_failed")
+        return
+    if len(_index) == signature[0]:
+        _index.signature = signature
+        _index.max_id = max(_index.max_id, signature[1] or 0)
+
+
+def add(serials):
+    """เรียกหลัง commit มิเตอร์ใหม่"""
+    with _lock:
+        if _index is None:
+            return
+        for serial in serials:
+            _index.add(serial)
+        _after_change()
+
+
+def remove(serial):
+    """เรียกหลัง commit การลบมิเตอร์"""
+    with _lock:
+        if _index is None:
+            return
+        _index.remove(serial)
+        _after_change()
+
+
+def matcher():
+    """callable สำหรับ read_text(serial_matcher=...) หรือ None ถ้าปิดไว้ / index ยังไม่พร้อม / ยังไม่มีมิเตอร์"""
+    if not Config.SERIAL_INDEX_ENABLED:
+        return None
+    index = get_index()
+    if index is None or not len(index):
+        return None
+    return index.match_candidates
+
+
+def snap(digits):
+    """serial ที่ลงทะเบียนไว้ถ้า digits match ได้อย่างมั่นใจ ไม่งั้น None"""
+    if not Config.SERIAL_INDEX_ENABLED or not digits:
+        return None
+    index = get_index()
+    found = index.match(digits) if index is not None else None
+    return found[0] if found and found[2] else None
+
+
+def suggest(digits, limit=5):
+    if not Config.SERIAL_INDEX_ENABLED or not digits:
+        return []
+    index = get_index()
+    return index.suggest(digits, limit) if index is not None else []
+
+
+def stats():
+    index = _index
+    if index is None:
+        return {"built": False}
+    return {"built": True, "serials": len(index), "tombstones": len(index.tombstones),
+            "recent": len(index.serials) - index._built,
+            "age_seconds": round(time.monotonic() - index.checked_at, 1)}
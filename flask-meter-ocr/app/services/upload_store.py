@@ -0,0 +1,79 @@
+"""
+Upload Store (เก็บไฟล์ต้นฉบับที่ upload มา โดยไม่อยู่ใน critical path ของ OCR)
+- ชื่อไฟล์ไม่ซ้ำกันเสมอ: <uuid>_<secure_filename> (ผู้ใช้สองคนส่ง IMG_0001.jpg พร้อมกันไม่ทับกัน)
+- OCR decode จาก buffer ใน memory แล้ว background writer ค่อยเขียนไฟล์ลง disk
+- เขียนลงไฟล์ชั่วคราวแล้ว os.replace -> ไม่มีใครเห็นไฟล์ที่เขียนไม่ครบ
+- ตอน process จบ (atexit) เขียนที่ค้างใน queue ให้เสร็จก่อน
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import uuid
+
+from werkzeug.utils import secure_filename
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def unique_path(upload_dir, filename):
+    """path ใหม่ใน upload_dir ที่ไม่ชนกับ upload อื่น"""
+    return os.path.join(upload_dir, f"{uuid.uuid4().hex}_{secure_filename(filename)}")
+
+
+def save_async(path, data):
+    """คิวเขียน data (bytes) ไปที่ path แล้วคืนทันที"""
+    _ensure_writer()
+    _queue.put((path, data))
+
+
+def pending():
+    return _queue.qsize()
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_writer_loop, name="upload-writer", daemon=True)
+            _writer.start()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_next(block=True):
+    path, data = _queue.get(block=block)
+    try:
+        _write(path, data)
+    except Exception as e:
+        logger.error("upload_write_failed path=%s error=%s", path, e)
+    finally:
+        _queue.task_done()
+
+
+def _writer_loop():
+    while True:
+        _write_next()
+
+
+@atexit.register
+def _drain():
+    while True:
+        try:
+            _write_next(block=False)
+        except queue.Empty:
+            break
+    _queue.join()  # รอไฟล์ที่ writer thread กำลังเขียนอยู่
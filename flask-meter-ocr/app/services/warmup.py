@@ -0,0 +1,61 @@
+"""
+Warmup สำหรับ production server (gunicorn preload + pre-fork)
+- preload(): import cv2 / numpy / pytesseract / OCR pipeline ใน master ครั้งเดียว worker ได้ไปแบบ copy-on-write
+- init_worker(app): หลัง fork ทิ้ง DB connection ที่ติดมาจาก master, build serial index แล้วรัน OCR ทิ้งหนึ่งครั้ง
+  (โหลด engine pool / digit model / traineddata ก่อนรับ request จริง)
+"""
+import logging
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    import cv2  # noqa: F401
+    import numpy  # noqa: F401
+    import pytesseract  # noqa: F401
+    from app.services import ocr_service  # noqa: F401
+
+
+def _sample_image():
+    """ภาพหน้ามิเตอร์จำลองเล็กๆ (พื้นขาว ข้อความ kWh / No.) ไม่ต้องพึ่งไฟล์บน disk"""
+    import cv2
+    import numpy as np
+
+    img = np.full((240, 480, 3), 255, dtype=np.uint8)
+    cv2.rectangle(img, (40, 40), (300, 110), (0, 0, 0), -1)
+    cv2.putText(img, "01234", (55, 100), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 4)
+    cv2.putText(img, "kWh", (320, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    cv2.putText(img, "No. 5678901", (40, 190), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    return img
+
+
+def init_worker(app):
+    """เรียกใน worker หลัง fork (gunicorn post_worker_init)"""
+    from app.models import db
+    from app.services import digit_classifier, layout_cache, serial_index
+    from app.services.ocr_service import read_image
+
+    with app.app_context():
+        # connection ใน pool ของ master ใช้ร่วมกันข้าม process ไม่ได้ (ทั้ง primary และ replica)
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        if Config.SERIAL_INDEX_ENABLED:
+            try:
+                serial_index.build()
+            except Exception as e:
+                # request ยังทำงานได้ (ไม่ snap S/N) แล้ว background thread จะลอง build ใหม่
+                logger.warning("serial_index_warmup_failed error=%s", e)
+
+    started = time.perf_counter()
+    digit_classifier.get_model()
+    try:
+        read_image(_sample_image(), source="<warmup>")
+    except Exception as e:
+        logger.warning("warmup_failed error=%s", e)
+        return
+    finally:
+        layout_cache.clear()  # ไม่ให้ layout ของภาพจำลองค้างอยู่ใน cache
+    logger.info("worker_warm seconds=%.2f", time.perf_counter() - started)
@@ -0,0 +1,39 @@
+import csv
+import io
+from itertools import islice
+
+
+class BulkInputError(ValueError):
+    pass
+
+
+def iter_rows(req, key):
+    """
+    แถวข้อมูลของ bulk endpoint -> yield (row_no, dict)
+    - CSV upload (multipart field "file", มี header) อ่านทีละแถวจาก stream (memory คงที่)
+    - JSON: list ของ object หรือ {"<key>": [...]}
+    """
+    if "file" in req.files:
+        stream = io.TextIOWrapper(req.files["file"].stream, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(stream)
+        for row_no, row in enumerate(reader, start=1):
+            yield row_no, {k.strip(): (v.strip() if isinstance(v, str) else v)
+                           for k, v in row.items() if k}
+        return
+
+    data = req.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list):
+        raise BulkInputError(f"expected a JSON list (or {{\"{key}\": [...]}}) or a CSV file")
+    for row_no, row in enumerate(data, start=1):
+        yield row_no, row if isinstance(row, dict) else {}
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,86 @@
+"""
+DB pool metrics + read replica routing
+- TimedQueuePool: QueuePool ที่จับเวลารอ checkout connection และนับครั้งที่ timeout (ต่อ pool: primary / replica)
+- RoutingSession: ภายใน replica_reads() / @read_replica query ที่ไม่ใช่การเขียนจะไปที่ bind "replica"
+  (ถ้าไม่ได้ตั้ง replica ไว้ -> ใช้ primary ตามเดิม); flush / INSERT / UPDATE / DELETE ไป primary เสมอ
+- replica อาจตามหลัง primary เล็กน้อย ใช้กับ endpoint อ่านอย่างเดียว (list / history / export) เท่านั้น
+"""
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.services import ocr_metrics
+
+REPLICA_BIND = "replica"
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CHECKOUT_WAIT = ocr_metrics.Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a DB connection from the pool", ["pool"],
+    buckets=WAIT_BUCKETS)
+CHECKOUT_TIMEOUTS = ocr_metrics.Counter(
+    "db_pool_checkout_timeouts_total", "DB connection checkouts that hit pool_timeout", ["pool"])
+
+_use_replica = contextvars.ContextVar("db_use_replica", default=False)
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        label = self.logging_name or "primary"
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            CHECKOUT_TIMEOUTS.inc(pool=label)
+            raise
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - started, pool=label)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and _use_replica.get() and not self._flushing
+                and not isinstance(clause, UpdateBase)):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view):
+    """view decorator: query ของ endpoint นี้อ่านจาก replica"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def pool_stats(engines):
+    """{"primary" | bind key: {size, in_use, idle, overflow}} ของ engine ที่ใช้ QueuePool"""
+    stats = {}
+    for key, engine in engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        stats[key or "primary"] = {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+        }
+    return stats
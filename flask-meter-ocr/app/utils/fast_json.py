@@ -0,0 +1,37 @@
+"""
+JSON encoder สำหรับ list endpoint ขนาดใหญ่
+- ใช้ orjson ถ้าติดตั้งไว้ (เร็วกว่า json มาตรฐานหลายเท่า, encode datetime เองได้)
+- ไม่มี orjson / ปิดด้วย FAST_JSON_ENABLED=0 -> json มาตรฐาน (ผลลัพธ์เหมือนกัน)
+"""
+import json
+from datetime import date, datetime
+
+from flask import Response
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def enabled():
+    return orjson is not None and Config.FAST_JSON_ENABLED
+
+
+def dumps(data):
+    """-> bytes; datetime ออกมาเป็น ISO 8601 แบบเดียวกับ .isoformat()"""
+    if enabled():
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+def response(data, status=200):
+    return Response(dumps(data), status=status, mimetype="application/json")
@@ -0,0 +1,66 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from config import Config
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError("invalid cursor")
+
+
+def page_args(req):
+    """?limit=&cursor= -> (limit, cursor tuple หรือ None); ไม่ส่ง limit = PAGE_DEFAULT_LIMIT"""
+    limit = req.args.get("limit", Config.PAGE_DEFAULT_LIMIT, type=int)
+    if limit < 1:
+        raise PaginationError("limit must be >= 1")
+    limit = min(limit, Config.PAGE_MAX_LIMIT)
+
+    cursor = req.args.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def paginate(query, created_col, id_col, limit, cursor=None):
+    """
+    Keyset pagination เรียงใหม่ -> เก่า ตาม (created_at, id)
+    คืน (rows, next_cursor) โดย next_cursor = None เมื่อเป็นหน้าสุดท้าย
+    rows เป็น model หรือ projection row ก็ได้ (ต้องมี attribute ชื่อเดียวกับ column)
+    """
+    if cursor is not None:
+        created_at, row_id = cursor
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id),
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+
+def with_next_cursor(response, next_cursor):
+    """body ยังเป็น list เหมือนเดิม; cursor หน้าถัดไปอยู่ใน header"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
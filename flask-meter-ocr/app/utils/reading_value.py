@@ -0,0 +1,14 @@
+import re
+from decimal import Decimal
+
+_NUMBER = re.compile(r"\d+(\.\d+)?")
+
+
+def parse_reading_value(reading):
+    """แปลง reading (เช่น "01234", "1,234.5") เป็น Decimal; ถ้าไม่ใช่ตัวเลขล้วน (OCR อ่านเพี้ยน) คืน None"""
+    if reading is None:
+        return None
+    cleaned = str(reading).strip().replace(",", "").replace(" ", "")
+    if not _NUMBER.fullmatch(cleaned):
+        return None
+    return Decimal(cleaned)
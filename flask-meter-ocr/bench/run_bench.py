@@ -0,0 +1,168 @@
+"""
+OCR Benchmark + Accuracy Regression
+
+รัน read_text กับ corpus ที่มี label แล้ววัด latency / จำนวน Tesseract call / ความถูกต้อง serial+reading
+ผลเป็น JSON เอาไปเทียบกับ baseline เพื่อจับ regression (exit code 1 ถ้าแย่ลงเกินเกณฑ์)
+
+    # ใช้ synthetic corpus (สร้างใหม่ทุกครั้งด้วย seed เดิม)
+    python -m bench.run_bench --synthetic 30 --out bench/results.json
+
+    # ใช้ corpus จริง (โฟลเดอร์ที่มี labels.json) แล้วเทียบกับ baseline
+    python -m bench.run_bench --corpus path/to/corpus --baseline bench/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_corpus(corpus_dir, labels, read_text):
+    per_image = []
+    for item in labels:
+        path = os.path.join(corpus_dir, item["file"])
+        start = time.perf_counter()
+        try:
+            result = read_text(path)
+            error = None
+        except Exception as e:  # บันทึกไว้แล้วไปรูปถัดไป
+            result, error = {}, str(e)
+        elapsed = time.perf_counter() - start
+
+        per_image.append({
+            "file": item["file"],
+            "latency_s": round(elapsed, 4),
+            "tesseract_calls": result.get("tesseract_calls"),
+            "serial_expected": item.get("serial"),
+            "serial": result.get("serial"),
+            "serial_ok": result.get("serial") == item.get("serial"),
+            "serial_step": result.get("serial_step"),
+            "reading_expected": item.get("reading"),
+            "reading": result.get("reading"),
+            "reading_ok": result.get("reading") == item.get("reading"),
+            "reading_step": result.get("reading_step"),
+            "rotation_tier": result.get("rotation_tier"),
+            "timings": result.get("timings"),
+            "error": error,
+        })
+        status = "ok" if per_image[-1]["serial_ok"] and per_image[-1]["reading_ok"] else "MISS"
+        print(f"{item['file']}: {elapsed:.2f}s {status} serial={result.get('serial')} reading={result.get('reading')}")
+    return per_image
+
+
+def summarize(per_image):
+    latencies = [r["latency_s"] for r in per_image]
+    calls = [r["tesseract_calls"] for r in per_image if r["tesseract_calls"] is not None]
+    n = len(per_image) or 1
+    stage_names = sorted({k for r in per_image for k in (r["timings"] or {})})
+    return {
+        "images": len(per_image),
+        "latency_s": {
+            "mean": round(statistics.mean(latencies), 4) if latencies else None,
+            "p50": round(percentile(latencies, 50), 4) if latencies else None,
+            "p90": round(percentile(latencies, 90), 4) if latencies else None,
+            "p95": round(percentile(latencies, 95), 4) if latencies else None,
+            "p99": round(percentile(latencies, 99), 4) if latencies else None,
+        },
+        "stage_mean_s": {
+            name: round(statistics.mean([(r["timings"] or {}).get(name, 0.0) for r in per_image]), 4)
+            for name in stage_names
+        },
+        "tesseract_calls": {
+            "mean": round(statistics.mean(calls), 2) if calls else None,
+            "p95": percentile(calls, 95) if calls else None,
+        },
+        "accuracy": {
+            "serial": round(sum(r["serial_ok"] for r in per_image) / n, 4),
+            "reading": round(sum(r["reading_ok"] for r in per_image) / n, 4),
+            "both": round(sum(r["serial_ok"] and r["reading_ok"] for r in per_image) / n, 4),
+        },
+        "errors": sum(1 for r in per_image if r["error"]),
+    }
+
+
+def compare(summary, baseline, max_latency_increase, max_accuracy_drop):
+    """คืน list ของ regression ที่เจอ (ว่าง = ผ่าน)"""
+    regressions = []
+    for key in ("p50", "p95"):
+        old, new = baseline["latency_s"].get(key), summary["latency_s"].get(key)
+        if old and new and new > old * (1 + max_latency_increase):
+            regressions.append(f"latency {key}: {old:.3f}s -> {new:.3f}s (+{(new / old - 1) * 100:.0f}%)")
+    old_calls, new_calls = baseline["tesseract_calls"].get("mean"), summary["tesseract_calls"].get("mean")
+    if old_calls and new_calls and new_calls > old_calls * (1 + max_latency_increase):
+        regressions.append(f"tesseract calls mean: {old_calls} -> {new_calls}")
+    for key in ("serial", "reading", "both"):
+        old, new = baseline["accuracy"][key], summary["accuracy"][key]
+        if new < old - max_accuracy_drop:
+            regressions.append(f"accuracy {key}: {old:.3f} -> {new:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark read_text speed and accuracy")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--corpus", help="directory containing labels.json + images")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic meter images")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline results JSON to compare against")
+    parser.add_argument("--max-latency-increase", type=float, default=0.20)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    from app.services.ocr_service import read_text, ENGINE_VERSION
+    from app.services import ocr_engine
+
+    if args.synthetic:
+        from bench.synth import generate_corpus
+        corpus_dir = tempfile.mkdtemp(prefix="meter_synth_")
+        generate_corpus(corpus_dir, args.synthetic, args.seed)
+    else:
+        corpus_dir = args.corpus
+
+    with open(os.path.join(corpus_dir, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+
+    per_image = run_corpus(corpus_dir, labels, read_text)
+    results = {
+        "engine_version": ENGINE_VERSION,
+        "engine": ocr_engine.engine_name(),
+        "corpus": "synthetic" if args.synthetic else os.path.abspath(corpus_dir),
+        "seed": args.seed if args.synthetic else None,
+        "summary": summarize(per_image),
+        "per_image": per_image,
+    }
+    print(json.dumps(results["summary"], indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results["summary"], baseline["summary"],
+                              args.max_latency_increase, args.max_accuracy_drop)
+        if regressions:
+            print("❌ REGRESSION vs baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ No regression vs baseline")
+
+
+if __name__ == "__main__":
+    main()
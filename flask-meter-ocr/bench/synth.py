@@ -0,0 +1,136 @@
+"""
+Synthetic meter corpus สำหรับ benchmark (ไม่ต้องใช้รูปจริงของลูกค้า)
+
+หน้ามิเตอร์จำลอง: ตัวเลขขาวบน drum ดำ + คำว่า kWh, S/N ดำบนแผ่นเงิน + คำว่า No.
+พร้อม augment: หมุน 0/90/180/270 + เอียงเล็กน้อย, blur, แสงสะท้อน (glare), noise
+
+    python -m bench.synth --out bench/corpus --count 50 --seed 1
+"""
+import argparse
+import json
+import os
+import random
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_BOLD = cv2.FONT_HERSHEY_DUPLEX
+
+
+def _text(img, text, org, scale, color, thickness, font=FONT):
+    cv2.putText(img, text, org, font, scale, color, thickness, cv2.LINE_AA)
+
+
+def _silver_plate(h, w):
+    """แผ่นโลหะสีเงิน: gradient แนวตั้ง + ลายเส้นบางๆ"""
+    ramp = np.linspace(215, 165, h, dtype=np.float32)[:, None]
+    plate = np.repeat(ramp, w, axis=1)
+    plate += np.random.normal(0, 3, (h, w)).astype(np.float32)
+    plate = np.clip(plate, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(plate, cv2.COLOR_GRAY2BGR)
+
+
+def render_meter(serial, reading, width=900, height=1200):
+    """วาดหน้ามิเตอร์ตั้งตรง คืนภาพ BGR"""
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    cv2.rectangle(img, (40, 40), (width - 40, height - 40), (60, 60, 60), 6)
+
+    _text(img, "SINGLE PHASE WATT-HOUR METER", (90, 150), 1.0, (30, 30, 30), 2)
+
+    # drum ตัวเลขขาวบนดำ + kWh ด้านขวา
+    drum_x, drum_y, cell = 140, 260, 90
+    drum_w = cell * len(reading)
+    cv2.rectangle(img, (drum_x, drum_y), (drum_x + drum_w, drum_y + 130), (15, 15, 15), -1)
+    for i, ch in enumerate(reading):
+        x = drum_x + i * cell
+        if i:
+            cv2.line(img, (x, drum_y), (x, drum_y + 130), (90, 90, 90), 2)
+        _text(img, ch, (x + 18, drum_y + 100), 2.6, (245, 245, 245), 6, FONT_BOLD)
+    _text(img, "kWh", (drum_x + drum_w + 30, drum_y + 95), 2.0, (20, 20, 20), 4)
+
+    _text(img, "220V  5(15)A  50Hz", (140, 500), 1.2, (40, 40, 40), 2)
+    _text(img, "CLASS 2   1200 rev/kWh", (140, 560), 1.2, (40, 40, 40), 2)
+
+    # แผ่นเงินพร้อม S/N
+    plate_y, plate_h = 680, 200
+    img[plate_y:plate_y + plate_h, 100:width - 100] = _silver_plate(plate_h, width - 200)
+    _text(img, "No.", (140, plate_y + 125), 2.0, (20, 20, 20), 4)
+    _text(img, serial, (300, plate_y + 130), 2.4, (10, 10, 10), 6, FONT_BOLD)
+
+    _text(img, "MADE IN THAILAND 2024", (180, 1000), 1.0, (60, 60, 60), 2)
+    return img
+
+
+def augment(img, rng, rotate=True):
+    """คืน (ภาพที่ augment แล้ว, ข้อมูล augment)"""
+    info = {}
+    h, w = img.shape[:2]
+
+    skew = rng.uniform(-4, 4)
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), skew, 1.0)
+    img = cv2.warpAffine(img, m, (w, h), borderValue=(200, 200, 200))
+    info["skew"] = round(skew, 2)
+
+    if rng.random() < 0.5:
+        k = rng.choice([3, 5, 7])
+        img = cv2.GaussianBlur(img, (k, k), 0)
+        info["blur"] = k
+
+    if rng.random() < 0.4:
+        overlay = img.copy()
+        center = (rng.randint(0, w), rng.randint(0, h))
+        axes = (rng.randint(w // 8, w // 3), rng.randint(h // 12, h // 5))
+        cv2.ellipse(overlay, center, axes, rng.uniform(0, 180), 0, 360, (255, 255, 255), -1)
+        overlay = cv2.GaussianBlur(overlay, (0, 0), 25)
+        alpha = rng.uniform(0.3, 0.6)
+        img = cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
+        info["glare"] = round(alpha, 2)
+
+    noise = np.random.normal(0, rng.uniform(2, 8), img.shape).astype(np.float32)
+    img = np.clip(img.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+    angle = 0
+    if rotate and rng.random() < 0.3:
+        angle = rng.choice([90, 180, 270])
+        rotations = {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+        img = cv2.rotate(img, rotations[angle])
+    info["rotation"] = angle
+    return img, info
+
+
+def generate_corpus(out_dir, count=50, seed=1, rotate=True):
+    """สร้างรูป + labels.json ({file, serial, reading, augment}) คืน path ของ labels.json"""
+    rng = random.Random(seed)
+    np.random.seed(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    labels = []
+    for i in range(count):
+        serial = str(rng.randint(1_000_000, 9_999_999))
+        reading = f"{rng.randint(0, 99999):05d}"
+        img, info = augment(render_meter(serial, reading), rng, rotate=rotate)
+        filename = f"synth_{i:04d}.jpg"
+        cv2.imwrite(os.path.join(out_dir, filename), img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        labels.append({"file": filename, "serial": serial, "reading": reading, "augment": info})
+
+    labels_path = os.path.join(out_dir, "labels.json")
+    with open(labels_path, "w", encoding="utf-8") as f:
+        json.dump(labels, f, indent=2)
+    return labels_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic labelled meter corpus")
+    parser.add_argument("--out", default="bench/corpus")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-rotate", action="store_true", help="keep every image upright")
+    args = parser.parse_args()
+
+    path = generate_corpus(args.out, args.count, args.seed, rotate=not args.no_rotate)
+    print(f"Wrote {args.count} images -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,5 +9,140 @@ class Config:
         f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # DB connection pool (ต่อ worker process) - POOL_RECYCLE ต้องน้อยกว่า wait_timeout ของ MySQL
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_logging_name": "primary",
+    }
+
+    # Read replica (ไม่ตั้ง DB_REPLICA_HOST = อ่านจาก primary ทั้งหมด)
+    # list / history / export อ่านจาก replica ส่วนการเขียนอยู่ที่ primary เสมอ
+    DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+    SQLALCHEMY_BINDS = {
+        "replica": {
+            "url": (
+                f"mysql+pymysql://{os.getenv('DB_REPLICA_USER', os.getenv('DB_USER'))}:"
+                f"{os.getenv('DB_REPLICA_PASSWORD', os.getenv('DB_PASSWORD'))}@"
+                f"{DB_REPLICA_HOST}:{os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT'))}/{os.getenv('DB_NAME')}"
+            ),
+            "pool_logging_name": "replica",
+        },
+    } if DB_REPLICA_HOST else {}
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+
+    # OCR engine: auto (tesserocr ถ้ามี) | tesserocr | pytesseract
+    OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+    OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", "2"))
+    OCR_TESSERACT_LANG = os.getenv("OCR_TESSERACT_LANG", "eng")
+    OCR_TESSDATA_PATH = os.getenv("OCR_TESSDATA_PATH")
+
+    # Async OCR jobs (POST /api/ocr/jobs)
+    OCR_JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "2"))
+    OCR_JOB_MAX_QUEUED = int(os.getenv("OCR_JOB_MAX_QUEUED", "1000"))
+    OCR_JOB_POLL_SECONDS = float(os.getenv("OCR_JOB_POLL_SECONDS", "2"))
+    OCR_JOB_STALE_SECONDS = int(os.getenv("OCR_JOB_STALE_SECONDS", "600"))
+    OCR_JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))  # job ที่ทำให้ worker ตายซ้ำๆ -> failed
+
+    # Batch OCR (POST /api/ocr/batch) - ใช้ thread pool ร่วมกันทั้ง process
+    OCR_BATCH_WORKERS = int(os.getenv("OCR_BATCH_WORKERS", "2"))
+    OCR_BATCH_MAX_FILES = int(os.getenv("OCR_BATCH_MAX_FILES", "500"))
+    # ขนาดต่อไฟล์ / รวมทั้ง batch ที่อ่านเข้า memory (เกิน -> 413 ก่อนอ่านไฟล์)
+    OCR_BATCH_MAX_FILE_BYTES = int(os.getenv("OCR_BATCH_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+    OCR_BATCH_MAX_TOTAL_BYTES = int(os.getenv("OCR_BATCH_MAX_TOTAL_BYTES", str(256 * 1024 * 1024)))
+    OCR_BATCH_INSERT_CHUNK = int(os.getenv("OCR_BATCH_INSERT_CHUNK", "50"))
+
+    # Keyset pagination (history / meters / readings lists)
+    PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+    PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "500"))
+
+    # ใช้ orjson (ถ้าติดตั้ง) encode list endpoint
+    FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "1") == "1"
+
+    # Streaming export (/api/export/*) - จำนวนแถวต่อรอบของ server-side cursor
+    EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+    # Serial index (fuzzy match S/N จาก OCR กับมิเตอร์ที่ลงทะเบียน)
+    SERIAL_INDEX_ENABLED = os.getenv("SERIAL_INDEX_ENABLED", "1") == "1"
+    SERIAL_INDEX_TTL_SECONDS = float(os.getenv("SERIAL_INDEX_TTL_SECONDS", "60"))
+    SERIAL_MATCH_MAX_DISTANCE = int(os.getenv("SERIAL_MATCH_MAX_DISTANCE", "1"))
+    SERIAL_SUGGEST_MAX_DISTANCE = int(os.getenv("SERIAL_SUGGEST_MAX_DISTANCE", "2"))
+
+    # Reading prior (ใช้ประวัติ reading ของมิเตอร์กรองค่าที่เป็นไปไม่ได้ / หยุด pipeline เร็วขึ้น)
+    READING_PRIOR_ENABLED = os.getenv("READING_PRIOR_ENABLED", "1") == "1"
+    READING_PRIOR_HISTORY = int(os.getenv("READING_PRIOR_HISTORY", "10"))
+    READING_PRIOR_TTL_SECONDS = float(os.getenv("READING_PRIOR_TTL_SECONDS", "300"))
+    READING_PRIOR_CACHE_ENTRIES = int(os.getenv("READING_PRIOR_CACHE_ENTRIES", "5000"))
+    READING_PRIOR_DEFAULT_DAILY = float(os.getenv("READING_PRIOR_DEFAULT_DAILY", "200"))
+    READING_PRIOR_MIN_DAILY = float(os.getenv("READING_PRIOR_MIN_DAILY", "50"))
+    READING_PRIOR_RATE_SLACK = float(os.getenv("READING_PRIOR_RATE_SLACK", "2.0"))
+    READING_PRIOR_TOLERANCE = float(os.getenv("READING_PRIOR_TOLERANCE", "5"))
+
+    # Bulk import (POST /api/meters/bulk, /api/readings/bulk) - insert ทีละ chunk
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+    # Parallel strategy fan-out (process pool + shared memory); <= 1 = serial
+    OCR_PARALLEL_WORKERS = int(os.getenv("OCR_PARALLEL_WORKERS", "0"))
+    OCR_PARALLEL_START_METHOD = os.getenv("OCR_PARALLEL_START_METHOD", "spawn")
+
+    # Consensus voting ใน region extractors (หยุดเมื่อ method ต่างกัน >= QUORUM วิธีอ่านได้ตรงกัน)
+    OCR_CONSENSUS_QUORUM = int(os.getenv("OCR_CONSENSUS_QUORUM", "2"))
+    OCR_CONSENSUS_MIN_CONF = float(os.getenv("OCR_CONSENSUS_MIN_CONF", "60"))
+
+    # OCR result cache (key = sha256 ของไฟล์ + เวอร์ชัน engine/config)
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "1") == "1"
+    OCR_CACHE_MEMORY_ENTRIES = int(os.getenv("OCR_CACHE_MEMORY_ENTRIES", "512"))
+    OCR_CACHE_MAX_ROWS = int(os.getenv("OCR_CACHE_MAX_ROWS", "50000"))
+    OCR_CACHE_MAX_AGE_DAYS = int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "30"))
+    OCR_CACHE_EVICT_EVERY = int(os.getenv("OCR_CACHE_EVICT_EVERY", "100"))
+
+    # Resolution policy: decode ย่อให้ด้านยาว <= DECODE_MAX_SIDE, global detection <= DETECT_MAX_SIDE
+    # MEMORY_BUDGET_MB = ขนาดภาพกลางทางสูงสุดต่อ request (0 = ไม่จำกัด)
+    OCR_DECODE_MAX_SIDE = int(os.getenv("OCR_DECODE_MAX_SIDE", "3200"))
+    OCR_DETECT_MAX_SIDE = int(os.getenv("OCR_DETECT_MAX_SIDE", "2400"))
+    OCR_MEMORY_BUDGET_MB = int(os.getenv("OCR_MEMORY_BUDGET_MB", "256"))
+    OCR_ROI_MAX_SIDE = int(os.getenv("OCR_ROI_MAX_SIDE", "3000"))
+
+    # Digit classifier (kNN/HOG) อ่าน ROI ก่อน Tesseract; ไม่มีไฟล์ model = ปิด
+    DIGIT_CLASSIFIER_ENABLED = os.getenv("DIGIT_CLASSIFIER_ENABLED", "1") == "1"
+    DIGIT_MODEL_PATH = os.getenv("DIGIT_MODEL_PATH", "models/digits.npz")
+    DIGIT_CLASSIFIER_K = int(os.getenv("DIGIT_CLASSIFIER_K", "5"))
+    DIGIT_CLASSIFIER_MIN_CONF = float(os.getenv("DIGIT_CLASSIFIER_MIN_CONF", "0.8"))
+    DIGIT_CLASSIFIER_MIN_SIMILARITY = float(os.getenv("DIGIT_CLASSIFIER_MIN_SIMILARITY", "0.75"))
+
+    # Layout cache: จำตำแหน่ง ROI ของมิเตอร์/รุ่นที่เคยเห็น แล้วข้าม global text detection
+    LAYOUT_CACHE_ENABLED = os.getenv("LAYOUT_CACHE_ENABLED", "1") == "1"
+    LAYOUT_CACHE_ENTRIES = int(os.getenv("LAYOUT_CACHE_ENTRIES", "500"))
+    LAYOUT_MATCH_MIN_SCORE = float(os.getenv("LAYOUT_MATCH_MIN_SCORE", "0.9"))
+    LAYOUT_ROI_MARGIN = float(os.getenv("LAYOUT_ROI_MARGIN", "0.05"))
+
+    # Preprocess graph: memoize ภาพ preprocess (CLAHE / threshold / resize) ภายใน request เดียว
+    OCR_PREPROCESS_CACHE = os.getenv("OCR_PREPROCESS_CACHE", "1") == "1"
+
+    # Orientation detection: EXIF -> OSD -> projection profile -> 4-way sweep
+    OCR_OSD_MIN_CONF = float(os.getenv("OCR_OSD_MIN_CONF", "2.0"))
+    OCR_PROJECTION_RATIO = float(os.getenv("OCR_PROJECTION_RATIO", "1.6"))
+
+    # OCR trace mode (ภาพกลางทางของ pipeline) - ปิดเป็นค่าเริ่มต้น
+    OCR_TRACE_SAMPLE_RATE = float(os.getenv("OCR_TRACE_SAMPLE_RATE", "0"))
+    # ห้ามอยู่ใต้ app/static (Flask serve ได้โดยไม่ต้อง login) - ดูผ่าน /api/admin/ocr-traces เท่านั้น
+    OCR_TRACE_DIR = os.getenv("OCR_TRACE_DIR", "data/ocr_traces")
+    OCR_TRACE_KEEP = int(os.getenv("OCR_TRACE_KEEP", "200"))
+
+    # Readiness (/api/health/ready ตอบ 503 เมื่อ node นี้อิ่มตัว -> load balancer ส่งไป node อื่น)
+    READY_MAX_INFLIGHT = int(os.getenv("READY_MAX_INFLIGHT", "8"))
+    READY_MAX_BATCH_BACKLOG = int(os.getenv("READY_MAX_BATCH_BACKLOG", "4"))  # x OCR_BATCH_WORKERS
+
+    # Logging / metrics
+    OCR_LOG_LEVEL = os.getenv("OCR_LOG_LEVEL", "INFO")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
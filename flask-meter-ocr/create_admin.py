@@ -2,6 +2,7 @@ from app import create_app
 from app.models import db
 from app.models.user import User
 
+# ต้องมีตาราง users ก่อน: flask db upgrade (หรือ flask init-db) - create_app() ไม่สร้าง schema ให้แล้ว
 app = create_app()
 
 with app.app_context():
@@ -0,0 +1,37 @@
+"""
+gunicorn config (production)
+    gunicorn -c gunicorn.conf.py wsgi:app
+- preload app ใน master (cv2 / numpy / pytesseract import ครั้งเดียว, worker แชร์แบบ copy-on-write)
+- OCR กิน CPU: worker = จำนวน CPU (ไม่ใช่ 2n+1) และจำกัด OpenMP ของ Tesseract ไว้ 1 thread ต่อ call
+- worker แต่ละตัวรัน OCR ทิ้งหนึ่งครั้งก่อนรับ request (post_worker_init)
+ปรับด้วย env: GUNICORN_BIND, WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS
+"""
+import multiprocessing
+import os
+
+# ต้องตั้งก่อน Tesseract ถูกโหลด (ไม่งั้นแต่ละ call แตก thread เท่าจำนวน core แย่ CPU กันเองระหว่าง worker)
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or max(1, multiprocessing.cpu_count())
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = True
+
+# OCR ภาพใหญ่ + warmup อาจใช้เวลาหลายวินาที
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# รีไซเคิล worker เป็นระยะ กัน memory ของ OpenCV / Tesseract โตสะสม
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    from app.services import warmup
+
+    warmup.init_worker(worker.wsgi)
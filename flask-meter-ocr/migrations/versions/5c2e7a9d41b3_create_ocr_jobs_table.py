@@ -0,0 +1,44 @@
+"""create ocr_jobs table
+
+Revision ID: 5c2e7a9d41b3
+Revises: 301b684da042
+Create Date: 2026-10-18 09:12:41.302118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e7a9d41b3'
+down_revision = '301b684da042'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ocr_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('image_path', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.String(length=50), nullable=True),
+    sa.Column('ocr_result_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ocr_result_id'], ['ocr_results.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_created_at'))
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_status'))
+
+    op.drop_table('ocr_jobs')
@@ -0,0 +1,42 @@
+"""create ocr_cache table
+
+Revision ID: 8f41d2c6b7e0
+Revises: 5c2e7a9d41b3
+Create Date: 2026-10-18 10:03:27.518840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f41d2c6b7e0'
+down_revision = '5c2e7a9d41b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ocr_cache',
+    sa.Column('key', sa.String(length=128), nullable=False),
+    sa.Column('image_path', sa.String(length=255), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('serial_number', sa.String(length=100), nullable=True),
+    sa.Column('reading', sa.String(length=50), nullable=True),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('ocr_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ocr_cache_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ocr_cache_last_hit_at'), ['last_hit_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ocr_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ocr_cache_last_hit_at'))
+        batch_op.drop_index(batch_op.f('ix_ocr_cache_created_at'))
+
+    op.drop_table('ocr_cache')
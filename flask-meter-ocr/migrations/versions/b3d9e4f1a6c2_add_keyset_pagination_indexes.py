@@ -0,0 +1,63 @@
+"""add keyset pagination indexes
+
+Revision ID: b3d9e4f1a6c2
+Revises: 8f41d2c6b7e0
+Create Date: 2026-10-18 11:20:41.093512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d9e4f1a6c2'
+down_revision = '8f41d2c6b7e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # meters / meter_readings เคยถูกสร้างด้วย db.create_all() เท่านั้น (ไม่มี migration)
+    # สร้างให้ถ้ายังไม่มี เพื่อให้ DB ใหม่ที่ใช้ `flask db upgrade` อย่างเดียวครบ
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'meters' not in tables:
+        op.create_table('meters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('serial_number', sa.String(length=100), nullable=False),
+        sa.Column('building', sa.String(length=100), nullable=True),
+        sa.Column('floor', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('serial_number')
+        )
+    if 'meter_readings' not in tables:
+        op.create_table('meter_readings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('meter_id', sa.Integer(), nullable=False),
+        sa.Column('reading', sa.String(length=50), nullable=False),
+        sa.Column('image_path', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['meter_id'], ['meters.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    with op.batch_alter_table('ocr_results', schema=None) as batch_op:
+        batch_op.create_index('ix_ocr_results_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('meters', schema=None) as batch_op:
+        batch_op.create_index('ix_meters_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('meter_readings', schema=None) as batch_op:
+        batch_op.create_index('ix_meter_readings_meter_id_created_at_id', ['meter_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    # ลบเฉพาะ index (ตาราง meters / meter_readings อาจมีอยู่ก่อน migration นี้)
+    with op.batch_alter_table('meter_readings', schema=None) as batch_op:
+        batch_op.drop_index('ix_meter_readings_meter_id_created_at_id')
+
+    with op.batch_alter_table('meters', schema=None) as batch_op:
+        batch_op.drop_index('ix_meters_created_at_id')
+
+    with op.batch_alter_table('ocr_results', schema=None) as batch_op:
+        batch_op.drop_index('ix_ocr_results_created_at_id')
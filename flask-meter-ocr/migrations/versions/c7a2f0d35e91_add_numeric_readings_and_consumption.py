@@ -0,0 +1,92 @@
+"""add numeric readings and consumption aggregates
+
+Revision ID: c7a2f0d35e91
+Revises: b3d9e4f1a6c2
+Create Date: 2026-10-18 12:41:09.662174
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a2f0d35e91'
+down_revision = 'b3d9e4f1a6c2'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 1000
+_NUMBER = re.compile(r"\d+(\.\d+)?")
+
+
+def _backfill(table):
+    """เติม reading_value จาก reading (string) ทีละ chunk; แถวที่ parse ไม่ได้คงเป็น NULL"""
+    bind = op.get_bind()
+    t = sa.table(table, sa.column('id', sa.Integer), sa.column('reading', sa.String),
+                 sa.column('reading_value', sa.Numeric(14, 3)))
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.select(t.c.id, t.c.reading).where(t.c.id > last_id)
+                            .order_by(t.c.id).limit(BACKFILL_CHUNK)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, reading in rows:
+            cleaned = (reading or "").strip().replace(",", "").replace(" ", "")
+            if _NUMBER.fullmatch(cleaned):
+                updates.append({"b_id": row_id, "b_value": cleaned})
+        if updates:
+            bind.execute(t.update().where(t.c.id == sa.bindparam('b_id'))
+                         .values(reading_value=sa.bindparam('b_value')), updates)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('meter_readings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reading_value', sa.Numeric(precision=14, scale=3), nullable=True))
+
+    with op.batch_alter_table('ocr_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reading_value', sa.Numeric(precision=14, scale=3), nullable=True))
+
+    op.create_table('meter_summaries',
+    sa.Column('meter_id', sa.Integer(), nullable=False),
+    sa.Column('latest_reading_id', sa.Integer(), nullable=True),
+    sa.Column('latest_value', sa.Numeric(precision=14, scale=3), nullable=True),
+    sa.Column('latest_at', sa.DateTime(), nullable=True),
+    sa.Column('previous_reading_id', sa.Integer(), nullable=True),
+    sa.Column('previous_value', sa.Numeric(precision=14, scale=3), nullable=True),
+    sa.Column('previous_at', sa.DateTime(), nullable=True),
+    sa.Column('reading_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['meter_id'], ['meters.id'], ),
+    sa.PrimaryKeyConstraint('meter_id')
+    )
+    op.create_table('meter_consumption_buckets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meter_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('consumption', sa.Numeric(precision=14, scale=3), nullable=False),
+    sa.Column('reading_count', sa.Integer(), nullable=False),
+    sa.Column('last_value', sa.Numeric(precision=14, scale=3), nullable=True),
+    sa.ForeignKeyConstraint(['meter_id'], ['meters.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('meter_id', 'period', 'bucket_start', name='uq_meter_consumption_bucket')
+    )
+
+    _backfill('meter_readings')
+    _backfill('ocr_results')
+    # aggregates ของข้อมูลเดิม: รัน `flask consumption rebuild` หลัง upgrade
+
+
+def downgrade():
+    op.drop_table('meter_consumption_buckets')
+    op.drop_table('meter_summaries')
+
+    with op.batch_alter_table('ocr_results', schema=None) as batch_op:
+        batch_op.drop_column('reading_value')
+
+    with op.batch_alter_table('meter_readings', schema=None) as batch_op:
+        batch_op.drop_column('reading_value')
@@ -1,7 +1,9 @@
+import os
 from app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
+    # dev server เท่านั้น (production: gunicorn -c gunicorn.conf.py wsgi:app)
     # 0.0.0.0 เพื่อให้ Device อื่นๆ หรือ Emulator เชื่อมต่อได้
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv("FLASK_DEBUG", "1") == "1")
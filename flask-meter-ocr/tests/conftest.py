@@ -0,0 +1,18 @@
+import pytest
+
+from app import create_app
+from app.models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_BINDS": {},
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from bench.run_bench import compare, percentile, run_corpus, summarize
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2, 3, 4], 90) == pytest.approx(3.7)
+
+
+def _fake_read_text(results):
+    def read_text(path):
+        result = results[os.path.basename(path)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return read_text
+
+
+def test_run_corpus_and_summary(tmp_path):
+    labels = [
+        {"file": "a.jpg", "serial": "1234567", "reading": "00012"},
+        {"file": "b.jpg", "serial": "7654321", "reading": "99999"},
+        {"file": "c.jpg", "serial": "1111111", "reading": "00001"},
+    ]
+    read_text = _fake_read_text({
+        "a.jpg": {"serial": "1234567", "reading": "00012", "tesseract_calls": 10,
+                  "timings": {"rotation": 0.1, "step1": 0.2}},
+        "b.jpg": {"serial": "7654321", "reading": "99990", "tesseract_calls": 30,
+                  "timings": {"rotation": 0.3}},
+        "c.jpg": RuntimeError("decode failed"),
+    })
+    per_image = run_corpus(str(tmp_path), labels, read_text)
+    assert [r["serial_ok"] for r in per_image] == [True, True, False]
+    assert per_image[2]["error"] == "decode failed"
+
+    summary = summarize(per_image)
+    assert summary["images"] == 3
+    assert summary["errors"] == 1
+    assert summary["accuracy"] == {"serial": 0.6667, "reading": 0.3333, "both": 0.3333}
+    assert summary["tesseract_calls"]["mean"] == 20
+    # stage ที่ไม่มีในบางรูปนับเป็น 0
+    assert summary["stage_mean_s"] == {"rotation": pytest.approx(0.1333), "step1": pytest.approx(0.0667)}
+    json.dumps(summary)  # ต้องเขียนเป็น JSON ได้
+
+
+def _summary(p50, p95, calls, serial, reading, both):
+    return {"latency_s": {"p50": p50, "p95": p95}, "tesseract_calls": {"mean": calls},
+            "accuracy": {"serial": serial, "reading": reading, "both": both}}
+
+
+def test_compare_flags_regressions():
+    baseline = _summary(1.0, 2.0, 20, 0.95, 0.90, 0.88)
+    assert compare(_summary(1.1, 2.3, 22, 0.94, 0.90, 0.87), baseline, 0.20, 0.02) == []
+
+    regressions = compare(_summary(1.5, 2.0, 30, 0.90, 0.90, 0.88), baseline, 0.20, 0.02)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("latency p50")
+    assert regressions[1].startswith("tesseract calls")
+    assert regressions[2].startswith("accuracy serial")
+
+
+def test_synthetic_corpus_is_reproducible(tmp_path):
+    pytest.importorskip("cv2")
+    from bench.synth import generate_corpus
+
+    first = generate_corpus(str(tmp_path / "a"), count=4, seed=7)
+    second = generate_corpus(str(tmp_path / "b"), count=4, seed=7)
+    with open(first, encoding="utf-8") as f:
+        labels = json.load(f)
+    with open(second, encoding="utf-8") as f:
+        assert json.load(f) == labels
+
+    import cv2
+    for item in labels:
+        img = cv2.imread(str(tmp_path / "a" / item["file"]))
+        assert len(item["serial"]) == 7 and len(item["reading"]) == 5
+        # หมุน 90 / 270 แล้วด้านกว้างกับด้านสูงสลับกัน
+        expected = (900, 1200) if item["augment"]["rotation"] in (90, 270) else (1200, 900)
+        assert img.shape[:2] == expected
@@ -0,0 +1,81 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.models import db
+from app.models.meter import Meter
+from app.models.meter_reading import MeterReading
+from app.models.meter_summary import MeterConsumptionBucket, MeterSummary
+from app.services import consumption
+
+READINGS = [
+    ("1000", datetime(2026, 1, 30, 8)),
+    ("1012.5", datetime(2026, 1, 30, 18)),
+    ("1040", datetime(2026, 1, 31, 9)),
+    ("1090", datetime(2026, 2, 1, 9)),
+    ("20", datetime(2026, 2, 3, 9)),  # เปลี่ยนมิเตอร์ -> ผลต่างติดลบไม่นับ
+    ("35", datetime(2026, 2, 3, 20)),
+    ("abc", datetime(2026, 2, 4, 9)),  # parse ไม่ได้ -> ไม่มีผลกับ aggregates
+    ("80", datetime(2026, 3, 1, 0)),
+]
+
+
+def _snapshot(meter_id):
+    summary = db.session.get(MeterSummary, meter_id)
+    buckets = {
+        (b.period, b.bucket_start): (Decimal(b.consumption), b.reading_count, Decimal(b.last_value))
+        for b in MeterConsumptionBucket.query.filter_by(meter_id=meter_id)
+    }
+    return (summary.latest_reading_id, summary.latest_value, summary.latest_at,
+            summary.previous_reading_id, summary.previous_value, summary.previous_at,
+            summary.reading_count), buckets
+
+
+def _add(meter_id, reading, at):
+    row = MeterReading(meter_id=meter_id, reading=reading, created_at=at)
+    db.session.add(row)
+    db.session.flush()
+    return row
+
+
+def _meter():
+    meter = Meter(serial_number="12345678")
+    db.session.add(meter)
+    db.session.commit()
+    return meter.id
+
+
+def test_incremental_equals_rebuild(app):
+    meter_id = _meter()
+    for reading, at in READINGS:
+        row = _add(meter_id, reading, at)
+        consumption.record_readings(meter_id, [(row.id, row.reading_value, row.created_at)])
+        db.session.commit()
+    incremental = _snapshot(meter_id)
+
+    consumption.rebuild_meter(meter_id)
+    db.session.commit()
+    assert _snapshot(meter_id) == incremental
+
+    summary, buckets = incremental
+    assert summary[1] == Decimal("80") and summary[4] == Decimal("35") and summary[6] == 7
+    assert buckets[("month", datetime(2026, 1, 1).date())][0] == Decimal("40")
+    assert buckets[("month", datetime(2026, 2, 1).date())][0] == Decimal("65")
+    assert buckets[("day", datetime(2026, 2, 3).date())][0] == Decimal("15")
+
+
+def test_backdated_batch_equals_rebuild(app):
+    meter_id = _meter()
+    rows = [_add(meter_id, reading, at) for reading, at in READINGS[4:]]
+    consumption.record_readings(meter_id, [(r.id, r.reading_value, r.created_at) for r in rows])
+    db.session.commit()
+
+    # bulk sync ย้อนหลัง -> rebuild บางส่วนตั้งแต่ต้นเดือนของ reading ที่เก่าสุด
+    rows = [_add(meter_id, reading, at) for reading, at in READINGS[:4]]
+    consumption.record_readings(meter_id, [(r.id, r.reading_value, r.created_at) for r in rows])
+    db.session.commit()
+    partial = _snapshot(meter_id)
+
+    consumption.rebuild_meter(meter_id)
+    db.session.commit()
+    assert _snapshot(meter_id) == partial
+
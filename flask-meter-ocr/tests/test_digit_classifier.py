@@ -0,0 +1,91 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from app.services import digit_classifier as dc  # noqa: E402
+from config import Config  # noqa: E402
+
+FONTS = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX)
+
+
+def _roi(text, font=cv2.FONT_HERSHEY_SIMPLEX, scale=2.0, thickness=5, inverse=False):
+    """ROI threshold แล้วแบบใน pipeline: ตัวเลขดำบนขาว (inverse = ขาวบนดำแบบ drum)"""
+    w = int(45 * scale * len(text)) + 40
+    h = int(40 * scale) + 30
+    img = np.full((h, w), 0 if inverse else 255, dtype=np.uint8)
+    cv2.putText(img, text, (20, h - 20), font, scale, 255 if inverse else 0, thickness, cv2.LINE_8)
+    return img
+
+
+def _training_set():
+    glyphs, labels = [], []
+    for font in FONTS:
+        for scale, thickness in ((1.6, 4), (2.0, 5), (2.4, 6)):
+            for glyph, digit in dc.label_glyphs([_roi("0123456789", font, scale, thickness)], "0123456789"):
+                glyphs.append(glyph)
+                labels.append(digit)
+    return glyphs, labels
+
+
+def test_segment_orders_glyphs_left_to_right():
+    glyphs = dc.segment(_roi("40719"))
+    assert len(glyphs) == 5
+    # drum (ขาวบนดำ) ได้ glyph ชุดเดียวกัน
+    assert len(dc.segment(_roi("40719", inverse=True))) == 5
+    assert dc.segment(np.full((40, 200), 255, np.uint8)) == []
+
+
+def test_features_are_normalised():
+    vector = dc.features(dc.normalize_glyph(dc.segment(_roi("8"))[0]))
+    assert vector.shape == (144,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_train_and_read_unseen_size(monkeypatch):
+    monkeypatch.setattr(Config, "DIGIT_CLASSIFIER_MIN_SIMILARITY", 0.5)
+    glyphs, labels = _training_set()
+    assert len(glyphs) == 60
+    model = dc.train(glyphs, labels, k=3)
+
+    for font in FONTS:
+        digits, confidence, char_conf = model.read(_roi("5082713", font, scale=1.8, thickness=5))
+        assert digits == "5082713"
+        assert confidence > 0
+        assert len(char_conf) == 7
+
+
+def test_save_load_round_trip(tmp_path, monkeypatch):
+    glyphs, labels = _training_set()
+    model = dc.train(glyphs, labels, per_class=3, k=3)
+    assert len(model) == 30
+    path = str(tmp_path / "models" / "digits.npz")
+    model.save(path)
+
+    loaded = dc.DigitModel.load(path)
+    assert (loaded.version, loaded.k, len(loaded)) == (model.version, 3, 30)
+    assert np.array_equal(loaded.vectors, model.vectors)
+
+    # โหลดครั้งเดียวต่อ process จาก DIGIT_MODEL_PATH
+    monkeypatch.setattr(Config, "DIGIT_CLASSIFIER_ENABLED", True)
+    monkeypatch.setattr(Config, "DIGIT_MODEL_PATH", path)
+    monkeypatch.setattr(dc, "_model", None)
+    monkeypatch.setattr(dc, "_model_loaded", False)
+    assert dc.get_model() is dc.get_model()
+    assert dc.model_version() == model.version
+
+
+def test_unknown_model_format_rejected(tmp_path):
+    path = tmp_path / "bad.npz"
+    np.savez(path, format=99, version="x", k=3, vectors=np.zeros((0, 144)), labels=np.zeros(0))
+    with pytest.raises(ValueError):
+        dc.DigitModel.load(str(path))
+
+
+def test_missing_model_disables_fast_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DIGIT_CLASSIFIER_ENABLED", True)
+    monkeypatch.setattr(Config, "DIGIT_MODEL_PATH", str(tmp_path / "missing.npz"))
+    monkeypatch.setattr(dc, "_model", None)
+    monkeypatch.setattr(dc, "_model_loaded", False)
+    assert dc.get_model() is None
+    assert dc.model_version() == "off"
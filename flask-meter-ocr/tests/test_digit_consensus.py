@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+
+from app.services import digit_classifier, ocr_engine, ocr_service  # noqa: E402
+from config import Config  # noqa: E402
+
+PSMS = (7, 8, 6)
+
+
+class FakeModel:
+    """ผลของ classifier ต่อ threshold (ตามลำดับ) -> (digits, confidence, char_conf) | None"""
+
+    def __init__(self, reads):
+        self.reads = reads
+
+    def read(self, binary):
+        return self.reads[int(binary[0, 0])]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(Config, "OCR_CONSENSUS_QUORUM", 2)
+    monkeypatch.setattr(Config, "OCR_CONSENSUS_MIN_CONF", 60)
+    monkeypatch.setattr(Config, "DIGIT_CLASSIFIER_MIN_CONF", 0.8)
+    monkeypatch.setattr(Config, "OCR_PARALLEL_WORKERS", 0)
+    calls = []
+
+    def image_to_data(img, config=""):
+        calls.append(config)
+        return {"text": ["01234"], "conf": [90.0], "left": [0], "top": [0], "width": [1], "height": [1]}
+
+    monkeypatch.setattr(ocr_engine, "image_to_data", image_to_data)
+    return calls
+
+
+def _thresholds():
+    # pixel แรกบอกลำดับของ threshold ให้ FakeModel
+    return [np.full((40, 120), i, dtype=np.uint8) for i in range(3)]
+
+
+def _use_model(monkeypatch, reads):
+    monkeypatch.setattr(digit_classifier, "get_model", lambda: FakeModel(reads))
+
+
+def test_confident_classifier_skips_tesseract(engine, monkeypatch):
+    _use_model(monkeypatch, [("01234", 0.9, ()), ("01234", 1.0, ()), None])
+    results = ocr_service._ocr_digit_combos("reading", _thresholds(), PSMS)
+    assert engine == []
+    assert [c.method for c in results] == ["m1_knn", "m2_knn"]
+
+
+def test_single_classifier_vote_needs_one_tesseract_agreement(engine, monkeypatch):
+    # classifier มั่นใจแค่ threshold เดียว (อีกตัวต่ำกว่าเกณฑ์ไม่นับ) -> โหวตร่วมกับ Tesseract
+    # classifier กับ Tesseract เป็นคนละตัวอ่าน นับเป็นคนละเสียงแม้ใช้ threshold เดียวกัน
+    _use_model(monkeypatch, [("01234", 0.9, ()), ("01234", 0.5, ()), None])
+    results = ocr_service._ocr_digit_combos("reading", _thresholds(), PSMS)
+    assert [c.method for c in results] == ["m1_knn", "m1_psm7"]
+    assert len(engine) == 1
+
+
+def test_psm_variants_of_one_threshold_are_one_vote(engine, monkeypatch):
+    monkeypatch.setattr(digit_classifier, "get_model", lambda: None)
+    results = ocr_service._ocr_digit_combos("reading", _thresholds()[:1], PSMS)
+    # threshold เดียว -> ไม่มีทางครบ quorum ต้องรันครบทุก psm
+    assert [c.method for c in results] == ["m1_psm7", "m1_psm8", "m1_psm6"]
+
+
+def test_classifier_disagreement_falls_back_to_tesseract(engine, monkeypatch):
+    _use_model(monkeypatch, [("01239", 0.9, ()), None, None])
+    results = ocr_service._ocr_digit_combos("reading", _thresholds(), PSMS)
+    assert results[0].digits == "01239"
+    assert [c.method for c in results[1:]] == ["m1_psm7", "m2_psm7"]
+    assert {c.digits for c in results[1:]} == {"01234"}
+
+
+def test_no_model_uses_tesseract_only(engine, monkeypatch):
+    monkeypatch.setattr(digit_classifier, "get_model", lambda: None)
+    results = ocr_service._ocr_digit_combos("reading", _thresholds(), PSMS)
+    assert [c.method for c in results] == ["m1_psm7", "m2_psm7"]
+    assert all("--psm 7" in config for config in engine)
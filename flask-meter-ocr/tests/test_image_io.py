@@ -0,0 +1,93 @@
+import io
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from app.services import image_io  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _jpeg(width, height, orientation=None):
+    """JPEG พื้นดำ มุมซ้ายบนเป็นสี่เหลี่ยมขาว (ไว้ดูว่าหมุนไปทางไหน)"""
+    img = Image.new("RGB", (width, height))
+    img.paste((255, 255, 255), (0, 0, width // 4, height // 4))
+    exif = Image.Exif()
+    if orientation:
+        exif[image_io.EXIF_ORIENTATION_TAG] = orientation
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=95, exif=exif)
+    return buf.getvalue()
+
+
+def _bright_corner(img):
+    h, w = img.shape[:2]
+    corners = {"tl": img[: h // 8, : w // 8], "tr": img[: h // 8, -w // 8:],
+               "bl": img[-h // 8:, : w // 8], "br": img[-h // 8:, -w // 8:]}
+    return max(corners, key=lambda k: corners[k].mean())
+
+
+def test_decode_flag_keeps_long_side_above_target():
+    assert image_io.decode_flag(8000, 6000, 3200) == cv2.IMREAD_REDUCED_COLOR_2
+    assert image_io.decode_flag(8000, 6000, 1000) == cv2.IMREAD_REDUCED_COLOR_8
+    assert image_io.decode_flag(3000, 2000, 3200) == cv2.IMREAD_COLOR
+    assert image_io.decode_flag(None, None, 3200) == cv2.IMREAD_COLOR
+    assert image_io.decode_flag(8000, 6000, 0) == cv2.IMREAD_COLOR
+
+
+def test_fit_max_side_only_shrinks():
+    img = np.zeros((300, 400, 3), dtype=np.uint8)
+    assert image_io.fit_max_side(img, 200).shape == (150, 200, 3)
+    assert image_io.fit_max_side(img, 1000) is img
+    assert image_io.fit_max_side(img, 0) is img
+
+
+def test_reduced_decode_caps_resolution():
+    img, orientation = image_io.decode_image(_jpeg(2400, 1600), max_side=500)
+    assert orientation is None
+    assert img.shape == (333, 500, 3)
+
+
+@pytest.mark.parametrize("orientation, shape, corner", [
+    (1, (120, 160), "tl"),
+    (3, (120, 160), "br"),
+    (6, (160, 120), "tr"),   # หมุนตามเข็ม 90
+    (8, (160, 120), "bl"),   # หมุนทวนเข็ม 90
+])
+def test_exif_orientation_applied_once(orientation, shape, corner):
+    img, found = image_io.decode_image(_jpeg(160, 120, orientation), max_side=0)
+    assert found == orientation
+    assert img.shape[:2] == shape
+    assert _bright_corner(img) == corner
+
+
+def test_exif_orientation_with_reduced_decode(tmp_path):
+    data = _jpeg(1600, 1200, 6)
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(data)
+    img, orientation = image_io.load_image(str(path), max_side=400)
+    assert orientation == 6
+    assert img.shape[:2] == (400, 300)
+    assert _bright_corner(img) == "tr"
+
+
+def test_fit_memory_budget(monkeypatch):
+    img = np.zeros((2000, 3000, 3), dtype=np.uint8)
+    monkeypatch.setattr(Config, "OCR_MEMORY_BUDGET_MB", 0)
+    same, _, estimate = image_io.fit_memory_budget(img)
+    assert same is img
+
+    monkeypatch.setattr(Config, "OCR_MEMORY_BUDGET_MB", 16)
+    small, det_scale, estimate = image_io.fit_memory_budget(img)
+    assert small.shape[1] < 3000
+    # ภาพ detection ต้องเล็กลงด้วย ไม่ใช่ขยายกลับจนเกิน budget
+    assert det_scale == image_io.detection_scale(2000, 3000)
+    assert estimate == image_io.working_set_bytes(*small.shape[:2], det_scale)
+    assert estimate <= 16 * 1024 * 1024
+
+
+def test_undecodable_bytes():
+    assert image_io.decode_image(b"") == (None, None)
+    assert image_io.decode_image(b"not an image") == (None, None)
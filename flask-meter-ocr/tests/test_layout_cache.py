@@ -0,0 +1,121 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from app.services import layout_cache  # noqa: E402
+from config import Config  # noqa: E402
+
+ROIS = {"reading": (0.1, 0.2, 0.5, 0.2), "serial": (0.1, 0.6, 0.6, 0.15)}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(Config, "LAYOUT_CACHE_ENABLED", True)
+    monkeypatch.setattr(layout_cache, "_counters", dict.fromkeys(layout_cache._counters, 0))
+    layout_cache.clear()
+    yield
+    layout_cache.clear()
+
+
+def _face(seed, size=(300, 400)):
+    """หน้ามิเตอร์จำลอง: สี่เหลี่ยมตำแหน่งสุ่มตาม seed"""
+    rng = np.random.default_rng(seed)
+    img = np.full(size, 200, dtype=np.uint8)
+    for _ in range(6):
+        x, y = int(rng.integers(0, size[1] - 60)), int(rng.integers(0, size[0] - 40))
+        cv2.rectangle(img, (x, y), (x + 60, y + 40), int(rng.integers(0, 120)), -1)
+    return img
+
+
+def test_same_model_photo_hits_template():
+    face = _face(1)
+    layout_cache.learn(*layout_cache.descriptor(face), "1234567", ROIS)
+    # ถ่ายใหม่: สว่างขึ้น + noise + ความละเอียดต่างกัน
+    noisy = np.clip(face.astype(np.int16) + 25 + np.random.default_rng(0).integers(-8, 8, face.shape), 0, 255)
+    again = cv2.resize(noisy.astype(np.uint8), (600, 450))
+    layout, source, score = layout_cache.lookup(*layout_cache.descriptor(again))
+    assert source == "template" and score >= Config.LAYOUT_MATCH_MIN_SCORE
+    assert layout.rois == ROIS
+
+    assert layout_cache.lookup(*layout_cache.descriptor(_face(2))) is None
+    # สัดส่วนภาพต่างกันมาก -> ไม่เทียบ
+    assert layout_cache.lookup(*layout_cache.descriptor(cv2.resize(face, (400, 150)))) is None
+    assert layout_cache.stats()["hit_rate"] == pytest.approx(0.333, abs=1e-3)
+
+
+def test_serial_hint_hits_without_matching_face():
+    layout_cache.learn(*layout_cache.descriptor(_face(1)), "1234567", ROIS)
+    layout, source, _ = layout_cache.lookup(*layout_cache.descriptor(_face(2)), serial_hint="1234567")
+    assert source == "serial" and layout.rois == ROIS
+    assert layout_cache.lookup(*layout_cache.descriptor(_face(2)), serial_hint="7654321") is None
+
+
+def test_relearning_updates_existing_template():
+    face = _face(1)
+    layout_cache.learn(*layout_cache.descriptor(face), "1234567", ROIS)
+    moved = {"reading": (0.12, 0.2, 0.5, 0.2), "serial": ROIS["serial"]}
+    layout_cache.learn(*layout_cache.descriptor(face), "7654321", moved)
+    stats = layout_cache.stats()
+    assert (stats["templates"], stats["serials"]) == (1, 2)
+    assert layout_cache.lookup(*layout_cache.descriptor(face))[0].rois == moved
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(Config, "LAYOUT_CACHE_ENTRIES", 2)
+    for seed in (1, 2, 3):
+        layout_cache.learn(*layout_cache.descriptor(_face(seed)), f"serial{seed}", ROIS)
+    assert layout_cache.stats()["templates"] == 2
+    assert layout_cache.lookup(*layout_cache.descriptor(_face(1))) is None
+    assert layout_cache.lookup(*layout_cache.descriptor(_face(3))) is not None
+
+
+def test_crop_with_margin_is_clamped(monkeypatch):
+    monkeypatch.setattr(Config, "LAYOUT_ROI_MARGIN", 0.05)
+    img = np.zeros((100, 200), dtype=np.uint8)
+    assert layout_cache.normalize_roi((20, 10, 100, 50), 200, 100) == (0.1, 0.1, 0.5, 0.5)
+    assert layout_cache.crop(img, (0.1, 0.1, 0.5, 0.5)).shape == (60, 120)
+    assert layout_cache.crop(img, (0.0, 0.0, 1.0, 1.0)).shape == (100, 200)
+    assert layout_cache.crop(img, (1.2, 0.1, 0.1, 0.1)) is None
+
+
+@pytest.fixture
+def blank_engine(monkeypatch):
+    """Tesseract ไม่อ่านอะไรได้เลย (ไม่ต้องมี tesseract ในเครื่อง)"""
+    pytest.importorskip("pytesseract")
+    from app.services import ocr_engine, ocr_service
+
+    keys = ("text", "conf", "left", "top", "width", "height")
+    monkeypatch.setattr(ocr_engine, "image_to_string", lambda img, config="": "")
+    monkeypatch.setattr(ocr_engine, "image_to_data", lambda img, config="": {k: [] for k in keys})
+    monkeypatch.setattr(ocr_engine, "detect_orientation", lambda img: None)
+    monkeypatch.setattr(Config, "DIGIT_CLASSIFIER_ENABLED", False)
+    monkeypatch.setattr(Config, "OCR_PARALLEL_WORKERS", 0)
+    return ocr_service
+
+
+def _learn_sample():
+    from app.services.warmup import _sample_image
+    img = _sample_image()
+    layout_cache.learn(*layout_cache.descriptor(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)), "5678901", ROIS)
+    return img
+
+
+def test_unreadable_layout_falls_back_to_full_pipeline(blank_engine):
+    result = blank_engine.read_image(_learn_sample(), source="test")
+    assert result["layout"]["used"] is False
+    assert "step1_global" in result["timings"]  # ทำ pipeline เดิมต่อ
+    assert layout_cache.stats()["fallbacks"] == 1
+
+
+def test_readable_layout_skips_global_detection(blank_engine, monkeypatch):
+    def read_with_layout(img, layout, final_result, *args):
+        final_result.update({"serial": "5678901", "reading": "01234"})
+        return True, True, None
+
+    monkeypatch.setattr(blank_engine, "_read_with_layout", read_with_layout)
+    result = blank_engine.read_image(_learn_sample(), source="test")
+    assert result["layout"]["used"] is True
+    assert (result["serial"], result["reading"]) == ("5678901", "01234")
+    assert "step1_global" not in result["timings"]
+    assert layout_cache.stats()["used"] == 1
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+
+from app.models import db  # noqa: E402
+from app.services import digit_classifier, ocr_cache, ocr_service  # noqa: E402
+from config import Config  # noqa: E402
+
+OCR_DATA = {"text": "kWh 01234", "serial": None, "reading": "01234"}
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "SERIAL_INDEX_ENABLED", False)
+    monkeypatch.setattr(digit_classifier, "model_version", lambda: "20260101000000")
+    ocr_cache._memory.clear()
+    yield ocr_cache
+    ocr_cache._memory.clear()
+
+
+def _store(key):
+    ocr_cache.store(key, "uploads/a.jpg", OCR_DATA, 10)
+    db.session.commit()
+
+
+def test_same_bytes_same_version_hits(cache):
+    key = ocr_cache.make_key(b"photo")
+    _store(key)
+    assert ocr_cache.make_key(b"photo") == key
+    ocr_cache._memory.clear()  # ผ่าน tier DB ด้วย
+    assert ocr_cache.lookup(key)["reading"] == "01234"
+
+
+def test_new_digit_model_invalidates_key(cache, monkeypatch):
+    key = ocr_cache.make_key(b"photo")
+    _store(key)
+    monkeypatch.setattr(digit_classifier, "model_version", lambda: "20260202000000")
+    new_key = ocr_cache.make_key(b"photo")
+    assert new_key != key
+    assert ocr_cache.lookup(new_key) is None
+
+
+def test_new_engine_version_invalidates_key(cache, monkeypatch):
+    key = ocr_cache.make_key(b"photo")
+    _store(key)
+    monkeypatch.setattr(ocr_service, "ENGINE_VERSION", "999")
+    new_key = ocr_cache.make_key(b"photo")
+    assert new_key != key
+    assert ocr_cache.lookup(new_key) is None
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pytesseract")
+
+from app.services import ocr_engine  # noqa: E402
+from app.services.ocr_engine import TesseractPool, parse_config  # noqa: E402
+from config import Config  # noqa: E402
+
+
+class FakeApi:
+    def __init__(self):
+        self.variables = {"tessedit_char_whitelist": ""}
+        self.psm = None
+        self.image = None
+        self.cleared = 0
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def GetVariableAsString(self, key):
+        return self.variables.get(key)
+
+    def SetVariable(self, key, value):
+        self.variables[key] = value
+
+    def SetImageBytes(self, data, w, h, bpp, bpl):
+        self.image = (w, h, bpp, bpl, data)
+
+    def GetUTF8Text(self):
+        return f"psm={self.psm} wl={self.variables['tessedit_char_whitelist']}"
+
+    def Clear(self):
+        self.cleared += 1
+
+
+def test_parse_config():
+    assert parse_config("") == (3, {})
+    assert parse_config("--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789") == (
+        7, {"tessedit_char_whitelist": "0123456789"})
+    assert parse_config("--psm 8 digits") == (8, {"tessedit_char_whitelist": "0123456789-."})
+
+
+def test_pool_reuses_engines_up_to_size(monkeypatch):
+    pool = TesseractPool(2)
+    created = []
+    monkeypatch.setattr(pool, "_create", lambda: created.append(FakeApi()) or created[-1])
+
+    for _ in range(5):
+        with pool.acquire():
+            pass
+    assert len(created) == 1  # ใช้ตัวเดิมซ้ำ ไม่สร้างใหม่ทุกครั้ง
+
+    with pool.acquire() as a, pool.acquire() as b:
+        assert a is not b
+        assert pool.stats() == {"size": 2, "created": 2, "in_use": 2}
+
+        # pool เต็ม -> คนที่สามต้องรอจนมี engine คืน
+        got = []
+
+        def wait():
+            with pool.acquire():
+                got.append(True)
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        waiter.join(0.1)
+        assert not got
+    waiter.join(1)
+    assert got and len(created) == 2
+
+
+def test_pool_warmup_creates_all(monkeypatch):
+    pool = TesseractPool(3)
+    monkeypatch.setattr(pool, "_create", FakeApi)
+    pool.warmup()
+    assert pool.stats()["created"] == 3
+
+
+def test_configured_call_restores_variables(monkeypatch):
+    api = FakeApi()
+    pool = TesseractPool(1)
+    monkeypatch.setattr(pool, "_create", lambda: api)
+    monkeypatch.setattr(ocr_engine, "engine_name", lambda: "tesserocr")
+    monkeypatch.setattr(ocr_engine, "get_pool", lambda: pool)
+
+    img = np.zeros((4, 6, 3), dtype=np.uint8)
+    img[..., 0] = 255  # BGR -> ต้องส่งเป็น RGB
+    text = ocr_engine.image_to_string(img, config="--psm 7 digits")
+    assert text == "psm=7 wl=0123456789-."
+    # PSM / whitelist เป็นของการเรียกครั้งนั้นเท่านั้น
+    assert api.variables["tessedit_char_whitelist"] == ""
+    assert api.cleared == 1
+    w, h, bpp, bpl, data = api.image
+    assert (w, h, bpp, bpl) == (6, 4, 3, 18)
+    assert data[:3] == bytes([0, 0, 255])
+
+
+def test_engine_falls_back_to_pytesseract(monkeypatch):
+    monkeypatch.setattr(Config, "OCR_ENGINE", "pytesseract")
+    assert ocr_engine.engine_name() == "pytesseract"
+    monkeypatch.setattr(Config, "OCR_ENGINE", "tesserocr")
+    monkeypatch.setattr(ocr_engine, "tesserocr", None)
+    assert ocr_engine.engine_name() == "pytesseract"
+    assert ocr_engine.pool_stats() == {"engine": "pytesseract"}
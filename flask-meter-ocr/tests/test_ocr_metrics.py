@@ -0,0 +1,77 @@
+import pytest
+
+from app.services import ocr_metrics
+from config import Config
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """metric ที่สร้างใน test ไม่ค้างอยู่ใน registry ของ process"""
+    monkeypatch.setattr(ocr_metrics, "_registry", [])
+    monkeypatch.setattr(ocr_metrics, "_collectors", [])
+    return ocr_metrics
+
+
+def test_counter_and_histogram_render(registry):
+    calls = ocr_metrics.Counter("t_calls_total", "calls", ["step"])
+    calls.inc(step="anchor")
+    calls.inc(2, step="anchor")
+    calls.inc(step='fall"back')
+    seconds = ocr_metrics.Histogram("t_seconds", "latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 3):
+        seconds.observe(value)
+
+    text = ocr_metrics.render()
+    assert "# TYPE t_calls_total counter" in text
+    assert 't_calls_total{step="anchor"} 3' in text
+    assert 't_calls_total{step="fall\\"back"} 1' in text
+    # bucket นับสะสม (cumulative) แบบ Prometheus
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1"} 2' in text
+    assert 't_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_seconds_sum 3.55" in text
+    assert "t_seconds_count 3" in text
+
+
+def test_failing_collector_is_skipped(registry):
+    @registry.register_collector
+    def broken():
+        raise RuntimeError("db down")
+
+    @registry.register_collector
+    def gauge():
+        return [("t_gauge", "gauge", "g", [({"state": "live"}, 7)])]
+
+    assert 't_gauge{state="live"} 7' in ocr_metrics.render()
+
+
+def test_request_scope_counts_tesseract_calls(registry):
+    with ocr_metrics.request_scope() as counter:
+        assert ocr_metrics.inflight() == 1
+        ocr_metrics.count_tesseract_call()
+        ocr_metrics.count_tesseract_call(3)
+    assert counter == [4]
+    assert ocr_metrics.inflight() == 0
+    ocr_metrics.count_tesseract_call()  # นอก scope ไม่นับเข้า request ไหน
+    assert counter == [4]
+
+
+def test_stage_timer_accumulates_repeated_stages(monkeypatch):
+    ticks = iter([0.0, 1.0, 1.5, 4.0, 5.0])
+    monkeypatch.setattr(ocr_metrics.time, "perf_counter", lambda: next(ticks))
+    timer = ocr_metrics.StageTimer()
+    assert timer.mark("rotation") == 1.0
+    timer.mark("step1")
+    timer.mark("rotation")
+    assert timer.stages == {"rotation": 3.5, "step1": 0.5}
+    assert timer.total() == 5.0
+
+
+def test_metrics_endpoint_token(app, monkeypatch):
+    client = app.test_client()
+    assert client.get("/api/metrics").status_code == 200
+    monkeypatch.setattr(Config, "METRICS_TOKEN", "secret")
+    assert client.get("/api/metrics").status_code == 401
+    response = client.get("/api/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "# TYPE http_request_seconds histogram" in response.get_data(as_text=True)
@@ -0,0 +1,77 @@
+import multiprocessing
+import random
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pytesseract")
+
+from app.services import ocr_engine, ocr_parallel  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _fake_ocr(img, config=""):
+    # เสร็จไม่ตามลำดับที่ส่ง เพื่อให้เห็นว่าผลยังเรียงตามลำดับเดิม
+    time.sleep(random.random() * 0.02)
+    if "fail" in config:
+        raise RuntimeError(config)
+    return f"{config}:{int(img.sum())}:{img.shape}"
+
+
+def _calls():
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, size=(20 + i, 30, 3), dtype=np.uint8) for i in range(3)]
+    gray = images[0][:, :, 0].copy()
+    calls = [("string", img, f"--psm {psm}") for img in images for psm in (6, 7, 8)]
+    calls.append(("string", gray, "--psm 7 digits"))
+    calls.append(("string", images[1], "--psm 7 fail"))
+    return calls
+
+
+def _results(calls):
+    return [repr(r) if isinstance(r, Exception) else r for r in ocr_parallel.imap(calls)]
+
+
+@pytest.fixture
+def patched_engine(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "image_to_string", _fake_ocr)
+    yield
+    ocr_parallel.shutdown()
+
+
+def test_parallel_imap_matches_serial(monkeypatch, patched_engine):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("ต้องใช้ fork ให้ worker เห็น engine ที่ patch ไว้")
+    calls = _calls()
+
+    monkeypatch.setattr(Config, "OCR_PARALLEL_WORKERS", 0)
+    serial = _results(calls)
+
+    monkeypatch.setattr(Config, "OCR_PARALLEL_WORKERS", 3)
+    monkeypatch.setattr(Config, "OCR_PARALLEL_START_METHOD", "fork")
+    assert _results(calls) == serial
+    assert serial[-1] == repr(RuntimeError("--psm 7 fail"))
+
+
+def test_run_branches_keeps_argument_order(monkeypatch, patched_engine):
+    def branch(value):
+        def run():
+            time.sleep(0.02 if value == "reading" else 0)
+            return value
+        return run
+
+    monkeypatch.setattr(Config, "OCR_PARALLEL_WORKERS", 4)
+    assert ocr_parallel.run_branches(branch("reading"), branch("serial")) == ["reading", "serial"]
+
+
+def test_shared_image_round_trip():
+    img = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+    shared = ocr_parallel.SharedImage(img)
+    try:
+        shm, view = ocr_parallel._attach(shared.ref)
+        assert np.array_equal(view, img)
+        del view
+        shm.close()
+    finally:
+        shared.close()
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import PaginationError, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("created_at, row_id", [
+    (datetime(2026, 1, 31, 23, 59, 59), 1),
+    (datetime(2026, 5, 2, 8, 30, 0, 123456), 987654321),
+])
+def test_cursor_round_trip(created_at, row_id):
+    cursor = encode_cursor(created_at, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "MjAyNi0wMS0zMQ"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(PaginationError):
+        decode_cursor(cursor)
@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from app.services import preprocess_graph as pg  # noqa: E402
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def img():
+    return np.random.default_rng(0).integers(0, 255, size=(60, 80, 3), dtype=np.uint8)
+
+
+def test_memoised_per_input_and_params(img, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_PREPROCESS_CACHE", True)
+    with pg.scope() as graph:
+        gray = pg.gray(img)
+        assert pg.gray(img) is gray
+        first = pg.clahe(gray, 2.0, 8)
+        assert pg.clahe(gray, 2.0, 8) is first
+        assert pg.clahe(gray, 3.0, 8) is not first  # params ต่าง -> คำนวณใหม่
+        # ผลเหมือนคำนวณตรงๆ
+        direct = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(
+            cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+        assert np.array_equal(first, direct)
+        assert graph.stats()["hits"] == 2
+        assert graph.stats()["misses"] == 3
+    assert len(graph) == 0  # จบ request ทิ้งทั้งหมด
+
+
+def test_equal_content_different_array_is_a_miss(img, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_PREPROCESS_CACHE", True)
+    with pg.scope() as graph:
+        pg.gray(img)
+        pg.gray(img.copy())
+        assert graph.stats()["misses"] == 2
+
+
+def test_release_drops_whole_chain(img, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_PREPROCESS_CACHE", True)
+    other = img.copy()
+    with pg.scope() as graph:
+        pg.otsu(pg.clahe(pg.gray(img)))
+        pg.gray(other)
+        assert len(graph) == 4
+        pg.release(img)
+        assert len(graph) == 1  # เหลือแค่ node ของภาพอื่น
+        pg.gray(img)
+        assert graph.stats()["misses"] == 5
+
+
+def test_disabled_computes_directly(img, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_PREPROCESS_CACHE", False)
+    with pg.scope() as graph:
+        assert graph is None
+        a, b = pg.sharpen(img), pg.sharpen(img)
+        assert a is not b and np.array_equal(a, b)
+    # นอก scope ก็คำนวณตรงๆ
+    assert pg.resize(img, 1) is img
+    assert pg.resize(img, 0.5).shape == (30, 40, 3)
+
+
+def test_clahe_object_reused_per_thread():
+    mine = pg.clahe_for(2.0, 8)
+    assert pg.clahe_for(2.0, 8) is mine
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pg.clahe_for(2.0, 8)))
+    thread.start()
+    thread.join()
+    assert other[0] is not mine
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from app.services.reading_prior import ReadingPrior
+from config import Config
+
+
+def test_expected_range_grows_with_elapsed_days(monkeypatch):
+    monkeypatch.setattr(Config, "READING_PRIOR_TOLERANCE", 5)
+    last_at = datetime(2026, 3, 1)
+    prior = ReadingPrior(1000.4, last_at, max_daily_delta=20)
+
+    assert prior.expected_range(last_at + timedelta(days=2)) == (1000, 1000.4 + 40 + 5)
+    assert prior.expected_range(last_at + timedelta(days=10))[1] == 1000.4 + 200 + 5
+    # อ่านซ้ำทันทีก็ยังเผื่อไว้อย่างน้อย 1 ชั่วโมง
+    assert prior.expected_range(last_at) == (1000, 1000.4 + 20 / 24 + 5)
+
+
+def test_plausible(monkeypatch):
+    monkeypatch.setattr(Config, "READING_PRIOR_TOLERANCE", 5)
+    last_at = datetime(2026, 3, 1)
+    prior = ReadingPrior(1000, last_at, max_daily_delta=20)
+    at = last_at + timedelta(days=1)
+
+    assert prior.plausible("1000", at)
+    assert prior.plausible("1025", at)
+    assert not prior.plausible("1026", at)
+    assert not prior.plausible("999", at)
+    assert not prior.plausible("10a0", at)
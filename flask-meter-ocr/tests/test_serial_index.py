@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+from app.models import db
+from app.models.meter import Meter
+from app.services import serial_index
+from app.services.serial_index import SerialIndex, levenshtein
+from config import Config
+
+
+def test_levenshtein():
+    assert levenshtein("12345", "12345") == 0
+    assert levenshtein("12345", "12845") == 1
+    assert levenshtein("12345", "1234") == 1
+    assert levenshtein("12345", "54321") == 4
+    assert levenshtein("12345", "99999999", max_distance=2) == 3
+
+
+def _brute_force(words, query, max_distance):
+    return sorted((levenshtein(query, w), w) for w in words if levenshtein(query, w) <= max_distance)
+
+
+def test_search_equals_brute_force():
+    rng = random.Random(0)
+    words = {"".join(rng.choice("0123456789") for _ in range(rng.randint(6, 9))) for _ in range(300)}
+    built, added = sorted(words)[:200], sorted(words)[200:]
+    index = SerialIndex(built)
+    for word in added:  # ส่วนที่ add หลัง build ต้องหาเจอเหมือนกัน
+        index.add(word)
+    assert len(index) == len(words)
+
+    for _ in range(50):
+        query = "".join(rng.choice("0123456789") for _ in range(8))
+        for max_distance in (0, 1, 2, 3):
+            assert index.search(query, max_distance) == _brute_force(words, query, max_distance)
+    # query ที่ใกล้กับ serial ที่มีอยู่จริง (ระยะ 1-2)
+    for word in rng.sample(sorted(words), 30):
+        query = word[:2] + word[3:] + "7"
+        for max_distance in (1, 2):
+            assert index.search(query, max_distance) == _brute_force(words, query, max_distance)
+
+
+def test_alphanumeric_serials_within_two_edits():
+    words = ["AB12345", "AB12354", "XY99999", "AC1234"]
+    index = SerialIndex(words)
+    index.add("ZZ12345")
+    for query in ("AB1234", "A812345", "ZB12345", "XY9999Q"):
+        assert index.search(query, 2) == _brute_force(words + ["ZZ12345"], query, 2)
+
+def test_search_ranked_by_distance():
+    index = SerialIndex(["12345678", "12345670", "12340000", "99999999"])
+    hits = index.search("12345679", 4)
+    assert [d for d, _ in hits] == sorted(d for d, _ in hits)
+    assert hits[0][0] == 1
+    assert {s for _, s in hits} == {"12345678", "12345670", "12340000"}
+
+
+def test_match_exact_confident_and_ambiguous(monkeypatch):
+    monkeypatch.setattr(Config, "SERIAL_MATCH_MAX_DISTANCE", 1)
+    index = SerialIndex(["12345678", "12345670", "55555555"])
+
+    assert index.match("55555555") == ("55555555", 0, True)
+    assert index.match("55555556") == ("55555555", 1, True)
+    # ห่าง 1 จากสอง serial เท่ากัน -> ไม่มั่นใจ
+    assert index.match("12345679")[1:] == (1, False)
+    assert index.match("00000000") is None
+
+
+def test_removed_serial_is_not_matched():
+    index = SerialIndex(["12345678", "87654321"])
+    index.remove("12345678")
+    assert index.search("12345678", 1) == []
+    assert len(index) == 1
+
+
+def test_readded_serial_is_matched_again():
+    index = SerialIndex(["12345678", "87654321"])
+    index.remove("12345678")
+    index.add("12345678")
+    assert index.search("12345679", 1) == [(1, "12345678")]
+    assert not index.tombstones
+
+
+def test_compaction_after_many_changes():
+    index = SerialIndex([f"{i:08d}" for i in range(1000)])
+    assert not index.needs_compaction()
+    for i in range(1000, 1200):
+        index.add(f"{i:08d}")
+    assert index.needs_compaction()
+
+
+@pytest.fixture
+def meters(app):
+    for serial in ("11111111", "22222222", "33333333"):
+        db.session.add(Meter(serial_number=serial))
+    db.session.commit()
+    yield
+    serial_index._index = None
+
+
+def test_index_not_built_on_request_path(app, meters, monkeypatch):
+    started = []
+    monkeypatch.setattr(serial_index, "_refresh_async", lambda: started.append(True))
+    monkeypatch.setattr(serial_index, "_index", None)
+    # ยังไม่มี index -> ไม่ snap, ไม่ block; สั่ง build ใน background แทน
+    assert serial_index.matcher() is None
+    assert serial_index.suggest("11111112") == []
+    assert started
+
+
+def test_background_build_serves_old_index_until_ready(app, meters, monkeypatch):
+    monkeypatch.setattr(serial_index, "_index", None)
+    assert serial_index.get_index() is None
+    assert serial_index._refreshing.acquire(timeout=10)  # รอ background build เสร็จ
+    serial_index._refreshing.release()
+    assert serial_index.stats()["serials"] == 3
+
+
+def test_sync_applies_changes_from_other_processes(app, meters):
+    index = serial_index.build()
+    assert serial_index.snap("11111112") == "11111111"
+
+    # process อื่นเพิ่ม / ลบมิเตอร์ตรงใน DB
+    db.session.add(Meter(serial_number="44444444"))
+    Meter.query.filter_by(serial_number="22222222").delete()
+    db.session.commit()
+    with serial_index._lock:
+        serial_index._sync(index)
+
+    assert serial_index._index is index  # แก้ที่ index เดิม ไม่ build ใหม่
+    assert index.exact == {"11111111", "33333333", "44444444"}
+    assert serial_index.snap("44444445") == "44444444"
+    assert serial_index.snap("22222223") is None
+    assert index.signature == serial_index._db_signature()
@@ -0,0 +1,70 @@
+import io
+import os
+
+import pytest
+
+from app.services import upload_store
+
+
+def test_unique_path_never_collides(tmp_path):
+    paths = {upload_store.unique_path(str(tmp_path), "image.jpg") for _ in range(100)}
+    assert len(paths) == 100
+    path = upload_store.unique_path(str(tmp_path), "../../etc/passwd")
+    assert os.path.dirname(path) == str(tmp_path)
+    assert path.endswith("_etc_passwd")
+
+
+def test_save_async_writes_complete_file(tmp_path):
+    path = os.path.join(tmp_path, "nested", "a.jpg")
+    upload_store.save_async(path, b"jpeg bytes")
+    upload_store._queue.join()
+    with open(path, "rb") as f:
+        assert f.read() == b"jpeg bytes"
+    assert not os.path.exists(f"{path}.part")
+    assert upload_store.pending() == 0
+
+
+def test_same_filename_uploads_keep_their_own_image(app, tmp_path, monkeypatch):
+    pytest.importorskip("cv2")
+    from flask_jwt_extended import create_access_token
+
+    from app.models.ocr_result import OCRResult
+    from app.routes import ocr as ocr_routes
+    from app.services import ocr_service
+
+    monkeypatch.setattr(ocr_routes, "UPLOAD_DIR", str(tmp_path))
+    # OCR จาก bytes ใน memory ที่ส่งมา (ไม่อ่านไฟล์กลับจาก disk)
+    monkeypatch.setattr(ocr_service, "read_bytes",
+                        lambda data, **kwargs: {"text": data.decode(), "serial": None, "reading": None})
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-with-at-least-32-bytes"
+    headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+    client = app.test_client()
+
+    for body in (b"first photo", b"second photo"):
+        response = client.post("/api/ocr", headers=headers, content_type="multipart/form-data",
+                               data={"image": (io.BytesIO(body), "image.jpg")})
+        assert response.status_code == 200
+        assert response.get_json()["text"] == body.decode()
+    upload_store._queue.join()
+
+    records = OCRResult.query.order_by(OCRResult.id).all()
+    assert records[0].image_path != records[1].image_path
+    for record, body in zip(records, (b"first photo", b"second photo")):
+        with open(record.image_path, "rb") as f:
+            assert f.read() == body
+
+
+def test_decode_from_memory_matches_file(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    from app.services import image_io
+
+    img = np.random.default_rng(0).integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".png", img)
+    path = tmp_path / "a.png"
+    path.write_bytes(encoded.tobytes())
+
+    from_memory, _ = image_io.decode_image(encoded.tobytes())
+    from_file, _ = image_io.load_image(str(path))
+    assert np.array_equal(from_memory, from_file)
+    assert np.array_equal(from_memory, img)
@@ -0,0 +1,12 @@
+"""
+WSGI entrypoint สำหรับ production
+    gunicorn -c gunicorn.conf.py wsgi:app
+(run.py ใช้สำหรับ dev server เท่านั้น)
+"""
+from app import create_app
+from app.services import warmup
+
+# preload_app=True -> import ส่วนหนักของ OCR ใน master ครั้งเดียว ก่อน fork worker
+warmup.preload()
+
+app = create_app()